@@ -0,0 +1,16 @@
+"""
+bench/ — Lila Closet Atelier
+─────────────────────────────────────────────────────────────────────────────
+Benchmark das telas sobre o backend em memória (`modulos/backend_memoria.py`).
+
+  bench/gerador.py  → massa de dados sintética e reproduzível (semente fixa)
+                      no formato {coleção: {id: dados}} das coleções `lila_*`
+  bench/paginas.py  → roda cada tela pelo `AppTest` do Streamlit e mede, por
+                      rerun, tempo de parede, pico de memória e leituras no
+                      backend; grava o resultado em `bench/historico.json`
+
+Uso típico (da raiz do projeto):
+
+  python -m bench.paginas --encomendas 5000 --anos 5
+  python -m bench.gerador --encomendas 5000 --anos 5 --saida dados.json
+"""
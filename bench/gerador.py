@@ -0,0 +1,395 @@
+"""
+bench/gerador.py — Lila Closet Atelier
+─────────────────────────────────────────────────────────────────────────────
+Gera uma massa de dados SINTÉTICA para o benchmark, no formato que o
+`ArmazemMemoria.carregar` / `LILA_MEMORIA_ARQUIVO` esperam:
+{coleção: {id_do_documento: dados}}.
+
+Os documentos seguem exatamente os campos gravados pelas telas:
+
+  lila_encomendas    → mesmo dicionário do `encomendas_inserir` em
+                       mod_encomendas.py (datas de tecido/confecção/prova/
+                       entrega, etapa 1-4, sinal, valor_recebido, cancelado)
+  lila_cronograma    → os lembretes automáticos de cada pedido ("🛍️ Tecido:",
+                       "🪡 Confecção:", "👗 Prova:", "👗 2ª Prova:",
+                       "🎁 Entrega:") + tarefas da agenda Pessoal
+  lila_clientes      → nome, telefone e (às vezes) medidas de DIC_MEDIDAS
+  lila_prospects     → nome, telefone (mod_prospect.py)
+  lila_recebimentos  → sinal na criação e quitação na entrega
+  lila_gastos        → tecido por pedido + despesas fixas mensais recorrentes
+  lila_fechamentos_mensais → meses já fechados (id = "YYYY-MM", v33)
+  lila_campo_horas / lila_peso_registro → lançamentos pessoais por mês
+  lila_config        → só os marcadores das migrações (base já migrada)
+
+Tudo vem de um `random.Random(semente)`: a mesma semente e os mesmos
+parâmetros geram sempre os mesmos documentos (inclusive os ids), então duas
+rodadas do benchmark em commits diferentes medem exatamente a mesma base.
+
+Uso:
+  python -m bench.gerador --encomendas 5000 --anos 5 --saida dados.json
+  LILA_DB_BACKEND=memoria LILA_MEMORIA_ARQUIVO=dados.json streamlit run main.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import random
+from collections import defaultdict
+from typing import Optional
+
+from modulos.utils import CAT_GASTOS, FUSO_BR, hoje_brasilia
+
+# Mesmos valores de modulos/mod_financeiro.py e main.py — repetidos aqui para
+# o gerador não importar `database` (o backend é escolhido pelo ambiente no
+# momento do import, e quem escolhe é o chamador do gerador).
+FORMAS_PAGAMENTO = ["Pix", "Dinheiro", "Cartão de Débito", "Cartão de Crédito", "Transferência", "Boleto"]
+CAT_PESSOAL = ["Saúde/Médico", "Exercícios", "Atividades Domésticas", "Compras", "Lazer", "Família", "Outros"]
+
+PECAS = [
+    "Vestido de festa", "Vestido de noiva", "Vestido midi", "Blazer", "Calça alfaiataria",
+    "Saia lápis", "Macacão", "Conjunto de linho", "Camisa social", "Kimono",
+    "Ajuste de barra", "Vestido de formatura", "Body", "Cropped", "Saia longa",
+]
+NOMES = [
+    "Ana", "Beatriz", "Camila", "Daniela", "Eduarda", "Fernanda", "Gabriela", "Helena",
+    "Isabela", "Juliana", "Karina", "Larissa", "Mariana", "Natália", "Olívia", "Patrícia",
+    "Rafaela", "Sabrina", "Tatiane", "Valéria", "Vitória", "Yasmin", "Letícia", "Renata",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira",
+    "Lima", "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes",
+]
+ATIVIDADES_PESSOAIS = [
+    "Academia", "Consulta médica", "Mercado", "Faxina", "Almoço em família",
+    "Cinema", "Pagar contas", "Caminhada", "Dentista", "Aniversário",
+]
+DESPESAS_FIXAS = [
+    ("Aluguel do ateliê", "Água/Luz/Aluguel", 900.0),
+    ("Conta de luz", "Água/Luz/Aluguel", 180.0),
+    ("Impulsionamento Instagram", "Marketing/Redes Sociais", 120.0),
+    ("MEI / DAS", "Impostos/Taxas", 75.0),
+]
+# Campos de DIC_MEDIDAS (mod_encomendas.py) — o valor é texto livre (v16).
+CAMPOS_MEDIDAS = [
+    "ombros", "costas", "alt_busto", "alt_frente", "busto", "cintura", "quadril",
+    "larg_braco", "comp_braco", "comprimento", "comp_perna", "coxa", "gancho", "colarinho",
+]
+
+
+def _iso_hora(rng: random.Random, dia: datetime.date) -> str:
+    """Data + hora comercial aleatória, em Brasília (mesmo formato de `agora_br().isoformat()`)."""
+    hora = datetime.time(rng.randint(8, 19), rng.randint(0, 59), rng.randint(0, 59))
+    return datetime.datetime.combine(dia, hora, FUSO_BR).isoformat()
+
+
+def _carimbos(rng: random.Random, dia: datetime.date) -> dict:
+    """`_criado_em` / `_atualizado_em` que o database.py acrescenta em toda gravação."""
+    quando = datetime.datetime.combine(dia, datetime.time(rng.randint(8, 19), rng.randint(0, 59)))
+    return {"_criado_em": quando.isoformat(), "_atualizado_em": quando.isoformat()}
+
+
+def _mes(dia: datetime.date) -> str:
+    return f"{dia.year}-{dia.month:02d}"
+
+
+def _meses_entre(inicio: datetime.date, fim: datetime.date) -> list[str]:
+    meses, ano, mes = [], inicio.year, inicio.month
+    while (ano, mes) <= (fim.year, fim.month):
+        meses.append(f"{ano}-{mes:02d}")
+        ano, mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+    return meses
+
+
+def gerar(
+    encomendas: int = 500,
+    anos: int = 2,
+    semente: int = 42,
+    tarefas_pessoais: Optional[int] = None,
+    prospects: Optional[int] = None,
+    hoje: Optional[datetime.date] = None,
+) -> dict[str, dict[str, dict]]:
+    """
+    Monta a base inteira e devolve {coleção: {id: dados}}.
+
+    encomendas       → quantidade de pedidos, espalhados pelos últimos `anos`
+                       (os mais recentes ainda em andamento, com datas futuras)
+    tarefas_pessoais → tarefas da agenda Pessoal (padrão: 2 por dia no período)
+    prospects        → contatos em prospect (padrão: 1 a cada 10 pedidos)
+    hoje             → data de referência (padrão: hoje em Brasília)
+
+    Cada pedido gera de 3 a 5 lembretes no cronograma, 1-2 recebimentos e
+    (se precisar de tecido) 1 gasto — então `encomendas=5000, anos=5,
+    tarefas_pessoais=28000` dá uma base de ~50 mil linhas no cronograma.
+    """
+    rng = random.Random(semente)
+    hoje = hoje or hoje_brasilia()
+    inicio = hoje - datetime.timedelta(days=365 * anos)
+    dias_periodo = (hoje - inicio).days
+    if tarefas_pessoais is None:
+        tarefas_pessoais = dias_periodo * 2
+    if prospects is None:
+        prospects = max(encomendas // 10, 1)
+
+    base: dict[str, dict[str, dict]] = defaultdict(dict)
+    seq: dict[str, int] = defaultdict(int)
+
+    def novo_id(prefixo: str) -> str:
+        seq[prefixo] += 1
+        return f"{prefixo}{seq[prefixo]:06d}"
+
+    # ── Clientes (cerca de 1 para cada 1,6 pedido — há clientes recorrentes)
+    nomes_clientes = []
+    vistos = set()
+    for _ in range(max(int(encomendas / 1.6), 1)):
+        nome = f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}"
+        if nome in vistos:
+            nome = f"{nome} {rng.choice(SOBRENOMES)}"
+        if nome in vistos:
+            continue
+        vistos.add(nome)
+        nomes_clientes.append(nome)
+        dia = inicio + datetime.timedelta(days=rng.randrange(dias_periodo))
+        doc = {
+            "nome": nome,
+            "telefone": f"(11) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+            "criado_em": _iso_hora(rng, dia),
+            **_carimbos(rng, dia),
+        }
+        if rng.random() < 0.6:
+            doc.update({c: f"{rng.randint(20, 110)}" for c in CAMPOS_MEDIDAS})
+            doc["outro"] = ""
+        base["lila_clientes"][novo_id("cli")] = doc
+
+    # ── Encomendas + lembretes + recebimentos + gasto de tecido
+    for _ in range(encomendas):
+        criado = inicio + datetime.timedelta(days=rng.randrange(dias_periodo + 1))
+        entrega = criado + datetime.timedelta(days=rng.randint(15, 60))
+        confeccao = entrega - datetime.timedelta(days=rng.randint(8, 14))
+        prova = confeccao + datetime.timedelta(days=rng.randint(2, 4))
+        tem_prova2 = rng.random() < 0.3
+        prova2 = prova + datetime.timedelta(days=2) if tem_prova2 else None
+        precisa_tecido = rng.random() < 0.7
+        tecido = confeccao - datetime.timedelta(days=rng.randint(1, 5))
+
+        cliente, peca = rng.choice(nomes_clientes), rng.choice(PECAS)
+        valor_total = float(rng.randrange(150, 3000, 10))
+        sinal = round(valor_total * rng.choice((0.3, 0.4, 0.5)), 2)
+        cancelado = 1 if rng.random() < 0.04 else 0
+        if entrega < hoje - datetime.timedelta(days=3):
+            etapa = 4 if rng.random() < 0.93 else 3
+        elif prova <= hoje:
+            etapa = 3
+        elif confeccao <= hoje:
+            etapa = 2
+        else:
+            etapa = 1
+        quitado = etapa == 4 and not cancelado and rng.random() < 0.95
+        forma = rng.choice(FORMAS_PAGAMENTO)
+
+        e_id = novo_id("enc")
+        base["lila_encomendas"][e_id] = {
+            "cliente": cliente, "peca": peca,
+            "descricao": f"{peca} sob medida", "valor_total": valor_total, "sinal": sinal,
+            "valor_recebido": valor_total if quitado else sinal,
+            "etapa": etapa, "precisa_tecido": 1 if precisa_tecido else 0,
+            "data_tecido":    tecido.isoformat(),
+            "data_confeccao": confeccao.isoformat(),
+            "data_prova":     prova.isoformat(),
+            "tem_prova2":     1 if tem_prova2 else 0,
+            "data_prova2":    prova2.isoformat() if prova2 else "",
+            "data_entrega":   entrega.isoformat(),
+            "cpf_cliente": "", "rg_cliente": "",
+            "forma_pagamento": forma, "observacoes": "",
+            "cancelado": cancelado,
+            "criado_em": _iso_hora(rng, criado),
+            **_carimbos(rng, criado),
+        }
+        if cancelado:
+            continue
+
+        desc = f"{peca} ({cliente})"
+        lembretes = []
+        if precisa_tecido:
+            lembretes.append((f"🛍️ Tecido: {desc}", "Compras", 1.0, tecido))
+        lembretes.append((f"🪡 Confecção: {desc}", "Costura", 3.0, confeccao))
+        lembretes.append((f"👗 Prova: {desc}",     "Costura", 1.0, prova))
+        if prova2:
+            lembretes.append((f"👗 2ª Prova: {desc}", "Costura", 1.0, prova2))
+        lembretes.append((f"🎁 Entrega: {desc}",   "Costura", 0.5, entrega))
+        for tarefa, cat, horas, dia in lembretes:
+            base["lila_cronograma"][novo_id("cro")] = {
+                "tarefa": tarefa, "categoria": cat, "horas": horas,
+                "data": dia.isoformat(), "frequencia": "Pontual",
+                "concluida": 1 if dia < hoje and etapa == 4 else 0,
+                "encomenda_id": e_id, "tipo_agenda": "Trabalho",
+                **_carimbos(rng, criado),
+            }
+
+        if sinal > 0:
+            base["lila_recebimentos"][novo_id("rec")] = {
+                "encomenda_id": e_id,
+                "descricao": f"Pagamento parcial – {cliente}: {peca}",
+                "valor": sinal, "categoria": "Venda de peça",
+                "data": criado.isoformat(), "forma_pagamento": forma,
+                "conciliado": 1 if criado < hoje - datetime.timedelta(days=40) else 0,
+                "criado_em": _iso_hora(rng, criado),
+                **_carimbos(rng, criado),
+            }
+        if quitado:
+            base["lila_recebimentos"][novo_id("rec")] = {
+                "encomenda_id": e_id,
+                "descricao": f"Quitação – {cliente}: {peca}",
+                "valor": round(valor_total - sinal, 2), "categoria": "Venda de peça",
+                "data": entrega.isoformat(), "forma_pagamento": forma,
+                "conciliado": 1 if entrega < hoje - datetime.timedelta(days=40) else 0,
+                "criado_em": _iso_hora(rng, entrega),
+                **_carimbos(rng, entrega),
+            }
+        if precisa_tecido and tecido <= hoje:
+            base["lila_gastos"][novo_id("gas")] = {
+                "encomenda_id": e_id,
+                "descricao": f"Tecido – {desc}",
+                "valor": round(valor_total * rng.uniform(0.1, 0.3), 2),
+                "data": tecido.isoformat(), "categoria": "Tecido",
+                "pago": 1, "recorrente": 0, "grande_despesa_prevista": 0,
+                "conciliado": 1 if tecido < hoje - datetime.timedelta(days=40) else 0,
+                "criado_em": _iso_hora(rng, tecido),
+                **_carimbos(rng, tecido),
+            }
+
+    # ── Gastos avulsos e fixos do mês, lançamentos pessoais, peso
+    meses = _meses_entre(inicio, hoje)
+    for mes in meses:
+        dia_1 = datetime.date.fromisoformat(f"{mes}-01")
+        antigo = dia_1 < hoje.replace(day=1) - datetime.timedelta(days=31)
+        for descricao, cat, valor in DESPESAS_FIXAS:
+            dia = dia_1 + datetime.timedelta(days=rng.randint(0, 9))
+            if dia > hoje:
+                continue
+            base["lila_gastos"][novo_id("gas")] = {
+                "encomenda_id": None, "descricao": descricao,
+                "valor": round(valor * rng.uniform(0.9, 1.1), 2),
+                "data": dia.isoformat(), "categoria": cat,
+                "pago": 1, "recorrente": 1, "grande_despesa_prevista": 0,
+                "conciliado": 1 if antigo else 0,
+                "criado_em": _iso_hora(rng, dia),
+                **_carimbos(rng, dia),
+            }
+        for _ in range(rng.randint(2, 6)):
+            dia = dia_1 + datetime.timedelta(days=rng.randint(0, 27))
+            if dia > hoje:
+                continue
+            base["lila_gastos"][novo_id("gas")] = {
+                "encomenda_id": None, "descricao": "Compra avulsa",
+                "valor": round(rng.uniform(10, 250), 2),
+                "data": dia.isoformat(), "categoria": rng.choice(CAT_GASTOS),
+                "pago": 1, "recorrente": 0, "grande_despesa_prevista": 0,
+                "conciliado": 1 if antigo else 0,
+                "criado_em": _iso_hora(rng, dia),
+                **_carimbos(rng, dia),
+            }
+        for _ in range(rng.randint(4, 12)):
+            dia = dia_1 + datetime.timedelta(days=rng.randint(0, 27))
+            if dia > hoje:
+                continue
+            horas = float(rng.choice((1, 2, 3, 4, 6)))
+            base["lila_campo_horas"][novo_id("hor")] = {
+                "data": dia.isoformat(), "horas": horas,
+                "descricao": "Trabalho de campo", "mes_ano": mes,
+                "criado_em": _iso_hora(rng, dia),
+                **_carimbos(rng, dia),
+            }
+        base["lila_peso_registro"][mes] = {
+            "mes_ano": mes, "data": (dia_1 + datetime.timedelta(days=4)).isoformat(),
+            "peso_kg": round(rng.uniform(58, 66), 1),
+            **_carimbos(rng, dia_1),
+        }
+
+    # ── Agenda pessoal
+    for _ in range(tarefas_pessoais):
+        dia = inicio + datetime.timedelta(days=rng.randrange(dias_periodo + 30))
+        base["lila_cronograma"][novo_id("cro")] = {
+            "tarefa": rng.choice(ATIVIDADES_PESSOAIS), "categoria": rng.choice(CAT_PESSOAL),
+            "horas": rng.choice((0.5, 1.0, 1.5, 2.0)), "data": dia.isoformat(),
+            "frequencia": "Pontual", "concluida": 1 if dia < hoje else 0,
+            "tipo_agenda": "Pessoal",
+            **_carimbos(rng, min(dia, hoje)),
+        }
+
+    # ── Prospects
+    for _ in range(prospects):
+        dia = inicio + datetime.timedelta(days=rng.randrange(dias_periodo + 1))
+        base["lila_prospects"][novo_id("pro")] = {
+            "nome": f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}",
+            "telefone": f"(11) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+            "criado_em": _iso_hora(rng, dia),
+            **_carimbos(rng, dia),
+        }
+
+    # ── Fechamentos: todos os meses até dois atrás, com o saldo encadeado
+    receitas, despesas = defaultdict(float), defaultdict(float)
+    for r in base["lila_recebimentos"].values():
+        receitas[r["data"][:7]] += r["valor"]
+    for g in base["lila_gastos"].values():
+        if g["pago"]:
+            despesas[g["data"][:7]] += g["valor"]
+    saldo = 0.0
+    for mes in meses[:-2]:
+        fim = round(saldo + receitas[mes] - despesas[mes], 2)
+        dia_fech = datetime.date.fromisoformat(f"{mes}-28") + datetime.timedelta(days=5)
+        base["lila_fechamentos_mensais"][mes] = {
+            "mes": mes, "saldo_inicial": saldo,
+            "receitas_mes": round(receitas[mes], 2), "despesas_mes": round(despesas[mes], 2),
+            "lucro_real_mes": round(receitas[mes] - despesas[mes], 2),
+            "saldo_final": fim, "grandes_despesas_previstas": 0.0, "fundos_disponiveis": fim,
+            "saldo_extrato_informado": fim, "diferenca": 0.0,
+            "fechado": 1, "observacoes": "",
+            "data_fechamento": _iso_hora(rng, dia_fech),
+            "_atualizado_em": dia_fech.isoformat(),
+        }
+        saldo = fim
+
+    # ── Marcadores das migrações de `database.py`: a base já nasce no
+    # formato atual (ids naturais, `pago` preenchido, tudo carimbado), então
+    # o benchmark não mede a leitura única de cada coleção que elas fazem.
+    agora = datetime.datetime.combine(hoje, datetime.time(8)).isoformat()
+    base["lila_config"] = {
+        marcador: {"valor": agora}
+        for marcador in ("_migracao_ids_naturais", "_migracao_flags_filtradas", "_migracao_carimbos")
+    }
+
+    return dict(base)
+
+
+def resumo(base: dict[str, dict[str, dict]]) -> dict[str, int]:
+    """Quantidade de documentos por coleção."""
+    return {colecao: len(docs) for colecao, docs in sorted(base.items())}
+
+
+def salvar_json(base: dict[str, dict[str, dict]], caminho: str) -> None:
+    """Grava a base no formato de `LILA_MEMORIA_ARQUIVO` / `ArmazemMemoria.carregar_json`."""
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(base, f, ensure_ascii=False)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="Gera uma base sintética das coleções lila_*.")
+    p.add_argument("--encomendas", type=int, default=500)
+    p.add_argument("--anos", type=int, default=2)
+    p.add_argument("--semente", type=int, default=42)
+    p.add_argument("--tarefas-pessoais", type=int, default=None)
+    p.add_argument("--prospects", type=int, default=None)
+    p.add_argument("--saida", default="dados_bench.json")
+    args = p.parse_args(argv)
+
+    base = gerar(args.encomendas, args.anos, args.semente, args.tarefas_pessoais, args.prospects)
+    salvar_json(base, args.saida)
+    for colecao, qtd in resumo(base).items():
+        print(f"{colecao:28s} {qtd:>8d}")
+    print(f"→ {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
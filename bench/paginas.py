@@ -0,0 +1,286 @@
+"""
+bench/paginas.py — Lila Closet Atelier
+─────────────────────────────────────────────────────────────────────────────
+Benchmark por TELA. Para cada página do menu (`renderizar_nova_encomenda`,
+`renderizar_agenda`, `renderizar_gerenciar_pedidos`, `renderizar_financeiro`,
+...) roda o `main.py` inteiro pelo `streamlit.testing.v1.AppTest`, já
+autenticado e com `st.session_state.pagina` apontando para a tela, e mede
+POR RERUN:
+
+  segundos        → tempo de parede do `AppTest.run()`
+  pico_memoria_mb → pico de memória alocada no rerun (`tracemalloc`)
+  leituras        → documentos lidos no backend (`ArmazemMemoria.leituras`,
+                    mesma regra de cobrança do Firestore)
+  escritas        → documentos gravados no backend
+
+O rerun 1 é o "frio" (processo novo, nenhum cache do Streamlit, tabelas em
+memória vazias); os seguintes são os "quentes" — o caso comum, já que o
+Streamlit reexecuta o script a cada clique. Cada tela roda num processo
+separado para que uma não aqueça os caches da outra.
+
+Roda sempre sobre o backend em memória (`LILA_DB_BACKEND=memoria`) semeado
+pelo `bench/gerador.py` — sem rede e sem gastar cota. O resultado de cada
+rodada é acrescentado em `bench/historico.json` (com o commit atual), e a
+tabela impressa compara com a última rodada de MESMOS parâmetros, marcando
+com ⚠️ o que piorou.
+
+Uso (da raiz do projeto):
+  python -m bench.paginas                          # 500 pedidos, 2 anos
+  python -m bench.paginas --encomendas 5000 --anos 5 --tarefas-pessoais 28000
+  python -m bench.paginas --paginas agenda financeiro --reruns 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Optional
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARQ_HISTORICO = os.path.join(RAIZ, "bench", "historico.json")
+
+# Mesmas chaves do menu lateral do main.py (`_nav_btn`).
+PAGINAS = (
+    "nova_encomenda", "prospect", "agenda", "medidas",
+    "gerenciar_pedidos", "financeiro", "configuracoes",
+)
+
+# Acima disso (em relação à última rodada igual) a tabela marca ⚠️.
+TOLERANCIA_TEMPO = 0.20
+TOLERANCIA_MEMORIA = 0.20
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# PROCESSO FILHO — mede UMA tela
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _medir_pagina(pagina: str, arq_dados: str, reruns: int, timeout: float, memoria: bool) -> dict:
+    """
+    Roda no processo filho: configura o backend em memória ANTES de o
+    `database` ser importado (o backend é lido do ambiente no import),
+    semeia o armazém e executa `reruns` vezes a tela pelo AppTest.
+    """
+    os.environ["LILA_DB_BACKEND"] = "memoria"
+    os.environ.pop("LILA_MEMORIA_ARQUIVO", None)
+    os.environ.setdefault("LILA_DADOS_DIR", tempfile.mkdtemp(prefix="lila_bench_"))
+    os.chdir(RAIZ)
+    if RAIZ not in sys.path:
+        sys.path.insert(0, RAIZ)
+
+    from streamlit.testing.v1 import AppTest
+    from modulos.backend_memoria import ARMAZEM_PADRAO
+
+    ARMAZEM_PADRAO.limpar()
+    ARMAZEM_PADRAO.carregar_json(arq_dados)
+
+    at = AppTest.from_file(os.path.join(RAIZ, "main.py"), default_timeout=timeout)
+    at.session_state["token_autenticado"] = True
+    at.session_state["pagina"] = pagina
+
+    if memoria:
+        tracemalloc.start()
+    medicoes, erro = [], None
+    for i in range(reruns):
+        leituras_antes, escritas_antes = ARMAZEM_PADRAO.leituras, ARMAZEM_PADRAO.escritas
+        if memoria:
+            tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        try:
+            at.run()
+        except Exception as e:  # timeout do AppTest, p.ex.
+            erro = f"{type(e).__name__}: {e}"
+            break
+        segundos = time.perf_counter() - t0
+        medicoes.append({
+            "rerun": i + 1,
+            "segundos": round(segundos, 4),
+            "pico_memoria_mb": round(tracemalloc.get_traced_memory()[1] / 2**20, 2) if memoria else None,
+            "leituras": ARMAZEM_PADRAO.leituras - leituras_antes,
+            "escritas": ARMAZEM_PADRAO.escritas - escritas_antes,
+        })
+        if at.exception:
+            erro = at.exception[0].message
+            break
+    if memoria:
+        tracemalloc.stop()
+    return {"reruns": medicoes, "erro": erro}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# PROCESSO PRINCIPAL — gera a base, dispara um filho por tela, grava histórico
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _commit_atual() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ler_historico(caminho: str = ARQ_HISTORICO) -> list[dict]:
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _gravar_historico(rodada: dict, caminho: str) -> None:
+    historico = ler_historico(caminho)
+    historico.append(rodada)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(historico, f, ensure_ascii=False, indent=1)
+
+
+def _resumo_pagina(res: dict) -> dict:
+    """Frio (rerun 1) × quente (mediana dos demais) de uma tela."""
+    reruns = res.get("reruns") or []
+    if not reruns:
+        return {}
+    quentes = reruns[1:] or reruns
+    picos = [r["pico_memoria_mb"] for r in reruns if r.get("pico_memoria_mb") is not None]
+    return {
+        "frio_s": reruns[0]["segundos"],
+        "quente_s": statistics.median(r["segundos"] for r in quentes),
+        "frio_leituras": reruns[0]["leituras"],
+        "quente_leituras": max(r["leituras"] for r in quentes),
+        "pico_mb": max(picos) if picos else None,
+    }
+
+
+def _piorou(atual: Optional[float], anterior: Optional[float], tolerancia: float) -> bool:
+    if atual is None or anterior is None:
+        return False
+    return atual > anterior * (1 + tolerancia) and atual - anterior > 1e-3
+
+
+def imprimir_tabela(rodada: dict, anterior: Optional[dict] = None) -> None:
+    cab = f"{'tela':18s} {'frio s':>8s} {'quente s':>9s} {'leit. frio':>10s} {'leit. quente':>12s} {'pico MB':>8s}"
+    print(cab)
+    print("─" * len(cab))
+    for pagina, res in rodada["paginas"].items():
+        if res.get("erro"):
+            print(f"{pagina:18s} ERRO: {res['erro']}")
+        r = _resumo_pagina(res)
+        if not r:
+            continue
+        a = _resumo_pagina((anterior or {}).get("paginas", {}).get(pagina, {}))
+        alerta = lambda chave, tol: " ⚠️" if a and _piorou(r[chave], a.get(chave), tol) else ""
+        pico = f"{r['pico_mb']:8.1f}" if r["pico_mb"] is not None else f"{'—':>8s}"
+        print(
+            f"{pagina:18s} {r['frio_s']:8.2f} {r['quente_s']:9.2f}"
+            f" {r['frio_leituras']:>10d} {r['quente_leituras']:>12d} {pico}"
+            f"{alerta('frio_s', TOLERANCIA_TEMPO)}{alerta('quente_s', TOLERANCIA_TEMPO)}"
+            f"{alerta('frio_leituras', 0)}{alerta('quente_leituras', 0)}"
+            f"{alerta('pico_mb', TOLERANCIA_MEMORIA)}"
+        )
+    if anterior:
+        print(f"(comparado com {anterior.get('commit') or '?'} de {anterior['quando']})")
+
+
+def rodar(
+    paginas=PAGINAS,
+    encomendas: int = 500,
+    anos: int = 2,
+    semente: int = 42,
+    tarefas_pessoais: Optional[int] = None,
+    reruns: int = 3,
+    timeout: float = 300.0,
+    memoria: bool = True,
+    historico: Optional[str] = ARQ_HISTORICO,
+) -> dict:
+    """
+    Gera a base, mede cada tela num processo próprio e (se `historico`)
+    acrescenta a rodada no arquivo de histórico. Devolve a rodada.
+    """
+    from bench.gerador import gerar, resumo, salvar_json
+
+    parametros = {
+        "encomendas": encomendas, "anos": anos, "semente": semente,
+        "tarefas_pessoais": tarefas_pessoais, "reruns": reruns, "memoria": memoria,
+    }
+    with tempfile.TemporaryDirectory(prefix="lila_bench_") as tmp:
+        base = gerar(encomendas, anos, semente, tarefas_pessoais)
+        arq_dados = os.path.join(tmp, "dados.json")
+        salvar_json(base, arq_dados)
+
+        rodada = {
+            "quando": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": _commit_atual(),
+            "python": sys.version.split()[0],
+            "parametros": parametros,
+            "documentos": resumo(base),
+            "paginas": {},
+        }
+        for pagina in paginas:
+            arq_saida = os.path.join(tmp, f"{pagina}.json")
+            cmd = [
+                sys.executable, "-m", "bench.paginas", "--filho", pagina,
+                "--dados", arq_dados, "--saida-filho", arq_saida,
+                "--reruns", str(reruns), "--timeout", str(timeout),
+            ]
+            if not memoria:
+                cmd.append("--sem-memoria")
+            env = {**os.environ, "LILA_DADOS_DIR": os.path.join(tmp, f"dados_{pagina}")}
+            proc = subprocess.run(cmd, cwd=RAIZ, env=env, capture_output=True, text=True)
+            if proc.returncode == 0 and os.path.exists(arq_saida):
+                with open(arq_saida, encoding="utf-8") as f:
+                    rodada["paginas"][pagina] = json.load(f)
+            else:
+                ultima = (proc.stderr.strip().splitlines() or ["processo falhou"])[-1]
+                rodada["paginas"][pagina] = {"reruns": [], "erro": ultima}
+
+    if historico:
+        anteriores = [h for h in ler_historico(historico) if h.get("parametros") == parametros]
+        imprimir_tabela(rodada, anteriores[-1] if anteriores else None)
+        _gravar_historico(rodada, historico)
+    else:
+        imprimir_tabela(rodada)
+    return rodada
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="Mede tempo, memória e leituras de cada tela do app.")
+    p.add_argument("--paginas", nargs="+", choices=PAGINAS, default=list(PAGINAS))
+    p.add_argument("--encomendas", type=int, default=500)
+    p.add_argument("--anos", type=int, default=2)
+    p.add_argument("--semente", type=int, default=42)
+    p.add_argument("--tarefas-pessoais", type=int, default=None)
+    p.add_argument("--reruns", type=int, default=3, help="execuções por tela (a 1ª é a fria)")
+    p.add_argument("--timeout", type=float, default=300.0, help="limite por rerun, em segundos")
+    p.add_argument("--sem-memoria", action="store_true",
+                   help="não liga o tracemalloc (tempos mais fiéis, sem pico de memória)")
+    p.add_argument("--historico", default=ARQ_HISTORICO,
+                   help="arquivo JSON de histórico ('' para não gravar)")
+    # Uso interno: o processo principal chama a si mesmo, uma vez por tela.
+    p.add_argument("--filho", choices=PAGINAS, help=argparse.SUPPRESS)
+    p.add_argument("--dados", help=argparse.SUPPRESS)
+    p.add_argument("--saida-filho", help=argparse.SUPPRESS)
+    args = p.parse_args(argv)
+
+    if args.filho:
+        res = _medir_pagina(args.filho, args.dados, args.reruns, args.timeout, not args.sem_memoria)
+        with open(args.saida_filho, "w", encoding="utf-8") as f:
+            json.dump(res, f)
+        # Sai sem esperar as threads de fundo (fila de gravações, listeners).
+        sys.stdout.flush()
+        os._exit(0)
+
+    rodar(
+        args.paginas, args.encomendas, args.anos, args.semente, args.tarefas_pessoais,
+        args.reruns, args.timeout, not args.sem_memoria, args.historico or None,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -66,16 +66,283 @@ releituras redundantes entre uma gravação e outra.
       sem filtro de ordenação do Firestore, e ordenar em Python (mesmo
       padrão já usado em `prospects_listar`, que nunca teve esse problema).
       Assim, nenhuma cliente cadastrada pode ficar de fora da lista.
+
+[v22] ENCOMENDAS EM TEMPO REAL (listener) — `encomendas_listar()` deixou de
+      reler a coleção `lila_encomendas` inteira a cada 20 s (TTL) e a cada
+      gravação (`.clear()`). Agora existe UMA cópia em memória da coleção por
+      processo do servidor (`_espelho_encomendas`, guardada com
+      `@st.cache_resource`, compartilhada por todas as sessões), mantida em
+      dia por um listener `on_snapshot` do Firestore: a primeira carga lê
+      todos os documentos uma única vez, e dali em diante só os documentos
+      que MUDARAM chegam pelo listener e são aplicados na tabela. Na prática,
+      o custo de leitura em regime fica proporcional ao número de alterações,
+      não ao tamanho da coleção × número de reruns. `encomendas_buscar()`
+      também passou a responder direto dessa cópia.
+
+[v23] WRITE-THROUGH EM VEZ DE `.clear()` — todas as listagens deste arquivo
+      passaram a usar tabelas em memória por processo (`_tabela`, mesmo
+      mecanismo da cópia de encomendas do v22, só que carregada por
+      consulta + TTL em vez de listener). Quando uma gravação dá certo, a
+      função de escrita aplica a mudança direto nessas tabelas, por `rowid`
+      (`_propagar_insercao` / `_propagar_atualizacao` / `_propagar_remocao`)
+      em vez de jogar o cache inteiro fora. Resultado: salvar algo custa 1
+      escrita e nenhuma leitura extra, e o `st.rerun()` logo depois da
+      gravação já mostra o dado novo. O TTL (`_TTL_LISTAS`) continua
+      existindo só para enxergar alterações feitas por FORA do app (console
+      do Firestore etc.).
+
+[v24] EXCLUSÕES EM LOTE — as exclusões em cascata (`encomendas_cancelar`,
+      `encomendas_deletar_completo`) e a limpeza de "gastos pagos"
+      (`gastos_deletar_pagos`) apagavam documento por documento, com uma ida
+      e volta de rede para CADA um. Agora passam todas por `bulk_delete`,
+      que junta as exclusões em `WriteBatch` de até `_LIMITE_LOTE` (500,
+      o máximo do Firestore) operações — centenas de documentos viram
+      poucas idas ao servidor.
+
+[v25] PROJEÇÃO DE CAMPOS (perfis por tela) — `clientes_listar`,
+      `gastos_listar` e `encomendas_listar` aceitam `campos=`, a lista de
+      colunas de que a tela precisa de verdade. Cada projeção vira uma
+      tabela em memória própria, pequena, que recebe o write-through
+      normalmente. O que se ganha depende do espelho em disco [v30]:
+        • espelho LIGADO (o padrão com o Firestore): o espelho assume — a
+          coleção é sincronizada com os documentos INTEIROS e a projeção é
+          feita aqui, sobre a cópia local. Nada muda no tráfego nem nas
+          leituras; ganha-se só memória e a cópia por rerun menor;
+        • espelho DESLIGADO (`LILA_ESPELHO_DISCO=0`): clientes e gastos
+          vão com `select()` do Firestore, e CPF, RG, `observacoes` e as 14
+          medidas nem trafegam (a leitura é cobrada igual, por documento).
+      Encomendas vêm sempre inteiras pelo listener (o `on_snapshot` não
+      aceita projeção); a projeção corta as colunas na montagem da visão.
+      Os perfis prontos ficam nas constantes `PERFIL_*` logo abaixo.
+
+[v26] AGREGAÇÕES NO SERVIDOR — contagens e somas (`agregado_contar` /
+      `agregado_somar`) usam as consultas de agregação do Firestore
+      (`count()` / `sum()`): 1 leitura por consulta (a cada 1.000 documentos
+      que casam) em vez de 1 leitura por documento. O cabeçalho do app
+      passa por elas (`encomendas_contar_ativas`; `encomendas_contar_no_mes`
+      conta por `criado_em` com `_criado_em` de reserva, o que uma
+      agregação não expressa, e sai da cópia em memória de encomendas). Cada resultado tem a sua própria entrada de cache, invalidada
+      pelas gravações da coleção (mesmo caminho do write-through do v23). Se
+      a coleção já está inteira em memória e em dia (ex.: a cópia de
+      encomendas do v22), a conta é feita ali mesmo, sem leitura nenhuma; e
+      se o Firestore recusar a consulta por falta de índice composto
+      (`FailedPrecondition`), a conta também cai para a memória — e aquela
+      conta passa a ir direto para a memória, sem repetir a consulta.
+      O histórico de horas de campo (`campo_horas_historico`) é uma consulta
+      projetada só (`mes_ano` + `horas`) somada por mês: uma agregação por
+      mês custaria uma ida ao servidor para cada mês do intervalo.
+
+[v27] CLIENTE FIRESTORE ÚNICO POR PROCESSO — `get_db()` criava um
+      `firestore.Client` novo por SESSÃO (`st.session_state.db`): cada aba
+      aberta pagava de novo a leitura das credenciais, o handshake do canal
+      gRPC e um pool de conexões próprio. Agora os clientes são criados uma
+      vez por processo (`@st.cache_resource`) e compartilhados por todas as
+      sessões. O canal gRPC ganhou keep-alive configurável
+      (`LILA_GRPC_KEEPALIVE_MS`, default 30 s — mantém a conexão "quente"
+      entre os cliques) e dá para abrir mais de um canal
+      (`LILA_GRPC_CANAIS`, default 1), distribuídos em rodízio. O canal
+      próprio depende de atributos internos do cliente: só é montado na
+      versão conferida da biblioteca (a do requirements.txt); em outra,
+      fica o canal padrão.
+
+[v28] CONFIGURAÇÃO NUMA LEITURA SÓ — `cfg_get` lia um documento de
+      `lila_config` por chave, e as telas de Configurações e Financeiro
+      pedem de 5 a 9 chaves em sequência: a cada TTL vencido eram até 9
+      idas ao servidor, uma depois da outra. Agora todas as chaves vêm
+      juntas num único `get_all` (`cfg_todos`), `cfg_get` só consulta esse
+      pacote e `cfg_carregar()` devolve um objeto tipado (`Configuracao`,
+      números já convertidos). `init_config_defaults` também passou a
+      fazer 1 `get_all` + 1 lote de gravação (só das chaves que faltam),
+      e `cfg_set_varios` grava um formulário inteiro num lote só.
+
+[v29] `cronograma_com_cliente` SEM N+1 — o nome da cliente de cada tarefa
+      vem de um join vetorizado com a cópia em memória de encomendas; o que
+      não estiver lá é buscado num único `get_all` (ver a função).
+
+[v30] ESPELHO EM DISCO COM SINCRONIZAÇÃO INCREMENTAL — quando o Streamlit
+      Cloud "dorme" ou o app reinicia, todas as tabelas em memória somem e
+      a primeira pessoa a abrir o app pagava a leitura COMPLETA de todas as
+      coleções. Agora cada coleção também fica gravada em disco (SQLite em
+      `LILA_DADOS_DIR`, default `.lila_dados/`), junto com a sua "marca
+      d'água": o maior `_atualizado_em` já visto. Toda gravação feita por
+      este arquivo passou a carimbar `_atualizado_em` (`_carimbado`), e a
+      recarga de uma coleção lê só `where("_atualizado_em", ">=", marca)`
+      — o custo de um reinício fica proporcional ao que mudou desde a
+      última sincronização, não ao histórico inteiro. Exclusões feitas
+      pelo app chegam ao disco por write-through; as feitas por fora só
+      aparecem na releitura completa, feita a cada
+      `_RESSINC_COMPLETA_S` (24 h) — e, para encomendas, também na
+      primeira vez que o listener abre no processo (a cópia do disco
+      responde enquanto o listener sem filtro traz a coleção inteira).
+      Documentos gravados antes do carimbo ganham `_atualizado_em` uma vez,
+      na inicialização (`migrar_carimbos`), senão a sincronização
+      incremental nunca os veria. Com o espelho ligado, filtros e
+      projeções [v25/v32] das `_TabelaConsulta` são aplicados localmente
+      sobre a cópia sincronizada: nenhuma delas chega ao Firestore com
+      `where`/`select()`. `LILA_ESPELHO_DISCO=0` desliga tudo isso e volta
+      às consultas diretas (com `select()` e `where` no servidor).
+
+[v31] COLUNAS TIPADAS (esquema por coleção) — os DataFrames saíam com
+      colunas `object` e cada tela reconvertia os mesmos campos a cada rerun
+      (`.astype(int)`, `.fillna(0).astype(float)`, `.apply(_mes_de)`...).
+      Agora `_ESQUEMAS` diz o tipo de cada campo e `_tipar` converte UMA vez,
+      na montagem da visão (que já é memorizada por versão da tabela):
+        • flags e etapa → `Int64`, com o valor padrão no lugar do campo
+          ausente (flags = 0, etapa = 1);
+        • dinheiro / números → `float64` (inválido vira NaN);
+        • datas → a coluna original continua TEXTO ISO (as telas comparam
+          com `hoje.isoformat()` etc.), e ganham duas colunas derivadas:
+          `<campo>_dt` (`datetime64`) e `<campo>_mes` ("YYYY-MM", mesmo
+          resultado de `_mes_de`);
+        • categoria / tipo_agenda / forma_pagamento → `category`.
+      Com isso dá para filtrar direto: `df["pago"] == 1`,
+      `df["data_mes"] == mes_str`.
+
+[v32] LEITURAS POR MÊS NO FINANCEIRO — as telas financeiras olham um mês
+      de cada vez, mas `gastos_listar` / `recebimentos_listar` traziam o
+      histórico inteiro a cada recarga. Agora as tabelas em memória aceitam
+      também condições de intervalo (`condicoes=`, ex.: `data >= "2026-03"`)
+      e existem leituras por mês (`gastos_listar_mes`,
+      `recebimentos_listar_mes`, uma tabela por mês), a partir de um mês
+      (`*_listar_desde`, para o saldo depois do último fechamento) e só das
+      despesas em aberto (`gastos_em_aberto`). Totais do histórico viram
+      agregação no servidor (`recebimentos_total`, `gastos_total_pago`);
+      o custo de cada pedido sai de uma soma por `encomenda_id` sobre a
+      tabela só com `encomenda_id`/`valor` (`gastos_totais_por_encomenda`,
+      uma conta para todos os pedidos da tela de Pagamentos). Mês já
+      FECHADO não muda mais, então a tabela dele só é relida a cada
+      `_TTL_MES_FECHADO`; o mês aberto continua no `_TTL_LISTAS`. Os
+      `where` só chegam ao servidor com o espelho em disco desligado [v30];
+      com ele ligado, a sincronização incremental já lê só o que mudou, e
+      as tabelas por mês são recortes locais da cópia (menos memória e
+      menos linhas por rerun, não menos leituras). Como `pago == 0` é
+      filtrado assim (no servidor ou na cópia, com o mesmo critério de
+      `_casa_filtros`), `migrar_flags_filtradas` grava uma vez (na
+      inicialização) `pago` nos gastos antigos que não tinham o campo —
+      senão eles sumiriam das despesas em aberto, onde `_tipar` sempre os
+      mostrou (pago = 0).
+
+[v33] IDS NATURAIS EM FECHAMENTOS E PESO — `fechamento_salvar` e
+      `peso_upsert` faziam uma consulta `where("mes", "==", ...)` antes de
+      cada gravação só para descobrir o id do documento. Agora o id do
+      documento É o mês (`lila_fechamentos_mensais/2026-03`,
+      `lila_peso_registro/2026-03`): o upsert vira um único
+      `set(..., merge=True)` (uma gravação, zero leituras) e
+      `fechamento_buscar` vira busca pelo id. Os documentos antigos (id
+      aleatório) são copiados para o id do mês uma única vez por
+      `migrar_ids_naturais` (marcador em `lila_config`).
+
+[v34] CARGA EM PARALELO — com o cache frio, cada tela esperava uma leitura
+      terminar para começar a próxima (encomendas, config, fechamentos,
+      gastos, recebimentos…), e o tempo até a primeira pintura era a SOMA
+      de todas. `precarregar(f1, f2, ...)` roda as leituras ao mesmo tempo
+      num pool de threads do processo (`LILA_LEITURAS_PARALELAS`, padrão
+      6) e devolve os resultados na mesma ordem: a espera passa a ser a da
+      leitura mais lenta. Com o cache quente cada leitura volta na hora.
+
+[v35] CRONOGRAMA COM UMA TABELA SÓ — `cronograma_listar` abria uma tabela
+      (consulta) por combinação de `tipo_agenda`/`concluida`, e as telas
+      usam várias (Trabalho pendente, Trabalho até hoje, Trabalho tudo,
+      Pessoal pendente…). Agora há uma tabela base com a coleção inteira e
+      cada combinação é uma visão filtrada em memória: depois de uma
+      gravação, uma recarga em vez de várias sobrepostas.
+
+[v36] CONTADORES DE LEITURA/ESCRITA — todo o cache acima existe para não
+      passar das ~50 mil leituras/dia do plano Spark, mas nada media as
+      leituras. Agora cada ida ao Firestore deste módulo é contada
+      (documentos lidos e gravados) por função pública, coleção, tela,
+      sessão e dia da cota (o dia da cota vira à meia-noite do Pacífico).
+      Os totais ficam em `_ARQ_ESTATISTICAS` (sobrevivem a reinícios) e
+      `uso_firestore()` devolve o resumo do dia, com a projeção para o dia
+      inteiro, para o painel em Configurações. A tela atual é informada
+      por `definir_tela`.
+
+[v37] MODO DEGRADADO E STALE-WHILE-REVALIDATE — com o TTL vencido, a
+      tela esperava a releitura; e se o Firestore recusasse
+      (`ResourceExhausted`, cota esgotada) o app caía com erro. Agora uma
+      tabela que já tem cópia devolve a cópia NA HORA e relê em segundo
+      plano. Se o Firestore recusar — ou se as leituras do dia passarem
+      de `_PCT_COTA_DEGRADADO` da cota — o app entra em modo degradado por
+      `_PAUSA_COTA_S`: nada que já tenha cópia (tabelas, espelho em disco,
+      config, agregações) é relido, e `dados_desatualizados_desde()` diz
+      de quando é a cópia mais velha mostrada (o aviso "dados de HH:MM"
+      no topo da tela). Só o que nunca foi lido ainda tenta o servidor.
+
+[v38] FILA DE GRAVAÇÕES EM SEGUNDO PLANO — botões como "✅ Feito" e
+      "✅ Marcar como Concluído" e as caixinhas de conciliação esperavam uma
+      (às vezes duas) idas ao Firestore antes do rerun. Com
+      `em_segundo_plano=True`, `*_atualizar` só anota a alteração num
+      diário em disco (`_ARQ_FILA_GRAVACOES`, uma linha JSON por
+      alteração), aplica na hora nas tabelas em memória (write-through) e
+      volta; uma thread do processo grava a fila em lotes, esperando cada
+      vez mais (backoff exponencial) se o Firestore recusar por cota ou
+      estiver fora do ar. O que ficar no diário (app reiniciado no meio) é
+      gravado quando o app volta. Enquanto uma alteração está na fila, as
+      releituras das tabelas a reaplicam por cima do que veio do servidor.
+      A escrita entra nas estatísticas de uso só depois do `commit` do lote
+      (com a tela/função/sessão de quem enfileirou), e a thread usa o
+      cliente que recebeu ao ser criada — nada de `get_db()` fora do script.
+      Uma alteração recusada de vez (documento apagado, permissão, campo
+      inválido) não some calada: vai para o log, para o diário
+      `_ARQ_FILA_DESCARTADAS` e para a lista de falhas do painel de uso
+      (`uso_firestore()["falhas"]`), e o documento é relido do servidor
+      para desfazer o write-through nas tabelas em memória.
+
+[v39] BACKEND EM MEMÓRIA — `LILA_DB_BACKEND=memoria` troca o Firestore por
+      `modulos/backend_memoria.py` (mesma API, só o subconjunto usado
+      aqui), para testar e medir as telas localmente sem rede, credencial
+      ou cota. `LILA_MEMORIA_ARQUIVO` semeia os dados. Nesse modo a pasta
+      local padrão é outra (`.lila_dados_memoria`) — o diário da fila de
+      gravações e os contadores de uso nunca se misturam com os do
+      Firestore de verdade — e o espelho em disco vem desligado.
+
+[v40] CRONÔMETRO POR EXECUÇÃO — `init_db`, `cfg_todos` e as listagens
+      (`*_listar*`, `gastos_em_aberto`, `cronograma_com_cliente`) passam
+      por `modulos/cronometro.py`: com o cronômetro ligado (Configurações →
+      "⏱️ Tempos desta tela"), cada chamada vira um trecho com duração,
+      linhas devolvidas e leituras feitas — zero leituras quer dizer que
+      veio do cache. As leituras vêm de `_leituras_da_sessao`, a contagem
+      por sessão do v36. O trace (quando pedido) vai para
+      `_DIR_DADOS/cronometro.jsonl`.
+
+[v41] CAPACIDADE EM HORAS — nova chave `capacidade_horas_dia` (padrão 8)
+      em `lila_config` / `Configuracao`: o orçamento diário de horas contra
+      o qual `regras_agenda.CapacidadeHoras` mede as tarefas do cronograma.
 ──────────────────────────────────────────────────────────────────────────────
 """
 
 import streamlit as st
 from google.cloud import firestore
 from google.oauth2 import service_account
+import abc
+import atexit
 import json
 import datetime
+import itertools
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import operator
+import random
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
 import pandas as pd
-from typing import Optional, Any
+from google.api_core.exceptions import (
+    DeadlineExceeded, FailedPrecondition, ResourceExhausted, ServiceUnavailable,
+)
+from google.cloud.firestore_v1.services.firestore import FirestoreClient
+from google.cloud.firestore_v1.services.firestore.transports.grpc import FirestoreGrpcTransport
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from typing import Optional, Any, Callable
+from zoneinfo import ZoneInfo
+
+from modulos import cronometro
+from modulos.cronometro import cronometrado
 
 # Tempo de vida do cache das listagens (segundos). Curto o suficiente para
 # não deixar a tela "desatualizada" por muito tempo, mas capaz de absorver
@@ -83,24 +350,166 @@ from typing import Optional, Any
 _TTL_LISTAS = 20
 _TTL_DOC    = 15
 _TTL_CONFIG = 60
+_TTL_AGREGACAO = 60
+_TTL_MES_FECHADO = 3600
+
+# Quantas tabelas "por mês" (`_tabela_do_mes`) ficam no registro; as menos
+# usadas saem quando alguém folheia mais meses que isso.
+_MAX_TABELAS_MES = 24
+
+# [v24] Máximo de operações por WriteBatch (limite do próprio Firestore).
+_LIMITE_LOTE = 500
+
+# [v25] Perfis de colunas por tela (ver `campos=` nas listagens). "rowid"
+# sempre vem junto, não precisa constar aqui.
+PERFIL_CLIENTES_SELECAO = ("nome", "telefone")
+PERFIL_ENCOMENDAS_SELECAO = ("cliente", "peca", "etapa", "cancelado")
+PERFIL_ENCOMENDAS_AGENDA = (
+    "cliente", "peca", "etapa", "cancelado",
+    "data_confeccao", "data_prova", "data_prova2", "tem_prova2", "data_entrega",
+)
+
+# [v27] Canal gRPC do cliente compartilhado: intervalo do keep-alive (ms) e
+# quantos canais (um cliente Firestore por canal) abrir para o rodízio.
+_GRPC_KEEPALIVE_MS = int(os.environ.get("LILA_GRPC_KEEPALIVE_MS", "30000"))
+_GRPC_CANAIS = max(1, int(os.environ.get("LILA_GRPC_CANAIS", "1")))
+# O `firestore.Client` não tem opção pública para o canal (nem transporte
+# próprio, nem opções de gRPC em `client_options`): o keep-alive entra pelos
+# atributos internos que o próprio cliente usa na criação preguiçosa do canal
+# (`_firestore_api_helper`). Conferido nesta versão — a mesma fixada no
+# requirements.txt; em qualquer outra, fica o canal padrão do cliente.
+_FIRESTORE_VERSAO_CONFERIDA = "2.19."
+_FIRESTORE_INTERNOS = ("_target", "_credentials", "_client_options", "_firestore_api_internal")
+
+# [v34] Quantas leituras `precarregar` roda ao mesmo tempo.
+_LEITURAS_PARALELAS = max(1, int(os.environ.get("LILA_LEITURAS_PARALELAS", "6")))
+
+# [v39] De onde vêm os dados: "firestore" (padrão) ou "memoria"
+# (`modulos/backend_memoria.py`, para testes e benchmarks).
+_BACKEND = os.environ.get("LILA_DB_BACKEND", "firestore").strip().lower()
+_EM_MEMORIA = _BACKEND == "memoria"
+
+# [v30] Espelho em disco: pasta do SQLite, liga/desliga, intervalo da
+# releitura completa (a única que enxerga exclusões feitas por fora) e folga
+# aplicada à marca d'água (relógios de servidores diferentes).
+_DIR_DADOS = os.environ.get("LILA_DADOS_DIR", ".lila_dados_memoria" if _EM_MEMORIA else ".lila_dados")
+_ESPELHO_DISCO = os.environ.get("LILA_ESPELHO_DISCO", "0" if _EM_MEMORIA else "1") != "0"
+_RESSINC_COMPLETA_S = 24 * 3600
+_FOLGA_MARCA_S = 300
+
+# [v36] Contadores de uso: arquivo, quantos dias guardar, de quanto em quanto
+# tempo (segundos) regravar o arquivo, e a cota diária do plano Spark (que
+# zera à meia-noite do horário do Pacífico).
+_ARQ_ESTATISTICAS = os.path.join(_DIR_DADOS, "uso_firestore.json")
+_DIAS_ESTATISTICAS = 30
+_INTERVALO_GRAVAR_ESTAT_S = 15
+LIMITE_LEITURAS_DIA = 50_000
+LIMITE_ESCRITAS_DIA = 20_000
+_FUSO_COTA = ZoneInfo("America/Los_Angeles")
+# Quantas falhas (gravações descartadas, releituras com erro) o painel guarda.
+_MAX_FALHAS = 50
+_FUSO_BR = ZoneInfo("America/Sao_Paulo")
+
+_log = logging.getLogger(__name__)
+
+# [v37] Modo degradado: quanto tempo (segundos) não tentar reler o que já tem
+# cópia depois de um `ResourceExhausted`, e a fração da cota diária de
+# leituras a partir da qual o app já economiza por conta própria.
+_PAUSA_COTA_S = 300
+_PCT_COTA_DEGRADADO = float(os.environ.get("LILA_COTA_DEGRADAR_PCT", "0.95"))
+
+# [v38] Fila de gravações: diário em disco e a espera (segundos) entre
+# tentativas quando o Firestore recusa — dobra a cada falha, até o teto.
+_ARQ_FILA_GRAVACOES = os.path.join(_DIR_DADOS, "fila_gravacoes.jsonl")
+# Alterações da fila que o Firestore recusou de vez (não voltam para a fila).
+_ARQ_FILA_DESCARTADAS = os.path.join(_DIR_DADOS, "fila_gravacoes_descartadas.jsonl")
+_ESPERA_FILA_MIN_S = 1
+_ESPERA_FILA_MAX_S = 120
+
+# [v22] Quanto tempo (segundos) a primeira leitura de `lila_encomendas` espera
+# o listener entregar a carga inicial antes de cair para uma leitura direta.
+_ESPERA_CARGA_INICIAL = 20
 
 # ──────────────────────────────────────────────────────────────────────────────
 # CONEXÃO
 # ──────────────────────────────────────────────────────────────────────────────
 
-def get_db() -> firestore.Client:
+def _criar_cliente(creds) -> firestore.Client:
     """
-    Retorna o cliente Firestore, criando a conexão uma única vez por sessão.
-    Usa a secret 'textkey' já configurada no Streamlit Cloud.
+    [v27] Um `firestore.Client` com canal gRPC próprio, montado aqui para
+    poder passar as opções de keep-alive (o cliente padrão fixa 30 s e não
+    deixa configurar mais nada). Só na versão conferida da biblioteca
+    (`_FIRESTORE_VERSAO_CONFERIDA`) e com os atributos internos no lugar;
+    fora disso — ou se a montagem falhar — devolve o cliente padrão, que
+    cria o próprio canal no primeiro uso.
     """
-    if "db" not in st.session_state:
-        key_dict = json.loads(st.secrets["textkey"])
-        creds = service_account.Credentials.from_service_account_info(key_dict)
-        st.session_state.db = firestore.Client(
-            credentials=creds,
-            project="wendleydesenvolvimento",
+    cliente = firestore.Client(credentials=creds, project="wendleydesenvolvimento")
+    if (not str(getattr(firestore, "__version__", "")).startswith(_FIRESTORE_VERSAO_CONFERIDA)
+            or not all(hasattr(cliente, a) for a in _FIRESTORE_INTERNOS)
+            or cliente._firestore_api_internal is not None):
+        return cliente
+    try:
+        canal = FirestoreGrpcTransport.create_channel(
+            cliente._target,
+            credentials=cliente._credentials,
+            options=[
+                ("grpc.keepalive_time_ms", _GRPC_KEEPALIVE_MS),
+                ("grpc.keepalive_timeout_ms", 10000),
+                ("grpc.keepalive_permit_without_calls", 1),
+                ("grpc.http2.max_pings_without_data", 0),
+            ],
         )
-    return st.session_state.db
+        transporte = FirestoreGrpcTransport(host=cliente._target, channel=canal)
+        api = FirestoreClient(transport=transporte, client_options=cliente._client_options)
+    except (AttributeError, TypeError, ValueError):
+        return cliente
+    cliente._transport = transporte
+    cliente._firestore_api_internal = api
+    return cliente
+
+
+@st.cache_resource(show_spinner=False)
+def _clientes_firestore() -> tuple:
+    """
+    [v27] Clientes Firestore do processo — criados UMA vez por servidor e
+    compartilhados por todas as sessões. Usa a secret 'textkey' já
+    configurada no Streamlit Cloud.
+    [v39] Com `LILA_DB_BACKEND=memoria`, um único cliente em memória.
+    """
+    if _EM_MEMORIA:
+        return (_cliente_memoria(),), itertools.cycle([])
+    if _BACKEND != "firestore":
+        raise ValueError(f"LILA_DB_BACKEND desconhecido: {_BACKEND!r} (use 'firestore' ou 'memoria')")
+    key_dict = json.loads(st.secrets["textkey"])
+    creds = service_account.Credentials.from_service_account_info(key_dict)
+    clientes = [_criar_cliente(creds) for _ in range(_GRPC_CANAIS)]
+    return tuple(clientes), itertools.cycle(clientes)
+
+
+def _cliente_memoria():
+    """[v39] Cliente do backend em memória (semeado por `LILA_MEMORIA_ARQUIVO`, se houver)."""
+    from modulos import backend_memoria
+
+    armazem = backend_memoria.ARMAZEM_PADRAO
+    arquivo = os.environ.get("LILA_MEMORIA_ARQUIVO")
+    if arquivo:
+        armazem.carregar_json(arquivo)
+    return backend_memoria.Client(armazem)
+
+
+def get_db() -> firestore.Client:
+    """
+    Retorna o cliente Firestore compartilhado do processo [v27] (antes: um
+    por sessão). Com `LILA_GRPC_CANAIS` > 1, alterna entre os canais.
+    """
+    clientes, rodizio = _clientes_firestore()
+    if len(clientes) == 1:
+        return clientes[0]
+    with _lock_rodizio:
+        return next(rodizio)
+
+
+_lock_rodizio = threading.Lock()
 
 
 def _col(name: str):
@@ -121,18 +530,1449 @@ def _doc_to_dict(doc) -> dict:
     return d
 
 
-def _docs_to_df(docs) -> pd.DataFrame:
-    """Converte uma lista de DocumentSnapshots em DataFrame."""
+def _docs_to_df(docs, nome: Optional[str] = None) -> pd.DataFrame:
+    """
+    Converte uma lista de DocumentSnapshots em DataFrame. [v31] Com `nome`,
+    as colunas já saem tipadas pelo esquema da coleção (ver `_tipar`).
+    """
     rows = [_doc_to_dict(d) for d in docs]
     if not rows:
         return pd.DataFrame()
-    return pd.DataFrame(rows)
+    df = pd.DataFrame(rows)
+    return _tipar(df, nome) if nome else df
 
 
 def _now_iso() -> str:
     return datetime.datetime.now().isoformat()
 
 
+def _carimbado(dados: dict) -> dict:
+    """[v30] Cópia de `dados` com `_atualizado_em` (marca d'água da sincronização incremental)."""
+    return {**dados, "_atualizado_em": _now_iso()}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# CONTADORES DE LEITURA/ESCRITA  [novo — v36]
+# ──────────────────────────────────────────────────────────────────────────────
+# Uma consulta (`stream`) custa uma leitura por documento devolvido — e no
+# mínimo uma, mesmo sem resultado; `get_all` custa uma por documento pedido;
+# uma agregação (`count`/`sum`) custa uma a cada 1000 entradas de índice
+# (aqui conta como uma). As gravações são contadas nos `_propagar_*`, por
+# onde toda gravação deste módulo passa.
+
+_CHAVE_TELA = "_lila_tela_atual"
+
+
+def _dia_da_cota(agora: Optional[datetime.datetime] = None) -> str:
+    return (agora or datetime.datetime.now(_FUSO_COTA)).astimezone(_FUSO_COTA).date().isoformat()
+
+
+def _contagem_vazia() -> dict:
+    return {"leituras": 0, "escritas": 0}
+
+
+class _Estatisticas:
+    """
+    Totais por dia da cota (gravados em JSON) e por sessão (só em memória),
+    e as últimas falhas de gravação/releitura (só em memória).
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._dias: dict = self._ler()
+        self._sessoes: dict[str, dict] = {}
+        self._falhas: deque = deque(maxlen=_MAX_FALHAS)
+        self._gravado_em = time.monotonic()
+        self._pendente = False
+
+    def _ler(self) -> dict:
+        try:
+            with open(self.caminho, encoding="utf-8") as f:
+                return json.load(f).get("dias", {})
+        except (OSError, ValueError):
+            return {}
+
+    def registrar(self, tipo: str, colecao: str, qtd: int, funcao: str, tela: str, sessao: Optional[str]) -> None:
+        with self._lock:
+            dia = self._dias.setdefault(_dia_da_cota(), {
+                **_contagem_vazia(), "funcoes": {}, "colecoes": {}, "telas": {},
+            })
+            dia[tipo] += qtd
+            for grupo, chave in (("funcoes", funcao), ("colecoes", colecao), ("telas", tela)):
+                dia[grupo].setdefault(chave, _contagem_vazia())[tipo] += qtd
+            if sessao:
+                self._sessoes.setdefault(sessao, _contagem_vazia())[tipo] += qtd
+            self._pendente = True
+            if time.monotonic() - self._gravado_em >= _INTERVALO_GRAVAR_ESTAT_S:
+                self._gravar()
+
+    def registrar_falha(self, tipo: str, colecao: str, erro: BaseException, documento: str = "") -> None:
+        with self._lock:
+            self._falhas.append({
+                "quando": datetime.datetime.now(_FUSO_BR).strftime("%d/%m/%Y %H:%M:%S"),
+                "tipo": tipo, "colecao": colecao, "documento": documento,
+                "erro": f"{type(erro).__name__}: {erro}",
+            })
+
+    def falhas(self) -> list:
+        """As últimas `_MAX_FALHAS`, da mais recente para a mais antiga."""
+        with self._lock:
+            return list(reversed(self._falhas))
+
+    def gravar(self) -> None:
+        with self._lock:
+            if self._pendente:
+                self._gravar()
+
+    def _gravar(self) -> None:
+        """Chamar sempre com `self._lock` travado. Falha de disco não derruba o app."""
+        for antigo in sorted(self._dias)[:-_DIAS_ESTATISTICAS]:
+            del self._dias[antigo]
+        try:
+            os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+            temporario = self.caminho + ".tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump({"dias": self._dias}, f)
+            os.replace(temporario, self.caminho)
+        except OSError:
+            pass
+        self._gravado_em = time.monotonic()
+        self._pendente = False
+
+    def leituras_hoje(self) -> int:
+        with self._lock:
+            return self._dias.get(_dia_da_cota(), {}).get("leituras", 0)
+
+    def copia(self, sessao: Optional[str]) -> tuple:
+        """(dias, contagem da sessão) — cópias, para ler fora da trava."""
+        with self._lock:
+            return json.loads(json.dumps(self._dias)), dict(self._sessoes.get(sessao, _contagem_vazia()))
+
+    def leituras_sessao(self, sessao: str) -> int:
+        with self._lock:
+            return self._sessoes.get(sessao, _contagem_vazia())["leituras"]
+
+
+@st.cache_resource(show_spinner=False)
+def _estatisticas() -> _Estatisticas:
+    est = _Estatisticas(_ARQ_ESTATISTICAS)
+    atexit.register(est.gravar)
+    return est
+
+
+def _leituras_da_sessao() -> int:
+    """[v40] Sonda do cronômetro: leituras que esta sessão já fez (0 fora de sessão)."""
+    ctx = get_script_run_ctx()
+    return _estatisticas().leituras_sessao(ctx.session_id) if ctx is not None else 0
+
+
+cronometro.configurar(
+    sonda_leituras=_leituras_da_sessao,
+    arquivo_trace=os.path.join(_DIR_DADOS, "cronometro.jsonl"),
+)
+
+
+def _funcao_chamadora() -> str:
+    """
+    A função pública MAIS EXTERNA deste módulo na pilha — a que a tela
+    chamou (ex.: `cronograma_com_cliente`, não o `cronograma_listar` que ela
+    usa por dentro). `precarregar` não conta: ela só repassa.
+    """
+    achada = "(interno)"
+    quadro = sys._getframe(2)
+    while quadro is not None:
+        nome = quadro.f_code.co_name
+        if quadro.f_globals is globals() and not nome.startswith("_") and nome in globals() and nome != "precarregar":
+            achada = nome
+        quadro = quadro.f_back
+    return achada
+
+
+def _sessao_e_tela() -> tuple:
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None, "(fora de sessão)"
+    try:
+        return ctx.session_id, str(st.session_state.get(_CHAVE_TELA, "(sem tela)"))
+    except Exception:
+        return ctx.session_id, "(sem tela)"
+
+
+def _contar(tipo: str, colecao: str, qtd: int, funcao: Optional[str] = None) -> None:
+    if qtd <= 0:
+        return
+    sessao, tela = _sessao_e_tela()
+    _estatisticas().registrar(tipo, colecao, qtd, funcao or _funcao_chamadora(), tela, sessao)
+
+
+def _contar_leituras(colecao: str, qtd: int, funcao: Optional[str] = None) -> None:
+    _contar("leituras", colecao, qtd, funcao)
+
+
+def _contar_escritas(colecao: str, qtd: int = 1) -> None:
+    _contar("escritas", colecao, qtd)
+
+
+def definir_tela(nome: str) -> None:
+    """Informa a tela que a sessão está mostrando (para atribuir as leituras a ela)."""
+    st.session_state[_CHAVE_TELA] = nome
+
+
+def _tabela_de_uso(grupo: dict) -> pd.DataFrame:
+    linhas = [{"nome": nome, **cont} for nome, cont in grupo.items()]
+    if not linhas:
+        return pd.DataFrame(columns=["nome", "leituras", "escritas"])
+    return pd.DataFrame(linhas).sort_values(["leituras", "escritas"], ascending=False, ignore_index=True)
+
+
+def uso_firestore() -> dict:
+    """
+    Resumo do uso da cota para o painel de Configurações:
+      dia, leituras, escritas (do dia da cota até agora),
+      projecao_leituras / projecao_escritas (ritmo atual × dia inteiro),
+      limite_leituras / limite_escritas, sessao ({leituras, escritas}),
+      por_funcao / por_colecao / por_tela (DataFrames nome/leituras/escritas,
+      do dia), historico (DataFrame dia/leituras/escritas dos dias guardados)
+      e falhas (DataFrame quando/tipo/colecao/documento/erro: gravações da
+      fila descartadas e releituras que falharam, mais recentes primeiro).
+    """
+    agora = datetime.datetime.now(_FUSO_COTA)
+    sessao_id, _ = _sessao_e_tela()
+    dias, sessao = _estatisticas().copia(sessao_id)
+    hoje = dias.get(_dia_da_cota(agora), {**_contagem_vazia(), "funcoes": {}, "colecoes": {}, "telas": {}})
+    decorrido = agora - agora.replace(hour=0, minute=0, second=0, microsecond=0)
+    fracao = max(decorrido.total_seconds() / 86400, 1 / 24)  # antes de 1h de dia, projeção exagera
+    historico = pd.DataFrame(
+        [{"dia": dia, "leituras": d["leituras"], "escritas": d["escritas"]} for dia, d in sorted(dias.items())],
+        columns=["dia", "leituras", "escritas"],
+    )
+    return {
+        "dia": _dia_da_cota(agora),
+        "leituras": hoje["leituras"],
+        "escritas": hoje["escritas"],
+        "projecao_leituras": int(hoje["leituras"] / fracao),
+        "projecao_escritas": int(hoje["escritas"] / fracao),
+        "limite_leituras": LIMITE_LEITURAS_DIA,
+        "limite_escritas": LIMITE_ESCRITAS_DIA,
+        "sessao": sessao,
+        "por_funcao": _tabela_de_uso(hoje["funcoes"]),
+        "por_colecao": _tabela_de_uso(hoje["colecoes"]),
+        "por_tela": _tabela_de_uso(hoje["telas"]),
+        "historico": historico,
+        "falhas": pd.DataFrame(_estatisticas().falhas(), columns=["quando", "tipo", "colecao", "documento", "erro"]),
+    }
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# MODO DEGRADADO (cota)  [novo — v37]
+# ──────────────────────────────────────────────────────────────────────────────
+
+@st.cache_resource(show_spinner=False)
+def _estado_cota() -> dict:
+    """
+    Estado do modo degradado, por processo: `recusado_em` (monotonic do
+    último `ResourceExhausted`) e `copia_de` (epoch da cópia mais velha
+    mostrada desde que o modo começou).
+    """
+    return {"recusado_em": None, "copia_de": None, "lock": threading.Lock()}
+
+
+def _cota_recusada() -> None:
+    estado = _estado_cota()
+    with estado["lock"]:
+        estado["recusado_em"] = time.monotonic()
+
+
+def _em_modo_degradado() -> bool:
+    estado = _estado_cota()
+    with estado["lock"]:
+        recusado_em = estado["recusado_em"]
+    if recusado_em is not None and time.monotonic() - recusado_em < _PAUSA_COTA_S:
+        return True
+    return _estatisticas().leituras_hoje() >= _PCT_COTA_DEGRADADO * LIMITE_LEITURAS_DIA
+
+
+def _servindo_copia(lida_em: Optional[float]) -> None:
+    """Registra que uma cópia lida em `lida_em` (epoch) foi mostrada no lugar de uma releitura."""
+    if lida_em is None:
+        return
+    estado = _estado_cota()
+    with estado["lock"]:
+        if estado["copia_de"] is None or lida_em < estado["copia_de"]:
+            estado["copia_de"] = lida_em
+
+
+def dados_desatualizados_desde() -> Optional[datetime.datetime]:
+    """
+    No modo degradado, o momento (com fuso, UTC) da cópia mais velha que
+    está sendo mostrada; fora dele, None.
+    """
+    estado = _estado_cota()
+    if not _em_modo_degradado():
+        with estado["lock"]:
+            estado["copia_de"] = None
+        return None
+    with estado["lock"]:
+        copia_de = estado["copia_de"]
+    return datetime.datetime.fromtimestamp(copia_de, datetime.timezone.utc) if copia_de else None
+
+
+@st.cache_resource(show_spinner=False)
+def _copias_boas() -> dict:
+    """Último resultado bom de cada leitura cacheada por `st.cache_data`: {chave: (valor, epoch)}."""
+    return {}
+
+
+def _com_copia_boa(chave, ler: Callable):
+    """
+    Chama `ler()` e guarda o resultado como a última cópia boa de `chave`.
+    No modo degradado (ou se o Firestore recusar por cota), devolve a
+    última cópia boa, se houver — sem cópia, o erro sobe.
+    """
+    copias = _copias_boas()
+    if chave in copias and _em_modo_degradado():
+        valor, lido_em = copias[chave]
+        _servindo_copia(lido_em)
+        return valor
+    try:
+        valor = ler()
+    except ResourceExhausted:
+        _cota_recusada()
+        if chave not in copias:
+            raise
+        valor, lido_em = copias[chave]
+        _servindo_copia(lido_em)
+        return valor
+    copias[chave] = (valor, time.time())
+    return valor
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# ESPELHO EM DISCO (sincronização incremental)  [novo — v30]
+# ──────────────────────────────────────────────────────────────────────────────
+# Uma cópia de cada coleção por processo (`_ColecaoSincronizada`), gravada
+# também num SQLite local (`_BancoLocal`) para sobreviver a reinícios. As
+# tabelas em memória (`_TabelaConsulta`, `_EspelhoColecao`) se alimentam
+# dela em vez de consultar o Firestore direto.
+
+def _maior_marca(docs) -> str:
+    marcas = [d.get("_atualizado_em") for d in docs]
+    return max((m for m in marcas if isinstance(m, str)), default="")
+
+
+class _BancoLocal:
+    """SQLite com os documentos de cada coleção e a marca d'água da última sincronização."""
+
+    def __init__(self, caminho: str):
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._executar(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            " colecao TEXT, rowid TEXT, dados TEXT, PRIMARY KEY (colecao, rowid))",
+            "CREATE TABLE IF NOT EXISTS sincronizacao ("
+            " colecao TEXT PRIMARY KEY, marca TEXT, completa_em REAL)",
+        )
+
+    def _executar(self, *comandos) -> None:
+        """Cada comando é um SQL ou um par (SQL, lista de parâmetros para executemany)."""
+        with self._lock:
+            con = sqlite3.connect(self.caminho, timeout=30)
+            try:
+                with con:
+                    for cmd in comandos:
+                        if isinstance(cmd, tuple):
+                            con.executemany(*cmd)
+                        else:
+                            con.execute(cmd)
+            finally:
+                con.close()
+
+    def ler(self, colecao: str) -> tuple:
+        """Devolve (docs, marca, completa_em) — ({}, "", None) se nunca sincronizou."""
+        with self._lock:
+            con = sqlite3.connect(self.caminho, timeout=30)
+            try:
+                linhas = con.execute(
+                    "SELECT rowid, dados FROM docs WHERE colecao = ?", (colecao,)
+                ).fetchall()
+                sinc = con.execute(
+                    "SELECT marca, completa_em FROM sincronizacao WHERE colecao = ?", (colecao,)
+                ).fetchone()
+            finally:
+                con.close()
+        if sinc is None:
+            return {}, "", None
+        return {rid: json.loads(dados) for rid, dados in linhas}, sinc[0] or "", sinc[1]
+
+    def gravar(self, colecao: str, docs: dict, marca: str, completa_em: Optional[float],
+               substituir: bool = False) -> None:
+        linhas = [(colecao, rid, json.dumps(d, default=str)) for rid, d in docs.items()]
+        comandos = []
+        if substituir:
+            comandos.append(("DELETE FROM docs WHERE colecao = ?", [(colecao,)]))
+        comandos += [
+            ("INSERT OR REPLACE INTO docs VALUES (?, ?, ?)", linhas),
+            ("INSERT OR REPLACE INTO sincronizacao VALUES (?, ?, ?)", [(colecao, marca, completa_em)]),
+        ]
+        self._executar(*comandos)
+
+    def remover(self, colecao: str, rowid: str) -> None:
+        self._executar(("DELETE FROM docs WHERE colecao = ? AND rowid = ?", [(colecao, rowid)]))
+
+
+@st.cache_resource(show_spinner=False)
+def _banco_local() -> Optional[_BancoLocal]:
+    """O SQLite do processo, ou None se o disco não estiver disponível (aí fica só em memória)."""
+    try:
+        return _BancoLocal(os.path.join(_DIR_DADOS, "espelho.sqlite3"))
+    except (OSError, sqlite3.Error):
+        return None
+
+
+class _ColecaoSincronizada:
+    """
+    Uma coleção inteira em memória + disco. `documentos()` sincroniza no
+    máximo uma vez por `_TTL_LISTAS`: releitura completa se a última tiver
+    mais de `_RESSINC_COMPLETA_S`, senão só o que mudou desde a marca.
+    """
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self._lock = threading.RLock()
+        self._docs: Optional[dict] = None
+        self._marca = ""
+        self._completa_em: Optional[float] = None
+        self._sinc_em: Optional[float] = None
+        self._lida_em: Optional[float] = None  # [v37] epoch da última sincronização que deu certo
+
+    def _abrir(self) -> None:
+        """Chamar sempre com `self._lock` travado. Carrega do disco (sem rede) na primeira vez."""
+        if self._docs is not None:
+            return
+        banco = _banco_local()
+        self._docs, self._marca, self._completa_em = banco.ler(self.nome) if banco else ({}, "", None)
+        self._lida_em = self._completa_em
+
+    def precisa_releitura_completa(self) -> bool:
+        with self._lock:
+            self._abrir()
+            return self._completa_em is None or time.time() - self._completa_em > _RESSINC_COMPLETA_S
+
+    def marca_com_folga(self) -> str:
+        with self._lock:
+            if not self._marca:
+                return ""
+            try:
+                marca = datetime.datetime.fromisoformat(self._marca)
+            except ValueError:
+                return ""
+            return (marca - datetime.timedelta(seconds=_FOLGA_MARCA_S)).isoformat()
+
+    def _sincronizar(self) -> None:
+        banco = _banco_local()
+        if self.precisa_releitura_completa():
+            docs = {d.id: _doc_to_dict(d) for d in _col(self.nome).stream()}
+            _contar_leituras(self.nome, max(1, len(docs)))
+            _com_pendentes(self.nome, docs)
+            self._docs, self._marca, self._completa_em = docs, _maior_marca(docs.values()), time.time()
+            if banco:
+                banco.gravar(self.nome, docs, self._marca, self._completa_em, substituir=True)
+        else:
+            q = _col(self.nome).where("_atualizado_em", ">=", self.marca_com_folga())
+            novos = {d.id: _doc_to_dict(d) for d in q.stream()}
+            _contar_leituras(self.nome, max(1, len(novos)))
+            self._docs.update(_com_pendentes(self.nome, novos))
+            self._marca = max(self._marca, _maior_marca(novos.values()))
+            if banco and novos:
+                banco.gravar(self.nome, novos, self._marca, self._completa_em)
+        self._sinc_em = time.monotonic()
+        self._lida_em = time.time()
+
+    def copia_local(self) -> dict:
+        """Cópia de {rowid: dados} como está no disco/memória, sem sincronizar."""
+        with self._lock:
+            self._abrir()
+            return {rid: dict(d) for rid, d in self._docs.items()}
+
+    def substituir(self, docs: dict) -> None:
+        """Releitura completa feita por fora (o listener sem filtro): troca tudo."""
+        with self._lock:
+            self._abrir()
+            self._docs = {rid: dict(d) for rid, d in docs.items()}
+            self._marca, self._completa_em = _maior_marca(self._docs.values()), time.time()
+            self._sinc_em = time.monotonic()
+            self._lida_em = time.time()
+            banco = _banco_local()
+            if banco:
+                banco.gravar(self.nome, self._docs, self._marca, self._completa_em, substituir=True)
+
+    def documentos(self) -> dict:
+        """
+        Cópia de {rowid: dados} da coleção, já sincronizada. [v37] Com uma
+        cópia em disco, o modo degradado (ou uma recusa por cota) devolve a
+        cópia como está, sem sincronizar.
+        """
+        with self._lock:
+            self._abrir()
+            tem_copia = self._completa_em is not None
+            if self._sinc_em is None or time.monotonic() - self._sinc_em >= _TTL_LISTAS:
+                if tem_copia and _em_modo_degradado():
+                    _servindo_copia(self._lida_em)
+                else:
+                    try:
+                        self._sincronizar()
+                    except ResourceExhausted:
+                        _cota_recusada()
+                        if not tem_copia:
+                            raise
+                        _servindo_copia(self._lida_em)
+            return {rid: dict(d) for rid, d in self._docs.items()}
+
+    # ── write-through (mesmas gravações das tabelas em memória) ───────────
+    def aplicar(self, rowid: str, dados: dict, mesclar: bool) -> None:
+        with self._lock:
+            self._abrir()
+            if mesclar and rowid not in self._docs:
+                return  # chega completo na próxima sincronização (está carimbado)
+            novo = {**self._docs.get(rowid, {}), **dados, "rowid": rowid} if mesclar else {**dados, "rowid": rowid}
+            self._docs[rowid] = novo
+            self._marca = max(self._marca, _maior_marca([novo]))
+            banco = _banco_local()
+            if banco:
+                banco.gravar(self.nome, {rowid: novo}, self._marca, self._completa_em)
+
+    def aplicar_remocao(self, rowid: str) -> None:
+        with self._lock:
+            self._abrir()
+            self._docs.pop(rowid, None)
+            banco = _banco_local()
+            if banco:
+                banco.remover(self.nome, rowid)
+
+
+@st.cache_resource(show_spinner=False)
+def _colecoes_sincronizadas() -> dict:
+    return {}
+
+
+def _colecao_sincronizada(nome: str) -> _ColecaoSincronizada:
+    colecoes = _colecoes_sincronizadas()
+    with _lock_registro:
+        col = colecoes.get(nome)
+        if col is None:
+            col = colecoes[nome] = _ColecaoSincronizada(nome)
+    return col
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# TABELAS EM MEMÓRIA (write-through)  [novo — v22 / v23]
+# ──────────────────────────────────────────────────────────────────────────────
+# Cada listagem guarda uma tabela em memória ({rowid: dict}), compartilhada
+# por todas as sessões do processo. O DataFrame é remontado uma vez por
+# VERSÃO da tabela, não uma vez por rerun.
+#
+# [v23] Depois de uma gravação bem-sucedida, as funções de escrita não jogam
+# mais a tabela fora (`.clear()`): elas APLICAM a própria gravação em todas
+# as tabelas em memória daquela coleção (`_propagar_*`), por `rowid` —
+# insere a linha nova, atualiza só os campos alterados ou remove a linha.
+# Uma edição custa 1 escrita e ZERO leituras extras (antes: 1 escrita + N
+# leituras no rerun seguinte, para reler a coleção inteira).
+
+_OPERADORES = {
+    "==": operator.eq, "!=": operator.ne,
+    "<": operator.lt, "<=": operator.le,
+    ">": operator.gt, ">=": operator.ge,
+}
+
+
+def _casa_filtros(dados: dict, filtros: tuple) -> bool:
+    """
+    Mesmo critério do `.where(campo, op, valor)` do Firestore para cada
+    (campo, op, valor) de `filtros` [v32 — antes só igualdade]: campo
+    ausente ou tipos incomparáveis não casam.
+    """
+    for campo, op, alvo in filtros:
+        if campo not in dados:
+            return False
+        try:
+            if not _OPERADORES[op](dados[campo], alvo):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+# ── Esquema de tipos por coleção [v31] ────────────────────────────────────
+# "inteiros": {campo: valor padrão quando ausente}; "numeros": float64;
+# "datas": texto ISO + `<campo>_dt` + `<campo>_mes`; "categorias": category.
+_ESQUEMAS = {
+    "lila_encomendas": {
+        "inteiros":   {"cancelado": 0, "etapa": 1, "tem_prova2": 0},
+        "numeros":    ("valor_total", "valor_recebido"),
+        "datas":      ("data_confeccao", "data_prova", "data_prova2", "data_entrega"),
+        "categorias": (),
+    },
+    "lila_gastos": {
+        "inteiros":   {"pago": 0, "recorrente": 0, "grande_despesa_prevista": 0, "conciliado": 0},
+        "numeros":    ("valor",),
+        "datas":      ("data",),
+        "categorias": ("categoria",),
+    },
+    "lila_recebimentos": {
+        "inteiros":   {"conciliado": 0},
+        "numeros":    ("valor",),
+        "datas":      ("data",),
+        "categorias": ("categoria", "forma_pagamento"),
+    },
+    "lila_fechamentos_mensais": {
+        "inteiros":   {"fechado": 0},
+        "numeros":    ("saldo_inicial", "receitas_mes", "despesas_mes", "saldo_final",
+                       "saldo_extrato_informado", "diferenca", "fundos_disponiveis"),
+        "datas":      (),
+        "categorias": (),
+    },
+    "lila_cronograma": {
+        "inteiros":   {"concluida": 0},
+        "numeros":    (),
+        "datas":      ("data",),
+        "categorias": ("tipo_agenda",),
+    },
+    "lila_campo_horas": {
+        "inteiros":   {},
+        "numeros":    ("horas",),
+        "datas":      ("data",),
+        "categorias": (),
+    },
+    "lila_peso_registro": {
+        "inteiros":   {},
+        "numeros":    ("peso_kg",),
+        "datas":      ("data",),
+        "categorias": (),
+    },
+}
+
+
+def _tipar(df: pd.DataFrame, nome: str) -> pd.DataFrame:
+    """[v31] Aplica `_ESQUEMAS[nome]` às colunas presentes em `df` (ver cabeçalho)."""
+    esquema = _ESQUEMAS.get(nome)
+    if esquema is None or df.empty:
+        return df
+    df = df.copy()
+    for campo, padrao in esquema["inteiros"].items():
+        if campo in df.columns:
+            df[campo] = pd.to_numeric(df[campo], errors="coerce").fillna(padrao).round().astype("Int64")
+    for campo in esquema["numeros"]:
+        if campo in df.columns:
+            df[campo] = pd.to_numeric(df[campo], errors="coerce").astype("float64")
+    for campo in esquema["datas"]:
+        if campo in df.columns:
+            texto = df[campo].where(df[campo].notna(), "").astype(str)
+            df[f"{campo}_dt"] = pd.to_datetime(texto.str.slice(0, 10), format="%Y-%m-%d", errors="coerce")
+            df[f"{campo}_mes"] = texto.str.slice(0, 7)
+    for campo in esquema["categorias"]:
+        if campo in df.columns:
+            df[campo] = df[campo].astype("category")
+    return df
+
+
+def _recortar_colunas(df: pd.DataFrame, campos: Optional[tuple]) -> pd.DataFrame:
+    """[v25] Só as colunas `campos` (+ "rowid") que existirem; `campos` vazio = todas."""
+    if not campos:
+        return df
+    return df[[c for c in ("rowid", *campos) if c in df.columns]]
+
+
+# Chave de `DataFrame.attrs` com a geração da tabela de onde a cópia saiu
+# (ver `_TabelaMemoria.visao` e `regras_agenda._assinatura`); a série
+# distingue duas tabelas da mesma coleção.
+ATTR_GERACAO = "lila_geracao"
+_SERIES_TABELAS = itertools.count(1)
+
+
+class _TabelaMemoria(abc.ABC):
+    """Base comum: guarda os docs, a versão e as visões (DataFrames) já montadas."""
+
+    def __init__(self, nome: str, filtros: tuple = (), campos: tuple = ()):
+        self.nome = nome
+        self.filtros = filtros
+        self.campos = campos
+        self._docs: dict[str, dict] = {}
+        self._cond = threading.Condition()
+        self._versao = 0
+        self._visoes: dict = {}
+        self._serie = next(_SERIES_TABELAS)
+
+    def _mudou(self) -> None:
+        """Chamar sempre com `self._cond` travado."""
+        self._versao += 1
+        self._visoes.clear()
+
+    @abc.abstractmethod
+    def _garantir_carga(self) -> None:
+        """Deixa `_docs` pronto para ser lido (cada tipo de tabela carrega do seu jeito)."""
+
+    def em_dia(self) -> bool:
+        """[v26] True se a tabela já está carregada e pode responder sem ler nada."""
+        return False
+
+    def linhas(self) -> list:
+        """[v26] Cópia de todas as linhas (dicts), para contas em memória."""
+        self._garantir_carga()
+        with self._cond:
+            return [dict(d) for d in self._docs.values()]
+
+    def _projetar(self, dados: dict) -> dict:
+        """[v25] Numa tabela projetada, guarda só os campos da projeção."""
+        if not self.campos:
+            return dict(dados)
+        return {k: v for k, v in dados.items() if k in self.campos}
+
+    def buscar(self, rowid: str) -> Optional[dict]:
+        self._garantir_carga()
+        with self._cond:
+            d = self._docs.get(rowid)
+            return dict(d) if d is not None else None
+
+    def visao(self, chave, montar) -> pd.DataFrame:
+        """
+        Devolve uma CÓPIA do DataFrame derivado `chave`, montado por
+        `montar(df_completo)` só uma vez por versão da tabela — e já com as
+        colunas tipadas pelo esquema da coleção [v31] (`_tipar` roda depois
+        do `montar`, que continua vendo os valores crus do Firestore). A cópia
+        preserva o mesmo contrato do `st.cache_data` (quem recebe pode
+        alterar o DataFrame à vontade sem afetar as outras sessões).
+
+        A cópia leva em `attrs[ATTR_GERACAO]` de que tabela, versão e visão
+        ela saiu (+ o `id` do próprio índice): `regras_agenda` usa isso como
+        chave dos índices em vez de ler os dados para calcular um hash. Quem
+        alterar a cópia NO LUGAR e depois passá-la a essas regras descarta a
+        marca antes (`df.attrs.pop(ATTR_GERACAO, None)`); filtrar, ordenar ou
+        `assign` já geram outro índice e dispensam isso.
+        """
+        self._garantir_carga()
+        with self._cond:
+            versao = self._versao
+            df = self._visoes.get(chave)
+            if df is None:
+                rows = list(self._docs.values())
+                df = _tipar(montar(pd.DataFrame(rows) if rows else pd.DataFrame()), self.nome)
+                if versao == self._versao:
+                    self._visoes[chave] = df
+        copia = df.copy()
+        copia.attrs[ATTR_GERACAO] = f"{self.nome}#{self._serie}:{versao}:{chave!r}@{id(copia.index)}"
+        return copia
+
+    # ── write-through [v23] ───────────────────────────────────────────────
+    def aplicar_insercao(self, rowid: str, dados: dict) -> None:
+        if not _casa_filtros(dados, self.filtros):
+            return
+        with self._cond:
+            self._docs[rowid] = {**self._projetar(dados), "rowid": rowid}
+            self._mudou()
+
+    def aplicar_atualizacao(self, rowid: str, dados: dict) -> None:
+        with self._cond:
+            atual = self._docs.get(rowid)
+            if atual is None:
+                # O doc não está nesta tabela. Se a gravação mexeu num campo
+                # usado no filtro, ele pode ter passado a casar — mas não temos
+                # o documento completo para inserir, então a tabela é
+                # invalidada e recarregada no próximo acesso.
+                if any(campo in dados for campo, _, _ in self.filtros):
+                    self._invalidar()
+                return
+            novo = {**atual, **self._projetar(dados)}
+            if _casa_filtros(novo, self.filtros):
+                self._docs[rowid] = novo
+            else:
+                del self._docs[rowid]
+            self._mudou()
+
+    def aplicar_mescla(self, rowid: str, dados: dict) -> None:
+        """
+        [v33] `set(..., merge=True)`: se a tabela já tem o doc, é uma
+        atualização; se não tem e a tabela não filtra nada, o doc é novo e
+        `dados` é o documento inteiro. Numa tabela filtrada a ausência não
+        diz nada (o doc pode só não casar o filtro) — vale a regra da
+        atualização.
+        """
+        with self._cond:
+            presente = rowid in self._docs
+        if presente or self.filtros:
+            self.aplicar_atualizacao(rowid, dados)
+        else:
+            self.aplicar_insercao(rowid, dados)
+
+    def aplicar_remocao(self, rowid: str) -> None:
+        with self._cond:
+            if self._docs.pop(rowid, None) is not None:
+                self._mudou()
+
+    @abc.abstractmethod
+    def _invalidar(self) -> None:
+        """Descarta a cópia para recarregar no próximo acesso. Chamar sempre com `self._cond` travado."""
+
+
+class _TabelaConsulta(_TabelaMemoria):
+    """
+    Resultado de uma consulta (coleção + filtros), carregado de
+    uma vez e relido só quando o TTL vence — as gravações feitas por este
+    processo já chegam por write-through, o TTL existe só para enxergar
+    alterações feitas por fora (console do Firestore, outro servidor).
+    """
+
+    def __init__(self, nome: str, filtros: tuple = (), campos: tuple = (), ttl: float = _TTL_LISTAS):
+        super().__init__(nome, filtros, campos)
+        self.ttl = ttl
+        self._carregado_em: Optional[float] = None
+        self._lida_em: Optional[float] = None
+        self._relendo = False
+
+    def _garantir_carga(self) -> None:
+        """
+        [v37] Primeira carga (ou depois de `_invalidar`): lê e espera. Com o
+        TTL vencido e uma cópia na mão: devolve a cópia e relê em segundo
+        plano (uma releitura por vez) — no modo degradado, nem relê. Só os
+        erros passageiros da releitura são engolidos; os demais vão para o
+        log e para `uso_firestore()["falhas"]`.
+        """
+        with self._cond:
+            if self._carregado_em is not None:
+                if time.monotonic() - self._carregado_em < self.ttl:
+                    return
+                if _em_modo_degradado():
+                    _servindo_copia(self._lida_em)
+                elif not self._relendo:
+                    self._relendo = True
+                    _submeter(self._reler_em_segundo_plano)
+                return
+        self._carregar()
+
+    def _reler_em_segundo_plano(self) -> None:
+        try:
+            self._carregar(so_se_versao=self._versao)
+        except ResourceExhausted:
+            _cota_recusada()
+        except _ERROS_TRANSITORIOS:
+            pass  # a cópia antiga continua valendo; tenta de novo no próximo acesso
+        except Exception as erro:
+            # Consulta inválida, documento fora do esquema, bug na projeção...:
+            # a cópia antiga continua valendo, mas a falha fica visível (log e
+            # lista de falhas do painel de uso) em vez de esconder para sempre
+            # por que a tabela não atualiza.
+            _log.error("Releitura em segundo plano de %s falhou", self.nome, exc_info=erro)
+            _estatisticas().registrar_falha("releitura", self.nome, erro)
+        finally:
+            with self._cond:
+                self._relendo = False
+
+    def _carregar(self, so_se_versao: Optional[int] = None) -> None:
+        """
+        Lê a consulta e troca os documentos da tabela. `so_se_versao`: só
+        troca se a tabela ainda estiver nessa versão — uma gravação feita
+        durante a releitura (write-through) não é atropelada pela leitura
+        mais antiga; a próxima releitura pega tudo.
+        """
+        if _ESPELHO_DISCO:
+            # [v30] Filtra/projeta a cópia sincronizada da coleção (só o que
+            # mudou desde a marca d'água vem do Firestore, com os documentos
+            # INTEIROS): `where` e `select()` nunca chegam ao servidor aqui.
+            base = _colecao_sincronizada(self.nome).documentos()
+            docs = {
+                rid: {**self._projetar(d), "rowid": rid}
+                for rid, d in base.items() if _casa_filtros(d, self.filtros)
+            }
+        else:
+            q = _col(self.nome)
+            for campo, op, valor in self.filtros:
+                q = q.where(campo, op, valor)
+            if self.campos:
+                q = q.select(list(self.campos))
+            docs = {d.id: _doc_to_dict(d) for d in q.stream()}
+            _contar_leituras(self.nome, max(1, len(docs)))
+            for rowid, dados in _fila_gravacoes().pendentes(self.nome):
+                if rowid in docs:
+                    docs[rowid] = {**docs[rowid], **self._projetar(dados)}
+        with self._cond:
+            if so_se_versao is not None and so_se_versao != self._versao:
+                return
+            self._docs = docs
+            self._carregado_em = time.monotonic()
+            self._lida_em = time.time()
+            self._mudou()
+
+    def em_dia(self) -> bool:
+        with self._cond:
+            return self._carregado_em is not None and time.monotonic() - self._carregado_em < self.ttl
+
+    def tem_copia(self) -> bool:
+        """Já foi carregada alguma vez (mesmo com o TTL vencido — ver `_garantir_carga`)."""
+        with self._cond:
+            return self._carregado_em is not None
+
+    def _invalidar(self) -> None:
+        self._carregado_em = None
+
+
+class _EspelhoColecao(_TabelaMemoria):
+    """
+    [v22] Coleção inteira mantida em dia por um listener `on_snapshot`, que
+    roda numa thread do próprio cliente Firestore e aplica na tabela só os
+    documentos que mudaram (ADDED / MODIFIED / REMOVED). As gravações deste
+    processo também chegam por write-through [v23] — o listener só confirma
+    (e traz o que foi alterado por fora).
+    """
+
+    def __init__(self, nome: str):
+        super().__init__(nome)
+        self._pronto = threading.Event()
+        self._watch = None
+        self._lida_em: Optional[float] = None
+        # O próximo snapshot é o de um listener sem filtro: traz a coleção
+        # inteira e substitui a cópia (ver `_iniciar`).
+        self._completo = False
+        # Serializa checar → cancelar → abrir o listener: sem ela, duas
+        # sessões (ou as threads do `precarregar`) viam `_watch` parado ao
+        # mesmo tempo e abriam dois listeners — o primeiro ficava órfão,
+        # ainda lendo (e cobrando) documentos.
+        self._lock_watch = threading.Lock()
+
+    def iniciar(self) -> None:
+        """
+        Abre (ou reabre, se a conexão tiver caído) o listener da coleção.
+        [v30] Com o espelho em disco, a carga inicial vem da cópia
+        sincronizada e o listener só acompanha `_atualizado_em >= marca` —
+        num reinício, só os documentos alterados desde a marca são lidos.
+        Depois de `_RESSINC_COMPLETA_S`, o listener é reaberto para passar
+        pela releitura completa (a que enxerga exclusões feitas por fora).
+        A PRIMEIRA abertura no processo também é completa: a cópia do disco
+        responde enquanto isso, mas um documento apagado por fora (ou sem
+        `_atualizado_em`) não pode esperar 24 h para sumir/aparecer.
+        """
+        with self._lock_watch:
+            self._iniciar()
+
+    def _iniciar(self) -> None:
+        """Chamar com `_lock_watch` travado (ver `iniciar`)."""
+        if self._watch is not None and getattr(self._watch, "is_active", False):
+            # `_completo`: a releitura completa já está a caminho (o snapshot
+            # chega depois, na thread do listener) — não reabrir de novo.
+            if self._completo or not (
+                _ESPELHO_DISCO and _colecao_sincronizada(self.nome).precisa_releitura_completa()
+            ):
+                return
+            self._watch.unsubscribe()
+        if self._pronto.is_set() and _em_modo_degradado():
+            # [v37] Listener caído (ou releitura vencida) sem cota: fica a cópia.
+            _servindo_copia(self._lida_em)
+            return
+        consulta = _col(self.nome)
+        if _ESPELHO_DISCO:
+            colecao = _colecao_sincronizada(self.nome)
+            completa = self._watch is None or colecao.precisa_releitura_completa()
+            base = colecao.copia_local() if completa else colecao.documentos()
+            if base or not completa:
+                with self._cond:
+                    self._docs = base
+                    self._lida_em = colecao._lida_em
+                    self._mudou()
+                self._pronto.set()
+            if not completa:
+                consulta = consulta.where("_atualizado_em", ">=", colecao.marca_com_folga())
+            self._completo = completa
+        self._watch = consulta.on_snapshot(self._ao_mudar)
+
+    def _ao_mudar(self, docs, changes, read_time) -> None:
+        _contar_leituras(self.nome, len(changes), funcao="(listener)")
+        with self._cond:
+            if self._completo:
+                # Primeiro snapshot do listener sem filtro: `docs` é a coleção
+                # inteira — o que não veio foi apagado por fora.
+                self._completo = False
+                self._docs = _com_pendentes(self.nome, {d.id: _doc_to_dict(d) for d in docs})
+                _colecao_sincronizada(self.nome).substituir(self._docs)
+                changes = ()
+            for change in changes:
+                doc = change.document
+                if change.type.name == "REMOVED":
+                    self._docs.pop(doc.id, None)
+                    if _ESPELHO_DISCO:
+                        _colecao_sincronizada(self.nome).aplicar_remocao(doc.id)
+                else:
+                    self._docs[doc.id] = _com_pendentes(self.nome, {doc.id: _doc_to_dict(doc)})[doc.id]
+                    if _ESPELHO_DISCO:
+                        _colecao_sincronizada(self.nome).aplicar(doc.id, self._docs[doc.id], mesclar=False)
+            self._lida_em = time.time()
+            self._mudou()
+        self._pronto.set()
+
+    def em_dia(self) -> bool:
+        return self._pronto.is_set() and getattr(self._watch, "is_active", False)
+
+    def _invalidar(self) -> None:
+        # Sem filtros, `aplicar_atualizacao` nunca invalida o espelho: o
+        # documento que faltar chega pelo listener.
+        pass
+
+    def _carga_direta(self) -> None:
+        """Plano B: o listener não entregou a carga inicial a tempo — lê direto."""
+        docs = list(_col(self.nome).stream())
+        _contar_leituras(self.nome, max(1, len(docs)))
+        with self._cond:
+            self._docs = _com_pendentes(self.nome, {d.id: _doc_to_dict(d) for d in docs})
+            self._lida_em = time.time()
+            self._mudou()
+        self._pronto.set()
+
+    def _garantir_carga(self) -> None:
+        self.iniciar()
+        if not self._pronto.is_set() and not self._pronto.wait(timeout=_ESPERA_CARGA_INICIAL):
+            self._carga_direta()
+
+
+@st.cache_resource(show_spinner=False)
+def _registro_tabelas() -> dict:
+    """
+    Todas as tabelas em memória do processo, por (coleção, filtros, campos) — UM
+    registro por servidor (`@st.cache_resource`), não um por sessão.
+    """
+    return {}
+
+
+_lock_registro = threading.Lock()
+
+
+def _tabela(nome: str, campos: Optional[tuple] = None, condicoes: tuple = (), **filtros) -> _TabelaConsulta:
+    """
+    Tabela da consulta `nome` + filtros de igualdade (`**filtros`) e [v32]
+    de intervalo (`condicoes`, tuplas (campo, op, valor)). [v25] Com
+    `campos`, só esses campos entram na tabela — os campos dos filtros
+    entram junto, para o write-through continuar sabendo se uma linha casa
+    ou não. Filtros e projeção vão para o Firestore (`where`/`select()`)
+    só com o espelho em disco desligado; com ele ligado, são aplicados
+    sobre a cópia sincronizada da coleção (ver `_TabelaConsulta._carregar`).
+    """
+    filtros_t = tuple(sorted((c, "==", v) for c, v in filtros.items())) + tuple(condicoes)
+    campos_t = tuple(sorted(set(campos) | {c for c, _, _ in filtros_t})) if campos else ()
+    chave = (nome, filtros_t, campos_t)
+    registro = _registro_tabelas()
+    with _lock_registro:
+        tab = registro.get(chave)
+        if tab is None:
+            tab = registro[chave] = _TabelaConsulta(nome, filtros_t, campos_t)
+    return tab
+
+
+def _tabelas_da_colecao(nome: str) -> list:
+    with _lock_registro:
+        return [t for (n, *_), t in _registro_tabelas().items() if n == nome]
+
+
+def _propagar_insercao(nome: str, rowid: str, dados: dict) -> None:
+    _contar_escritas(nome)
+    _nova_geracao(nome)
+    if _ESPELHO_DISCO:
+        _colecao_sincronizada(nome).aplicar(rowid, dados, mesclar=False)
+    for tab in _tabelas_da_colecao(nome):
+        tab.aplicar_insercao(rowid, dados)
+
+
+def _propagar_atualizacao(nome: str, rowid: str, dados: dict, contar: bool = True) -> None:
+    """`contar=False`: a escrita ainda não foi feita (fila) — quem grava conta."""
+    if contar:
+        _contar_escritas(nome)
+    _nova_geracao(nome)
+    if _ESPELHO_DISCO:
+        _colecao_sincronizada(nome).aplicar(rowid, dados, mesclar=True)
+    for tab in _tabelas_da_colecao(nome):
+        tab.aplicar_atualizacao(rowid, dados)
+
+
+def _propagar_mescla(nome: str, rowid: str, dados: dict) -> None:
+    """[v33] Write-through de um `set(..., merge=True)` (o doc pode ou não existir)."""
+    _contar_escritas(nome)
+    _nova_geracao(nome)
+    if _ESPELHO_DISCO:
+        _colecao_sincronizada(nome).aplicar(rowid, dados, mesclar=True)
+    for tab in _tabelas_da_colecao(nome):
+        tab.aplicar_mescla(rowid, dados)
+
+
+def _propagar_remocao(nome: str, rowid: str) -> None:
+    _contar_escritas(nome)
+    _nova_geracao(nome)
+    if _ESPELHO_DISCO:
+        _colecao_sincronizada(nome).aplicar_remocao(rowid)
+    for tab in _tabelas_da_colecao(nome):
+        tab.aplicar_remocao(rowid)
+
+
+def bulk_delete(query) -> list:
+    """
+    [v24] Apaga TODOS os documentos que a consulta `query` devolve, em
+    lotes (`WriteBatch`) de até `_LIMITE_LOTE` exclusões por commit — em
+    vez de um `doc.reference.delete()` (uma ida ao servidor) por
+    documento. Também tira os documentos apagados das tabelas em memória
+    (write-through, ver v23). Devolve a lista de ids apagados.
+    """
+    docs = list(query.stream())
+    if docs:
+        _contar_leituras(docs[0].reference.parent.id, len(docs))
+    for inicio in range(0, len(docs), _LIMITE_LOTE):
+        lote = get_db().batch()
+        for doc in docs[inicio:inicio + _LIMITE_LOTE]:
+            lote.delete(doc.reference)
+        lote.commit()
+    for doc in docs:
+        _propagar_remocao(doc.reference.parent.id, doc.id)
+    return [doc.id for doc in docs]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# FILA DE GRAVAÇÕES EM SEGUNDO PLANO  [novo — v38]
+# ──────────────────────────────────────────────────────────────────────────────
+# Erros em que vale esperar e tentar de novo; qualquer outro (ex.: o documento
+# foi apagado) descarta só a alteração que falhou.
+_ERROS_TRANSITORIOS = (ResourceExhausted, ServiceUnavailable, DeadlineExceeded)
+
+
+class _FilaGravacoes:
+    """
+    Atualizações (`update`) pendentes, na ordem em que foram pedidas, com um
+    diário JSONL em disco e uma thread que as grava em lotes. A thread usa
+    os recursos recebidos aqui (cliente, estatísticas, gerações), não os
+    `st.cache_resource` do módulo.
+    """
+
+    def __init__(self, caminho: str, cliente, estatisticas: "_Estatisticas", geracoes: dict):
+        self.caminho = caminho
+        self._cliente = cliente
+        self._estatisticas = estatisticas
+        self._geracoes = geracoes
+        self._cond = threading.Condition()
+        self._pendentes: list[dict] = self._ler()
+        self._thread = threading.Thread(target=self._trabalhar, name="lila-fila-gravacoes", daemon=True)
+        self._thread.start()
+
+    def _ler(self) -> list:
+        pendentes = []
+        try:
+            with open(self.caminho, encoding="utf-8") as f:
+                for linha in f:
+                    try:
+                        pendentes.append(json.loads(linha))
+                    except ValueError:
+                        continue  # linha cortada no meio (queda durante a escrita)
+        except OSError:
+            pass
+        return pendentes
+
+    def _regravar_diario(self) -> None:
+        """Chamar sempre com `self._cond` travado."""
+        os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+        temporario = self.caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            for item in self._pendentes:
+                f.write(json.dumps(item, default=str) + "\n")
+        os.replace(temporario, self.caminho)
+
+    def enfileirar(self, nome: str, rowid: str, dados: dict) -> None:
+        sessao, tela = _sessao_e_tela()
+        item = {"id": uuid.uuid4().hex, "colecao": nome, "rowid": rowid, "dados": dados,
+                "funcao": _funcao_chamadora(), "tela": tela, "sessao": sessao}
+        with self._cond:
+            os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+            with open(self.caminho, "a", encoding="utf-8") as f:
+                f.write(json.dumps(item, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._pendentes.append(item)
+            self._cond.notify()
+
+    def pendentes(self, nome: str) -> list:
+        """[(rowid, dados)] ainda não gravados de `nome`, na ordem."""
+        with self._cond:
+            return [(i["rowid"], i["dados"]) for i in self._pendentes if i["colecao"] == nome]
+
+    def tamanho(self) -> int:
+        with self._cond:
+            return len(self._pendentes)
+
+    def _trabalhar(self) -> None:
+        espera = _ESPERA_FILA_MIN_S
+        while True:
+            with self._cond:
+                while not self._pendentes:
+                    self._cond.wait()
+                lote = list(self._pendentes[:_LIMITE_LOTE])
+            try:
+                self._gravar_lote(lote)
+                espera = _ESPERA_FILA_MIN_S
+            except _ERROS_TRANSITORIOS as e:
+                if isinstance(e, ResourceExhausted):
+                    _cota_recusada()
+                time.sleep(espera * random.uniform(0.8, 1.2))
+                espera = min(espera * 2, _ESPERA_FILA_MAX_S)
+            except Exception:
+                # Lote recusado por um item (ex.: documento apagado): grava um
+                # por um e descarta só o que não passar.
+                for item in lote:
+                    try:
+                        self._gravar_lote([item])
+                    except _ERROS_TRANSITORIOS:
+                        time.sleep(espera * random.uniform(0.8, 1.2))
+                        espera = min(espera * 2, _ESPERA_FILA_MAX_S)
+                        break
+                    except Exception as erro:
+                        self._descartar(item, erro)
+
+    def _gravar_lote(self, lote: list) -> None:
+        batch = self._cliente.batch()
+        for item in lote:
+            # Carimbo da hora da gravação de verdade: a sincronização
+            # incremental dos outros servidores precisa enxergar a mudança.
+            ref = self._cliente.collection(item["colecao"]).document(item["rowid"])
+            batch.update(ref, _carimbado(item["dados"]))
+        batch.commit()
+        for item in lote:
+            self._estatisticas.registrar(
+                "escritas", item["colecao"], 1, item.get("funcao", "(fila)"),
+                item.get("tela", "(fora de sessão)"), item.get("sessao"),
+            )
+        self._concluir(lote)
+
+    def _descartar(self, item: dict, erro: Exception) -> None:
+        """
+        Recusa definitiva (NotFound, PermissionDenied, InvalidArgument...):
+        a alteração sai da fila, mas fica registrada (log, diário de
+        descartadas, falhas do painel de uso) e o write-through otimista é
+        desfeito com o que o servidor tem de fato.
+        """
+        _log.error("Gravação em segundo plano descartada: %s/%s", item["colecao"], item["rowid"], exc_info=erro)
+        self._estatisticas.registrar_falha("gravação descartada", item["colecao"], erro, item["rowid"])
+        try:
+            with open(_ARQ_FILA_DESCARTADAS, "a", encoding="utf-8") as f:
+                f.write(json.dumps({**item, "erro": f"{type(erro).__name__}: {erro}"}, default=str) + "\n")
+        except OSError:
+            pass
+        self._concluir([item])
+        try:
+            snap = self._cliente.collection(item["colecao"]).document(item["rowid"]).get()
+            self._estatisticas.registrar("leituras", item["colecao"], 1, "(fila de gravações)", "(fora de sessão)", None)
+            _restaurar_write_through(item["colecao"], item["rowid"], _doc_to_dict(snap) if snap.exists else None)
+        except Exception as erro_releitura:
+            _log.error("Não foi possível reler %s/%s", item["colecao"], item["rowid"], exc_info=erro_releitura)
+            _invalidar_tabelas(item["colecao"])
+
+    def _concluir(self, lote: list) -> None:
+        ids = {item["id"] for item in lote}
+        with self._cond:
+            self._pendentes = [i for i in self._pendentes if i["id"] not in ids]
+            try:
+                self._regravar_diario()
+            except OSError:
+                pass
+        for nome in {item["colecao"] for item in lote}:
+            # Agregações contadas no servidor antes da gravação chegar lá
+            # ficaram em cache com a geração atual — avança de novo.
+            _nova_geracao(nome, self._geracoes)
+
+
+def _restaurar_write_through(nome: str, rowid: str, dados: Optional[dict]) -> None:
+    """
+    Põe no espelho em disco e nas tabelas em memória (inclusive o espelho de
+    encomendas) o documento como ele está no servidor — `dados` None: ele
+    não existe. Desfaz um write-through cuja gravação foi recusada.
+    """
+    if _ESPELHO_DISCO:
+        if dados is None:
+            _colecao_sincronizada(nome).aplicar_remocao(rowid)
+        else:
+            _colecao_sincronizada(nome).aplicar(rowid, dados, mesclar=False)
+    for tab in _tabelas_da_colecao(nome):
+        tab.aplicar_remocao(rowid)
+        if dados is not None:
+            tab.aplicar_insercao(rowid, dados)
+
+
+def _invalidar_tabelas(nome: str) -> None:
+    """As `_TabelaConsulta` de `nome` são relidas no próximo acesso."""
+    for tab in _tabelas_da_colecao(nome):
+        if isinstance(tab, _TabelaConsulta):
+            with tab._cond:
+                tab._invalidar()
+
+
+@st.cache_resource(show_spinner=False)
+def _fila_gravacoes() -> _FilaGravacoes:
+    """A fila do processo (a thread começa gravando o que sobrou no diário)."""
+    return _FilaGravacoes(_ARQ_FILA_GRAVACOES, get_db(), _estatisticas(), _geracoes())
+
+
+def _com_pendentes(nome: str, docs: dict) -> dict:
+    """Reaplica sobre `docs` ({rowid: dados}, alterado no lugar) o que está na fila de `nome`."""
+    for rowid, dados in _fila_gravacoes().pendentes(nome):
+        if rowid in docs:
+            docs[rowid] = {**docs[rowid], **dados}
+    return docs
+
+
+def _atualizar(nome: str, rowid: str, dados: dict, em_segundo_plano: bool = False) -> None:
+    """
+    `update` de um documento + write-through. [v38] `em_segundo_plano`: só
+    enfileira (ver `_FilaGravacoes`) — a tela já vê a alteração, o
+    Firestore recebe logo depois.
+    """
+    dados = _carimbado(dados)
+    if em_segundo_plano:
+        _fila_gravacoes().enfileirar(nome, rowid, dados)
+    else:
+        _col(nome).document(rowid).update(dados)
+    _propagar_atualizacao(nome, rowid, dados, contar=not em_segundo_plano)
+
+
+def gravacoes_pendentes() -> int:
+    """Quantas alterações ainda estão na fila esperando o Firestore."""
+    return _fila_gravacoes().tamanho()
+
+
+def _ordenado(coluna: str, ascending: bool = True, key=None):
+    """Monta a função `montar` de uma visão que só ordena por `coluna` (se existir)."""
+    def montar(df: pd.DataFrame) -> pd.DataFrame:
+        if df.empty or coluna not in df.columns:
+            return df
+        return df.sort_values(coluna, ascending=ascending, key=key)
+    return montar
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# CARGA EM PARALELO  [novo — v34]
+# ──────────────────────────────────────────────────────────────────────────────
+@st.cache_resource(show_spinner=False)
+def _pool_leituras() -> ThreadPoolExecutor:
+    """Pool de threads das leituras paralelas — um por processo do servidor."""
+    return ThreadPoolExecutor(max_workers=_LEITURAS_PARALELAS, thread_name_prefix="lila-leitura")
+
+
+def precarregar(*leituras: Callable) -> list:
+    """
+    Executa as funções `leituras` (sem argumentos — use `lambda` para
+    passar filtros) ao mesmo tempo e devolve a lista de resultados, na
+    mesma ordem. Cada função preenche o próprio cache como de costume
+    (tabelas em memória, `st.cache_data`), então uma chamada depois disso
+    já sai do cache. Um erro em qualquer leitura é relançado aqui.
+
+    As threads do pool recebem o contexto da sessão que chamou (ver
+    `_submeter`; o `st.cache_data` precisa dele para não reclamar de
+    "missing ScriptRunContext").
+    """
+    if len(leituras) <= 1:
+        return [f() for f in leituras]
+    futuros = [_submeter(f) for f in leituras]
+    return [futuro.result() for futuro in futuros]
+
+
+def _submeter(f: Callable):
+    """Agenda `f` no pool de leituras, levando junto o contexto da sessão atual."""
+    ctx = get_script_run_ctx()
+
+    def rodar():
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return f()
+
+    return _pool_leituras().submit(rodar)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# AGREGAÇÕES (count / sum no servidor)  [novo — v26]
+# ──────────────────────────────────────────────────────────────────────────────
+# `condicoes` é uma tupla de (campo, operador, valor), com os mesmos
+# operadores do `.where()` do Firestore. O cache de cada agregação leva a
+# "geração" da coleção na chave: toda gravação feita por este processo
+# (`_propagar_*`) avança a geração, e a próxima chamada refaz a conta; o
+# TTL cobre as alterações feitas por fora.
+
+@st.cache_resource(show_spinner=False)
+def _geracoes() -> dict:
+    """Geração (contador de gravações) de cada coleção, por processo."""
+    return {}
+
+
+def _nova_geracao(nome: str, geracoes: Optional[dict] = None) -> None:
+    """`geracoes`: o próprio dict de `_geracoes()`, para quem roda fora do script (fila)."""
+    geracoes = _geracoes() if geracoes is None else geracoes
+    with _lock_registro:
+        geracoes[nome] = geracoes.get(nome, 0) + 1
+
+
+def _tabela_completa_em_dia(nome: str) -> Optional[_TabelaMemoria]:
+    """Uma tabela da coleção INTEIRA (sem filtro nem projeção) já carregada e em dia, se houver."""
+    with _lock_registro:
+        tab = _registro_tabelas().get((nome, (), ()))
+    return tab if tab is not None and tab.em_dia() else None
+
+
+def _agregar_em_memoria(tab: _TabelaMemoria, condicoes: tuple, campo: Optional[str]) -> float:
+    casam = [d for d in tab.linhas() if _casa_filtros(d, condicoes)]
+    if campo is None:
+        return len(casam)
+    return float(pd.to_numeric(pd.Series([d.get(campo) for d in casam], dtype=object),
+                               errors="coerce").fillna(0).sum())
+
+
+@st.cache_data(ttl=_TTL_AGREGACAO, show_spinner=False)
+def _agregar_no_servidor(nome: str, condicoes: tuple, campo: Optional[str], geracao: int) -> float:
+    """`geracao` só entra na chave do cache — ver `_nova_geracao`."""
+    q = _col(nome)
+    for campo_f, op, alvo in condicoes:
+        q = q.where(campo_f, op, alvo)
+    consulta = q.count(alias="resultado") if campo is None else q.sum(campo, alias="resultado")
+    resultado = consulta.get()[0][0].value or 0
+    _contar_leituras(nome, 1)
+    return resultado
+
+
+# Contas que o servidor já recusou por falta de índice composto: vão direto
+# para a conta em memória, sem repetir a consulta que vai falhar de novo.
+_agregacoes_sem_indice: set = set()
+
+
+def _agregar(nome: str, condicoes: tuple, campo: Optional[str]) -> float:
+    tab = _tabela_completa_em_dia(nome)
+    if tab is not None:
+        return _agregar_em_memoria(tab, condicoes, campo)
+    if (nome, condicoes, campo) in _agregacoes_sem_indice:
+        return _agregar_em_memoria(_tabela_para_agregar(nome), condicoes, campo)
+    try:
+        # [v37] Sem cota, vale o último resultado bom da mesma conta.
+        return _com_copia_boa(
+            ("agregado", nome, condicoes, campo),
+            lambda: _agregar_no_servidor(nome, condicoes, campo, _geracoes().get(nome, 0)),
+        )
+    except FailedPrecondition:
+        # Falta índice composto para essa combinação de filtros — conta em
+        # memória (lê a coleção uma vez, depois vale o TTL da tabela).
+        _agregacoes_sem_indice.add((nome, condicoes, campo))
+        return _agregar_em_memoria(_tabela_para_agregar(nome), condicoes, campo)
+
+
+def _tabela_para_agregar(nome: str) -> _TabelaMemoria:
+    return _espelho_encomendas() if nome == "lila_encomendas" else _tabela(nome)
+
+
+def agregado_contar(nome: str, condicoes: tuple = ()) -> int:
+    """Quantos documentos de `nome` casam com `condicoes` (ver `_agregar`)."""
+    return int(_agregar(nome, tuple(condicoes), None))
+
+
+def agregado_somar(nome: str, campo: str, condicoes: tuple = ()) -> float:
+    """Soma do campo numérico `campo` nos documentos de `nome` que casam com `condicoes`."""
+    return float(_agregar(nome, tuple(condicoes), campo))
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # CONFIG
 # ──────────────────────────────────────────────────────────────────────────────
@@ -147,36 +1987,119 @@ _CONFIG_DEFAULTS = {
     "telefone":                  "(11) 94600-6761",
     "endereco":                  "Embu das Artes – SP",
     "alerta_entrega_dias":       "7",
+    "capacidade_horas_dia":      "8",
 }
 
+
+
+@dataclass(frozen=True)
+class Configuracao:
+    """[v28] Configuração do app já com os tipos certos (ver `cfg_carregar`)."""
+    meta_faturamento: float = 5000.0
+    meta_pedidos_mes: int = 8
+    margem_minima_pct: float = 30.0
+    reserva_emergencia_meses: int = 3
+    capital_giro_pct: float = 20.0
+    cnpj: str = ""
+    telefone: str = ""
+    endereco: str = ""
+    alerta_entrega_dias: int = 7
+    capacidade_horas_dia: float = 8.0
+
+    @classmethod
+    def de_textos(cls, valores: dict) -> "Configuracao":
+        """Converte os textos salvos; valor vazio ou inválido fica com o default."""
+        convertidos = {}
+        for campo in fields(cls):
+            bruto = valores.get(campo.name)
+            if campo.type is str:
+                convertidos[campo.name] = str(bruto or "")
+                continue
+            try:
+                convertidos[campo.name] = campo.type(float(str(bruto).replace(",", ".")))
+            except (TypeError, ValueError):
+                convertidos[campo.name] = campo.default
+        return cls(**convertidos)
+
+
+def _refs_config() -> list:
+    return [_col("lila_config").document(k) for k in _CONFIG_DEFAULTS]
+
+
+@cronometrado(tipo="dados")
+def cfg_todos() -> dict:
+    """
+    [v28] Todas as chaves de configuração ({chave: valor em texto}), lidas
+    com UM `get_all` — uma ida ao servidor em vez de uma por chave. Chave
+    sem documento fica com o valor de `_CONFIG_DEFAULTS`.
+    [v37] Sem cota, fica a última leitura boa (ver `_com_copia_boa`).
+    """
+    return _com_copia_boa("config", _ler_config)
+
+
 @st.cache_data(ttl=_TTL_CONFIG, show_spinner=False)
+def _ler_config() -> dict:
+    valores = dict(_CONFIG_DEFAULTS)
+    _contar_leituras("lila_config", len(_CONFIG_DEFAULTS))
+    for doc in get_db().get_all(_refs_config()):
+        if doc.exists:
+            valores[doc.id] = (doc.to_dict() or {}).get("valor", valores.get(doc.id, ""))
+    return valores
+
+
 def cfg_get(chave: str) -> str:
-    doc = _col("lila_config").document(chave).get()
-    if doc.exists:
-        return doc.to_dict().get("valor", _CONFIG_DEFAULTS.get(chave, ""))
-    return _CONFIG_DEFAULTS.get(chave, "")
+    return cfg_todos().get(chave, _CONFIG_DEFAULTS.get(chave, ""))
+
+
+def cfg_carregar() -> Configuracao:
+    """[v28] A configuração inteira como objeto tipado (mesma leitura de `cfg_todos`)."""
+    return Configuracao.de_textos(cfg_todos())
+
+
+def _config_gravada(valores: dict) -> None:
+    """Limpa o cache da config e [v37] põe os valores novos na última cópia boa."""
+    _ler_config.clear()
+    copias = _copias_boas()
+    if "config" in copias:
+        anterior, lido_em = copias["config"]
+        copias["config"] = ({**anterior, **valores}, lido_em)
 
 
 def cfg_set(chave: str, valor: str) -> None:
     _col("lila_config").document(chave).set({"valor": valor})
-    cfg_get.clear()
+    _contar_escritas("lila_config")
+    _config_gravada({chave: valor})
+
+
+def cfg_set_varios(valores: dict) -> None:
+    """[v28] Grava várias chaves de uma vez, num único lote."""
+    lote = get_db().batch()
+    for chave, valor in valores.items():
+        lote.set(_col("lila_config").document(chave), {"valor": valor})
+    lote.commit()
+    _contar_escritas("lila_config", len(valores))
+    _config_gravada(valores)
 
 
 def init_config_defaults() -> None:
-    """Garante que os valores padrão existam (chamado na inicialização)."""
-    for k, v in _CONFIG_DEFAULTS.items():
-        ref = _col("lila_config").document(k)
-        if not ref.get().exists:
-            ref.set({"valor": v})
-    cfg_get.clear()
+    """
+    Garante que os valores padrão existam (chamado na inicialização).
+    [v28] 1 `get_all` para saber o que falta + 1 lote com as que faltarem.
+    """
+    existentes = {doc.id for doc in get_db().get_all(_refs_config()) if doc.exists}
+    _contar_leituras("lila_config", len(_CONFIG_DEFAULTS))
+    faltando = {k: v for k, v in _CONFIG_DEFAULTS.items() if k not in existentes}
+    if faltando:
+        cfg_set_varios(faltando)
+    _ler_config.clear()
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # CLIENTES
 # ──────────────────────────────────────────────────────────────────────────────
 
-@st.cache_data(ttl=_TTL_LISTAS, show_spinner=False)
-def clientes_listar() -> pd.DataFrame:
+@cronometrado(tipo="dados")
+def clientes_listar(campos: Optional[tuple] = None) -> pd.DataFrame:
     """
     [v17 — corrigido] Busca TODOS os documentos da coleção, SEM usar
     `.order_by("nome")` do Firestore. Um `order_by` no Firestore exclui
@@ -186,24 +2109,27 @@ def clientes_listar() -> pd.DataFrame:
     (inclusive Medidas), sem nenhum aviso. Agora buscamos tudo primeiro e
     ordenamos em Python (mesmo padrão já usado em `prospects_listar`
     abaixo), então nenhuma cliente cadastrada pode ficar de fora.
+
+    [v25] `campos` (ex.: `PERFIL_CLIENTES_SELECAO`) traz só essas colunas
+    (no servidor só com o espelho em disco desligado — ver `_tabela`).
     """
-    docs = _col("lila_clientes").stream()
-    df = _docs_to_df(list(docs))
-    if not df.empty and "nome" in df.columns:
-        df = df.sort_values("nome", key=lambda s: s.fillna("").astype(str).str.lower())
-    return df
+    return _tabela("lila_clientes", campos=campos).visao(
+        "listar", _ordenado("nome", key=lambda s: s.fillna("").astype(str).str.lower())
+    )
 
 
 def clientes_inserir(dados: dict) -> str:
     """Insere cliente e retorna o ID gerado."""
+    dados = _carimbado(dados)
     _, ref = _col("lila_clientes").add(dados)
-    clientes_listar.clear()
+    _propagar_insercao("lila_clientes", ref.id, dados)
     return ref.id
 
 
 def clientes_atualizar(rowid: str, dados: dict) -> None:
+    dados = _carimbado(dados)
     _col("lila_clientes").document(rowid).update(dados)
-    clientes_listar.clear()
+    _propagar_atualizacao("lila_clientes", rowid, dados)
 
 
 def clientes_deletar(rowid: str) -> None:
@@ -214,7 +2140,7 @@ def clientes_deletar(rowid: str) -> None:
     a uma ficha de cliente.
     """
     _col("lila_clientes").document(rowid).delete()
-    clientes_listar.clear()
+    _propagar_remocao("lila_clientes", rowid)
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -227,13 +2153,9 @@ def clientes_deletar(rowid: str) -> None:
 # `modulos.mod_encomendas.dialog_nova_encomenda`, no momento em que a
 # encomenda correspondente é criada com sucesso.
 
-@st.cache_data(ttl=_TTL_LISTAS, show_spinner=False)
+@cronometrado(tipo="dados")
 def prospects_listar() -> pd.DataFrame:
-    docs = _col("lila_prospects").stream()
-    df = _docs_to_df(list(docs))
-    if not df.empty and "nome" in df.columns:
-        df = df.sort_values("nome", key=lambda s: s.str.lower())
-    return df
+    return _tabela("lila_prospects").visao("listar", _ordenado("nome", key=lambda s: s.str.lower()))
 
 
 def prospects_inserir(dados: dict) -> str:
@@ -242,14 +2164,16 @@ def prospects_inserir(dados: dict) -> str:
     criado_em (str isoformat).
     """
     dados["_criado_em"] = _now_iso()
+    dados = _carimbado(dados)
     _, ref = _col("lila_prospects").add(dados)
-    prospects_listar.clear()
+    _propagar_insercao("lila_prospects", ref.id, dados)
     return ref.id
 
 
 def prospects_atualizar(rowid: str, dados: dict) -> None:
+    dados = _carimbado(dados)
     _col("lila_prospects").document(rowid).update(dados)
-    prospects_listar.clear()
+    _propagar_atualizacao("lila_prospects", rowid, dados)
 
 
 def prospects_deletar(rowid: str) -> None:
@@ -259,45 +2183,108 @@ def prospects_deletar(rowid: str) -> None:
     `dialog_nova_encomenda` assim que o prospect vira um pedido de verdade.
     """
     _col("lila_prospects").document(rowid).delete()
-    prospects_listar.clear()
+    _propagar_remocao("lila_prospects", rowid)
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # ENCOMENDAS
 # ──────────────────────────────────────────────────────────────────────────────
 
-@st.cache_data(ttl=_TTL_LISTAS, show_spinner=False)
-def encomendas_listar(cancelado: Optional[bool] = None) -> pd.DataFrame:
-    q = _col("lila_encomendas")
-    if cancelado is not None:
-        q = q.where("cancelado", "==", 1 if cancelado else 0)
-    docs = q.stream()
-    df = _docs_to_df(list(docs))
+def _espelho_encomendas() -> _EspelhoColecao:
+    """
+    [v22] Cópia em memória de `lila_encomendas` mantida pelo listener —
+    UMA por processo do servidor (fica no `_registro_tabelas`, junto com as
+    demais tabelas, para receber também o write-through do v23).
+    """
+    chave = ("lila_encomendas", (), ())
+    registro = _registro_tabelas()
+    with _lock_registro:
+        espelho = registro.get(chave)
+        if not isinstance(espelho, _EspelhoColecao):
+            espelho = registro[chave] = _EspelhoColecao("lila_encomendas")
+    espelho.iniciar()
+    return espelho
+
+
+def _montar_encomendas(df: pd.DataFrame, cancelado: Optional[bool]) -> pd.DataFrame:
     if df.empty:
         return df
+    if cancelado is not None:
+        if "cancelado" not in df.columns:
+            return df.iloc[0:0]
+        # Mesmo critério do antigo `.where("cancelado", "==", 0/1)`: quem não
+        # tem o campo preenchido não entra em nenhum dos dois filtros.
+        flag = pd.to_numeric(df["cancelado"], errors="coerce")
+        df = df[flag == (1 if cancelado else 0)]
+        if df.empty:
+            return df
     # Ordena por criação (campo _criado_em), mais recente primeiro
     if "_criado_em" in df.columns:
         df = df.sort_values("_criado_em", ascending=False)
     return df
 
 
+@cronometrado(tipo="dados")
+def encomendas_listar(cancelado: Optional[bool] = None, campos: Optional[tuple] = None) -> pd.DataFrame:
+    """
+    [v22] Responde da cópia em memória mantida pelo listener (ver
+    `_espelho_encomendas`) — nenhuma leitura no Firestore por chamada.
+
+    [v25] `campos` (ex.: `PERFIL_ENCOMENDAS_AGENDA`) devolve só essas
+    colunas (+ "rowid"); a visão recortada é montada uma vez por versão.
+    """
+    campos = tuple(campos) if campos else ()
+    return _espelho_encomendas().visao(
+        ("listar", cancelado, campos),
+        lambda df: _recortar_colunas(_montar_encomendas(df, cancelado), campos),
+    )
+
+
+def encomendas_contar_ativas(etapa_concluido: int = 4) -> int:
+    """[v26] Pedidos não cancelados que ainda não chegaram à etapa `etapa_concluido`."""
+    return agregado_contar("lila_encomendas", (
+        ("cancelado", "==", 0), ("etapa", "<", etapa_concluido),
+    ))
+
+
+def encomendas_contar_no_mes(mes_str: str) -> int:
+    """
+    [v26] Pedidos não cancelados criados no mês `mes_str` ("YYYY-MM"), pela
+    mesma regra do cabeçalho antigo: conta por `criado_em` (gravado pelo
+    formulário) e, se nenhum pedido tiver esse campo, por `_criado_em`.
+    Esse "ou" não cabe numa agregação do Firestore — a conta sai da cópia em
+    memória das encomendas [v22], recortada nas duas colunas.
+    """
+    df = encomendas_listar(cancelado=False, campos=("criado_em", "_criado_em"))
+    coluna = "criado_em" if "criado_em" in df.columns else "_criado_em"
+    if df.empty or coluna not in df.columns:
+        return 0
+    return int(df[coluna].fillna("").astype(str).str.startswith(mes_str).sum())
+
+
 def encomendas_inserir(dados: dict) -> str:
     dados.setdefault("cancelado", 0)
     dados.setdefault("etapa", 1)
     dados["_criado_em"] = _now_iso()
+    dados = _carimbado(dados)
     _, ref = _col("lila_encomendas").add(dados)
-    encomendas_listar.clear()
+    _propagar_insercao("lila_encomendas", ref.id, dados)
     return ref.id
 
 
-def encomendas_atualizar(rowid: str, dados: dict) -> None:
-    _col("lila_encomendas").document(rowid).update(dados)
-    encomendas_listar.clear()
-    encomendas_buscar.clear()
+def encomendas_atualizar(rowid: str, dados: dict, em_segundo_plano: bool = False) -> None:
+    _atualizar("lila_encomendas", rowid, dados, em_segundo_plano)
 
 
-@st.cache_data(ttl=_TTL_DOC, show_spinner=False)
 def encomendas_buscar(rowid: str) -> dict:
+    """
+    [v22] Busca primeiro na cópia em memória do listener (zero leituras);
+    só vai ao Firestore se o documento ainda não chegou por lá.
+    """
+    enc = _espelho_encomendas().buscar(rowid)
+    if enc is not None:
+        return enc
+    _contar_leituras("lila_encomendas", 1)
     return _doc_to_dict(_col("lila_encomendas").document(rowid).get())
 
 
@@ -314,7 +2301,7 @@ def encomendas_cancelar(rowid: str) -> None:
     normal em `lila_gastos` (ex: categoria "Estorno/Reembolso"), para que o
     caixa continue batendo com o extrato bancário.
     """
-    _col("lila_encomendas").document(rowid).update({
+    campos_cancelamento = {
         "cancelado": 1,
         "etapa": 1,
         "sinal": 0,
@@ -323,17 +2310,14 @@ def encomendas_cancelar(rowid: str) -> None:
         "data_confeccao": None,
         "data_prova": None,
         "data_entrega": None,
-    })
+    }
+    campos_cancelamento = _carimbado(campos_cancelamento)
+    _col("lila_encomendas").document(rowid).update(campos_cancelamento)
+    _propagar_atualizacao("lila_encomendas", rowid, campos_cancelamento)
     # Remove tarefas vinculadas
-    for doc in _col("lila_cronograma").where("encomenda_id", "==", rowid).stream():
-        doc.reference.delete()
+    bulk_delete(_col("lila_cronograma").where("encomenda_id", "==", rowid))
     # Remove gastos não pagos vinculados
-    for doc in _col("lila_gastos").where("encomenda_id", "==", rowid).where("pago", "==", 0).stream():
-        doc.reference.delete()
-    encomendas_listar.clear()
-    encomendas_buscar.clear()
-    cronograma_listar.clear()
-    gastos_listar.clear()
+    bulk_delete(_col("lila_gastos").where("encomenda_id", "==", rowid).where("pago", "==", 0))
 
 
 def encomendas_deletar_completo(rowid: str) -> None:
@@ -344,51 +2328,133 @@ def encomendas_deletar_completo(rowid: str) -> None:
     caixa e conciliação, mesmo que o cadastro do pedido seja excluído.
     """
     _col("lila_encomendas").document(rowid).delete()
-    for doc in _col("lila_cronograma").where("encomenda_id", "==", rowid).stream():
-        doc.reference.delete()
-    for doc in _col("lila_gastos").where("encomenda_id", "==", rowid).stream():
-        doc.reference.delete()
-    encomendas_listar.clear()
-    encomendas_buscar.clear()
-    cronograma_listar.clear()
-    gastos_listar.clear()
+    _propagar_remocao("lila_encomendas", rowid)
+    bulk_delete(_col("lila_cronograma").where("encomenda_id", "==", rowid))
+    bulk_delete(_col("lila_gastos").where("encomenda_id", "==", rowid))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# LEITURAS POR MÊS (gastos / recebimentos)  [novo — v32]
+# ──────────────────────────────────────────────────────────────────────────────
+
+def mes_seguinte(mes_str: str) -> str:
+    """'2026-03' -> '2026-04' (e '2026-12' -> '2027-01')."""
+    ano, mes = int(mes_str[:4]), int(mes_str[5:7])
+    return f"{ano + mes // 12}-{mes % 12 + 1:02d}"
+
+
+def _mes_fechado(mes_str: str) -> bool:
+    """
+    Pela tabela dos fechamentos (poucos documentos, um por mês): com o TTL
+    vencido, responde com a cópia e relê em segundo plano, como as demais
+    tabelas — nunca uma leitura avulsa no meio da tela.
+    """
+    fech = _tabela("lila_fechamentos_mensais").buscar(mes_str)
+    return bool(fech) and int(fech.get("fechado", 0) or 0) == 1
+
+
+_tabelas_mes_recentes: "OrderedDict[tuple, None]" = OrderedDict()
+
+
+def _tabela_do_mes(nome: str, mes_str: str) -> _TabelaConsulta:
+    """
+    Tabela de `nome` só com `data` no mês `mes_str` (intervalo
+    [mes_str, mês seguinte) — "2026-03" <= "2026-03-15" < "2026-04").
+    Mês fechado é relido só a cada `_TTL_MES_FECHADO`. Só as
+    `_MAX_TABELAS_MES` usadas mais recentemente ficam no registro.
+    """
+    tab = _tabela(nome, condicoes=(("data", ">=", mes_str), ("data", "<", mes_seguinte(mes_str))))
+    tab.ttl = _TTL_MES_FECHADO if _mes_fechado(mes_str) else _TTL_LISTAS
+    chave = (tab.nome, tab.filtros, tab.campos)
+    registro = _registro_tabelas()
+    with _lock_registro:
+        _tabelas_mes_recentes[chave] = None
+        _tabelas_mes_recentes.move_to_end(chave)
+        while len(_tabelas_mes_recentes) > _MAX_TABELAS_MES:
+            antiga, _ = _tabelas_mes_recentes.popitem(last=False)
+            registro.pop(antiga, None)
+    return tab
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # GASTOS
 # ──────────────────────────────────────────────────────────────────────────────
 
-@st.cache_data(ttl=_TTL_LISTAS, show_spinner=False)
-def gastos_listar() -> pd.DataFrame:
-    docs = _col("lila_gastos").stream()
-    df = _docs_to_df(list(docs))
-    if not df.empty and "data" in df.columns:
-        df = df.sort_values("data", ascending=False)
-    return df
+@cronometrado(tipo="dados")
+def gastos_listar(campos: Optional[tuple] = None) -> pd.DataFrame:
+    """[v25] `campos` traz só essas colunas (ver `_tabela` sobre quando a projeção vai ao servidor)."""
+    return _tabela("lila_gastos", campos=campos).visao("listar", _ordenado("data", ascending=False))
+
+
+@cronometrado(tipo="dados")
+def gastos_listar_mes(mes_str: str) -> pd.DataFrame:
+    """[v32] Gastos com `data` dentro do mês `mes_str` ("YYYY-MM")."""
+    return _tabela_do_mes("lila_gastos", mes_str).visao("listar", _ordenado("data", ascending=False))
+
+
+@cronometrado(tipo="dados")
+def gastos_listar_desde(mes_str: str) -> pd.DataFrame:
+    """[v32] Gastos com `data` a partir do mês `mes_str` (inclusive)."""
+    return _tabela("lila_gastos", condicoes=(("data", ">=", mes_str),)).visao(
+        "listar", _ordenado("data", ascending=False)
+    )
+
+
+@cronometrado(tipo="dados")
+def gastos_em_aberto() -> pd.DataFrame:
+    """[v32] Só as despesas ainda não pagas (pago == 0), de qualquer mês."""
+    return _tabela("lila_gastos", pago=0).visao("listar", _ordenado("data", ascending=False))
+
+
+def gastos_total_pago() -> float:
+    """[v32] Soma de `valor` de todos os gastos pagos (agregação no servidor)."""
+    return agregado_somar("lila_gastos", "valor", (("pago", "==", 1),))
+
+
+def _somar_por_encomenda(df: pd.DataFrame) -> pd.DataFrame:
+    if df.empty or "encomenda_id" not in df.columns:
+        return pd.DataFrame({"encomenda_id": pd.Series(dtype=str), "valor": pd.Series(dtype=float)})
+    valor = pd.to_numeric(df["valor"], errors="coerce").fillna(0.0) if "valor" in df.columns else 0.0
+    return (
+        df.assign(valor=valor, encomenda_id=df["encomenda_id"].fillna("").astype(str))
+        .groupby("encomenda_id", as_index=False)["valor"].sum()
+    )
+
+
+@cronometrado(tipo="dados")
+def gastos_totais_por_encomenda() -> dict:
+    """
+    [v32] {encomenda_id: soma de `valor`} dos gastos vinculados a pedidos —
+    um `groupby` só, sobre a tabela de gastos com só esses dois campos
+    (montado uma vez por versão da tabela). Pedido sem gasto não aparece.
+    """
+    df = _tabela("lila_gastos", campos=("encomenda_id", "valor")).visao(
+        "total_por_encomenda", _somar_por_encomenda,
+    )
+    df = df[df["encomenda_id"] != ""]
+    return dict(zip(df["encomenda_id"], df["valor"].astype(float)))
 
 
 def gastos_inserir(dados: dict) -> str:
     dados.setdefault("conciliado", 0)
     dados["_criado_em"] = _now_iso()
+    dados = _carimbado(dados)
     _, ref = _col("lila_gastos").add(dados)
-    gastos_listar.clear()
+    _propagar_insercao("lila_gastos", ref.id, dados)
     return ref.id
 
 
-def gastos_atualizar(rowid: str, dados: dict) -> None:
-    _col("lila_gastos").document(rowid).update(dados)
-    gastos_listar.clear()
+def gastos_atualizar(rowid: str, dados: dict, em_segundo_plano: bool = False) -> None:
+    _atualizar("lila_gastos", rowid, dados, em_segundo_plano)
 
 
 def gastos_deletar(rowid: str) -> None:
     _col("lila_gastos").document(rowid).delete()
-    gastos_listar.clear()
+    _propagar_remocao("lila_gastos", rowid)
 
 
 def gastos_deletar_pagos() -> None:
-    for doc in _col("lila_gastos").where("pago", "==", 1).stream():
-        doc.reference.delete()
-    gastos_listar.clear()
+    bulk_delete(_col("lila_gastos").where("pago", "==", 1))
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -399,13 +2465,28 @@ def gastos_deletar_pagos() -> None:
 # que permite reconciliação bancária e fechamento de caixa mensal corretos.
 # Segue exatamente o mesmo padrão de `gastos_*` acima.
 
-@st.cache_data(ttl=_TTL_LISTAS, show_spinner=False)
+@cronometrado(tipo="dados")
 def recebimentos_listar() -> pd.DataFrame:
-    docs = _col("lila_recebimentos").stream()
-    df = _docs_to_df(list(docs))
-    if not df.empty and "data" in df.columns:
-        df = df.sort_values("data", ascending=False)
-    return df
+    return _tabela("lila_recebimentos").visao("listar", _ordenado("data", ascending=False))
+
+
+@cronometrado(tipo="dados")
+def recebimentos_listar_mes(mes_str: str) -> pd.DataFrame:
+    """[v32] Recebimentos com `data` dentro do mês `mes_str` ("YYYY-MM")."""
+    return _tabela_do_mes("lila_recebimentos", mes_str).visao("listar", _ordenado("data", ascending=False))
+
+
+@cronometrado(tipo="dados")
+def recebimentos_listar_desde(mes_str: str) -> pd.DataFrame:
+    """[v32] Recebimentos com `data` a partir do mês `mes_str` (inclusive)."""
+    return _tabela("lila_recebimentos", condicoes=(("data", ">=", mes_str),)).visao(
+        "listar", _ordenado("data", ascending=False)
+    )
+
+
+def recebimentos_total() -> float:
+    """[v32] Soma de `valor` de todos os recebimentos (agregação no servidor)."""
+    return agregado_somar("lila_recebimentos", "valor")
 
 
 def recebimentos_inserir(dados: dict) -> str:
@@ -417,19 +2498,19 @@ def recebimentos_inserir(dados: dict) -> str:
     """
     dados.setdefault("conciliado", 0)
     dados["_criado_em"] = _now_iso()
+    dados = _carimbado(dados)
     _, ref = _col("lila_recebimentos").add(dados)
-    recebimentos_listar.clear()
+    _propagar_insercao("lila_recebimentos", ref.id, dados)
     return ref.id
 
 
-def recebimentos_atualizar(rowid: str, dados: dict) -> None:
-    _col("lila_recebimentos").document(rowid).update(dados)
-    recebimentos_listar.clear()
+def recebimentos_atualizar(rowid: str, dados: dict, em_segundo_plano: bool = False) -> None:
+    _atualizar("lila_recebimentos", rowid, dados, em_segundo_plano)
 
 
 def recebimentos_deletar(rowid: str) -> None:
     _col("lila_recebimentos").document(rowid).delete()
-    recebimentos_listar.clear()
+    _propagar_remocao("lila_recebimentos", rowid)
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -438,37 +2519,34 @@ def recebimentos_deletar(rowid: str) -> None:
 # Um documento por mês (chave de negócio: campo "mes", formato "YYYY-MM").
 # É isso que carrega o saldo final de um mês para virar o saldo inicial do
 # mês seguinte, e que trava (concilia) os lançamentos de um período fechado.
-# O upsert por campo (em vez de por rowid) segue o mesmo padrão já usado em
-# `peso_upsert` acima.
+# [v33] O id do documento é o próprio mês (mesmo padrão de `peso_upsert`).
 
-@st.cache_data(ttl=_TTL_LISTAS, show_spinner=False)
+@cronometrado(tipo="dados")
 def fechamentos_listar() -> pd.DataFrame:
-    docs = _col("lila_fechamentos_mensais").stream()
-    df = _docs_to_df(list(docs))
-    if not df.empty and "mes" in df.columns:
-        df = df.sort_values("mes", ascending=False)
-    return df
+    return _tabela("lila_fechamentos_mensais").visao("listar", _ordenado("mes", ascending=False))
 
 
 def fechamento_buscar(mes_str: str) -> Optional[dict]:
     """
     Retorna o dict do fechamento do mês ('YYYY-MM') ou None se não existir.
-    Não usa cache próprio — reaproveita o cache de fechamentos_listar(),
-    igual ao padrão de `cronograma_com_cliente` reaproveitando `encomendas_buscar`.
+    [v33] Busca pelo id (= mês): se a tabela de `fechamentos_listar()` já
+    está em memória (mesmo vencida), é um acesso ao dict; senão, lê só
+    esse documento.
     """
-    df = fechamentos_listar()
-    if df.empty or "mes" not in df.columns:
-        return None
-    linha = df[df["mes"] == mes_str]
-    if linha.empty:
-        return None
-    return linha.iloc[0].to_dict()
+    tab = _tabela("lila_fechamentos_mensais")
+    if tab.tem_copia() or _em_modo_degradado():
+        # Cópia vencida também serve: `buscar` relê em segundo plano.
+        return tab.buscar(mes_str)
+    doc = _col("lila_fechamentos_mensais").document(mes_str).get()
+    _contar_leituras("lila_fechamentos_mensais", 1)
+    return {**doc.to_dict(), "rowid": doc.id} if doc.exists else None
 
 
 def fechamento_salvar(mes_str: str, dados: dict) -> None:
     """
-    Cria ou atualiza (upsert) o fechamento do mês, buscando pelo campo "mes"
-    (mesmo padrão de `peso_upsert`, que busca por "mes_ano").
+    Cria ou atualiza (upsert) o fechamento do mês. [v33] O documento se
+    chama `mes_str`, então é uma gravação só (`set` com `merge=True`), sem
+    consulta antes.
 
     dados esperado (nem todos os campos precisam vir em toda chamada, já
     que é upsert — ex: `fechamento_reabrir` só manda o campo "fechado"):
@@ -477,15 +2555,9 @@ def fechamento_salvar(mes_str: str, dados: dict) -> None:
       saldo_extrato_informado (float | None), diferenca (float),
       fechado (0/1), observacoes (str), data_fechamento (str isoformat | None).
     """
-    dados = dict(dados)
-    dados["_atualizado_em"] = _now_iso()
-    docs = list(_col("lila_fechamentos_mensais").where("mes", "==", mes_str).stream())
-    if docs:
-        docs[0].reference.update(dados)
-    else:
-        dados.setdefault("mes", mes_str)
-        _col("lila_fechamentos_mensais").add(dados)
-    fechamentos_listar.clear()
+    dados = {**dados, "mes": mes_str, "_atualizado_em": _now_iso()}
+    _col("lila_fechamentos_mensais").document(mes_str).set(dados, merge=True)
+    _propagar_mescla("lila_fechamentos_mensais", mes_str, dados)
 
 
 def fechamento_reabrir(mes_str: str) -> None:
@@ -497,21 +2569,19 @@ def fechamento_reabrir(mes_str: str) -> None:
 # CRONOGRAMA
 # ──────────────────────────────────────────────────────────────────────────────
 
-@st.cache_data(ttl=_TTL_LISTAS, show_spinner=False)
-def cronograma_listar(
-    tipo_agenda: Optional[str] = None,
-    concluida: Optional[bool] = None,
-    ate_data: Optional[str] = None,
+def _montar_cronograma(
+    df: pd.DataFrame,
+    tipo_agenda: Optional[str],
+    concluida: Optional[bool],
+    ate_data: Optional[str],
 ) -> pd.DataFrame:
-    q = _col("lila_cronograma")
-    if tipo_agenda:
-        q = q.where("tipo_agenda", "==", tipo_agenda)
-    if concluida is not None:
-        q = q.where("concluida", "==", 1 if concluida else 0)
-    docs = list(q.stream())
-    df = _docs_to_df(docs)
     if df.empty:
         return df
+    if tipo_agenda:
+        df = df[df["tipo_agenda"] == tipo_agenda] if "tipo_agenda" in df.columns else df.iloc[0:0]
+    if concluida is not None:
+        marcada = pd.to_numeric(df["concluida"], errors="coerce").fillna(0) if "concluida" in df.columns else 0
+        df = df[(marcada == 1) == bool(concluida)]
     if ate_data and "data" in df.columns:
         df = df[df["data"] <= ate_data]
     if "data" in df.columns:
@@ -519,24 +2589,44 @@ def cronograma_listar(
     return df
 
 
+@cronometrado(tipo="dados")
+def cronograma_listar(
+    tipo_agenda: Optional[str] = None,
+    concluida: Optional[bool] = None,
+    ate_data: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    [v35] Todas as combinações de filtro saem de UMA tabela base (a coleção
+    inteira, em memória): cada combinação é só uma visão filtrada, montada
+    uma vez por versão da tabela. Antes cada combinação era uma consulta
+    própria no Firestore — e uma gravação no cronograma fazia as cinco ou
+    seis variantes usadas pelas telas relerem documentos repetidos.
+    """
+    return _tabela("lila_cronograma").visao(
+        ("listar", tipo_agenda or None, concluida, ate_data),
+        lambda df: _montar_cronograma(df, tipo_agenda, concluida, ate_data),
+    )
+
+
 def cronograma_inserir(dados: dict) -> str:
     dados.setdefault("concluida", 0)
     dados["_criado_em"] = _now_iso()
+    dados = _carimbado(dados)
     _, ref = _col("lila_cronograma").add(dados)
-    cronograma_listar.clear()
+    _propagar_insercao("lila_cronograma", ref.id, dados)
     return ref.id
 
 
-def cronograma_atualizar(rowid: str, dados: dict) -> None:
-    _col("lila_cronograma").document(rowid).update(dados)
-    cronograma_listar.clear()
+def cronograma_atualizar(rowid: str, dados: dict, em_segundo_plano: bool = False) -> None:
+    _atualizar("lila_cronograma", rowid, dados, em_segundo_plano)
 
 
 def cronograma_deletar(rowid: str) -> None:
     _col("lila_cronograma").document(rowid).delete()
-    cronograma_listar.clear()
+    _propagar_remocao("lila_cronograma", rowid)
 
 
+@cronometrado(tipo="dados")
 def cronograma_com_cliente(
     tipo_agenda: str = "Trabalho",
     concluida: bool = False,
@@ -544,25 +2634,37 @@ def cronograma_com_cliente(
 ) -> pd.DataFrame:
     """
     Retorna cronograma com o nome do cliente da encomenda vinculada.
-    Faz o 'join' manualmente (Firestore não tem JOIN), reaproveitando o
-    cache de `encomendas_buscar` — na prática, isso significa que essa
-    função só bate no Firestore de verdade quando o cache expira ou é
-    invalidado por uma gravação, mesmo sendo chamada várias vezes por tela
-    (Hoje, aba Trabalho, Calendário).
+    Faz o 'join' manualmente (Firestore não tem JOIN).
+
+    [v29] O join é vetorizado: os nomes saem de um mapa {rowid: cliente}
+    montado da cópia em memória de encomendas (v22, zero leituras) e
+    aplicado à coluna `encomenda_id` de uma vez. Só se algum id não estiver
+    na cópia (listener ainda não em dia) é que os que faltam são buscados,
+    todos juntos, num único `get_all` — antes era um `encomendas_buscar`
+    (um `get()`) por encomenda diferente, a cada uma das 3 chamadas da
+    Agenda (Hoje, aba Trabalho, Calendário).
     """
     df = cronograma_listar(tipo_agenda=tipo_agenda, concluida=concluida, ate_data=ate_data)
     if df.empty:
         return df
+    if "encomenda_id" not in df.columns:
+        df["nome_cliente"] = ""
+        return df
+
+    ids = df["encomenda_id"].fillna("").astype(str)
+    df_enc = encomendas_listar(campos=("cliente",))
+    nomes: dict[str, str] = {}
+    if not df_enc.empty and "cliente" in df_enc.columns:
+        nomes = dict(zip(df_enc["rowid"], df_enc["cliente"]))
+
+    faltando = set(ids) - set(nomes) - {""}
+    if faltando and not _espelho_encomendas().em_dia():
+        refs = [_col("lila_encomendas").document(i) for i in sorted(faltando)]
+        _contar_leituras("lila_encomendas", len(refs))
+        for doc in get_db().get_all(refs):
+            nomes[doc.id] = (doc.to_dict() or {}).get("cliente", "") if doc.exists else ""
 
-    cache_enc: dict[str, str] = {}
-    nomes = []
-    for _, row in df.iterrows():
-        enc_id = row.get("encomenda_id")
-        if enc_id and enc_id not in cache_enc:
-            enc = encomendas_buscar(str(enc_id))
-            cache_enc[str(enc_id)] = enc.get("cliente", "")
-        nomes.append(cache_enc.get(str(enc_id), "") if enc_id else "")
-    df["nome_cliente"] = nomes
+    df["nome_cliente"] = ids.map(nomes).fillna("")
     return df
 
 
@@ -570,67 +2672,248 @@ def cronograma_com_cliente(
 # CAMPO HORAS
 # ──────────────────────────────────────────────────────────────────────────────
 
-@st.cache_data(ttl=_TTL_LISTAS, show_spinner=False)
+@cronometrado(tipo="dados")
 def campo_horas_listar(mes_ano: Optional[str] = None) -> pd.DataFrame:
-    q = _col("lila_campo_horas")
-    if mes_ano:
-        q = q.where("mes_ano", "==", mes_ano)
-    docs = list(q.stream())
-    df = _docs_to_df(docs)
-    if not df.empty and "data" in df.columns:
-        df = df.sort_values("data", ascending=True)
-    return df
+    filtros = {"mes_ano": mes_ano} if mes_ano else {}
+    return _tabela("lila_campo_horas", **filtros).visao("listar", _ordenado("data"))
+
 
+def _somar_horas_por_mes(df: pd.DataFrame) -> pd.DataFrame:
+    if df.empty or "mes_ano" not in df.columns or "horas" not in df.columns:
+        return pd.DataFrame(columns=["mes_ano", "total"])
+    horas = pd.to_numeric(df["horas"], errors="coerce").fillna(0.0)
+    totais = horas.groupby(df["mes_ano"].fillna("").astype(str).str.slice(0, 7)).sum()
+    totais = totais[(totais.index != "") & (totais != 0)]
+    return (
+        totais.rename("total").rename_axis("mes_ano").reset_index()
+        .sort_values("mes_ano", ascending=False).reset_index(drop=True)
+    )
 
-@st.cache_data(ttl=_TTL_LISTAS, show_spinner=False)
+
+@cronometrado(tipo="dados")
 def campo_horas_historico() -> pd.DataFrame:
-    docs = _col("lila_campo_horas").stream()
-    df = _docs_to_df(list(docs))
-    if df.empty:
-        return df
-    return df.groupby("mes_ano")["horas"].sum().reset_index().rename(
-        columns={"horas": "total"}
-    ).sort_values("mes_ano", ascending=False)
+    """
+    [v26] Total de horas por mês, sem trazer os lançamentos inteiros: UMA
+    consulta projetada (`mes_ano` + `horas`) sobre a coleção, somada por mês
+    em pandas e guardada como visão da tabela — só é refeita quando a
+    tabela muda (gravação deste processo ou releitura do TTL). Meses sem
+    nenhuma hora lançada ficam de fora, como antes.
+    """
+    return _tabela("lila_campo_horas", campos=("mes_ano", "horas")).visao(
+        "historico", _somar_horas_por_mes,
+    )
 
 
 def campo_horas_inserir(dados: dict) -> str:
+    dados = _carimbado(dados)
     _, ref = _col("lila_campo_horas").add(dados)
-    campo_horas_listar.clear()
-    campo_horas_historico.clear()
+    _propagar_insercao("lila_campo_horas", ref.id, dados)
     return ref.id
 
 
 def campo_horas_deletar(rowid: str) -> None:
     _col("lila_campo_horas").document(rowid).delete()
-    campo_horas_listar.clear()
-    campo_horas_historico.clear()
+    _propagar_remocao("lila_campo_horas", rowid)
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # PESO REGISTRO
 # ──────────────────────────────────────────────────────────────────────────────
 
-@st.cache_data(ttl=_TTL_LISTAS, show_spinner=False)
+@cronometrado(tipo="dados")
 def peso_listar() -> pd.DataFrame:
-    docs = _col("lila_peso_registro").stream()
-    df = _docs_to_df(list(docs))
-    if not df.empty and "mes_ano" in df.columns:
-        df = df.sort_values("mes_ano", ascending=True)
-    return df
+    return _tabela("lila_peso_registro").visao("listar", _ordenado("mes_ano"))
 
 
 def peso_upsert(mes_ano: str, data_str: str, peso_kg: float) -> None:
-    """Insere ou atualiza o registro do mês."""
-    docs = list(_col("lila_peso_registro").where("mes_ano", "==", mes_ano).stream())
-    if docs:
-        docs[0].reference.update({"data": data_str, "peso_kg": peso_kg})
-    else:
-        _col("lila_peso_registro").add({
-            "mes_ano": mes_ano,
-            "data": data_str,
-            "peso_kg": peso_kg,
-        })
-    peso_listar.clear()
+    """Insere ou atualiza o registro do mês ([v33] id do documento = `mes_ano`)."""
+    dados = _carimbado({"mes_ano": mes_ano, "data": data_str, "peso_kg": peso_kg})
+    _col("lila_peso_registro").document(mes_ano).set(dados, merge=True)
+    _propagar_mescla("lila_peso_registro", mes_ano, dados)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# MIGRAÇÃO PARA IDS NATURAIS  [novo — v33]
+# ──────────────────────────────────────────────────────────────────────────────
+# Coleção → campo cujo valor passa a ser o id do documento.
+_IDS_NATURAIS = {
+    "lila_fechamentos_mensais": "mes",
+    "lila_peso_registro":       "mes_ano",
+}
+_MARCADOR_MIGRACAO_IDS = "_migracao_ids_naturais"
+
+
+def migrar_ids_naturais() -> int:
+    """
+    Copia cada documento antigo (id aleatório) de `_IDS_NATURAIS` para o id
+    natural (o mês) e apaga o antigo, em lotes. Se houver mais de um
+    documento para o mesmo mês, eles são mesclados na ordem de
+    `_atualizado_em` (o mais recente vence). Documento sem o mês preenchido
+    não tem para onde ir e fica como está (não é apagado). Roda de verdade
+    só uma vez: no fim grava um marcador em `lila_config`, e as próximas
+    chamadas custam uma leitura. Devolve quantos documentos foram migrados.
+
+    A gravação de um mês (o `set(merge=True)` no id natural + a exclusão
+    dos antigos daquele mês) vai sempre INTEIRA num mesmo lote — um lote do
+    Firestore é atômico, então nenhum mês fica copiado pela metade. Não é
+    usada transação: a cópia é idempotente (refazer a mescla dá o mesmo
+    documento) e o marcador só é gravado no fim, então uma migração
+    interrompida é simplesmente refeita na próxima chamada.
+    """
+    marcador = _col("lila_config").document(_MARCADOR_MIGRACAO_IDS)
+    _contar_leituras("lila_config", 1)
+    if marcador.get().exists:
+        return 0
+    migrados = 0
+    for nome, campo in _IDS_NATURAIS.items():
+        todos = list(_col(nome).stream())
+        _contar_leituras(nome, max(1, len(todos)))
+        antigos = [
+            d for d in todos
+            if (d.to_dict() or {}).get(campo) and d.id != (d.to_dict() or {}).get(campo)
+        ]
+        antigos.sort(key=lambda d: str((d.to_dict() or {}).get("_atualizado_em") or ""))
+        novos: dict[str, dict] = {}
+        antigos_do_mes: dict[str, list] = {}
+        for d in antigos:
+            dados = d.to_dict() or {}
+            novos.setdefault(dados[campo], {}).update(dados)
+            antigos_do_mes.setdefault(dados[campo], []).append(d.id)
+        novos = {doc_id: _carimbado(dados) for doc_id, dados in novos.items()}
+
+        # Um grupo por mês: set no id natural + delete dos antigos, juntos.
+        lotes, atual = [], []
+        for doc_id, dados in novos.items():
+            grupo = [("set", doc_id, dados)] + [("delete", a, None) for a in antigos_do_mes[doc_id]]
+            if atual and len(atual) + len(grupo) > _LIMITE_LOTE:
+                lotes.append(atual)
+                atual = []
+            atual += grupo
+        if atual:
+            lotes.append(atual)
+        for operacoes in lotes:
+            lote = get_db().batch()
+            for tipo, doc_id, dados in operacoes:
+                ref = _col(nome).document(doc_id)
+                if tipo == "set":
+                    lote.set(ref, dados, merge=True)
+                else:
+                    lote.delete(ref)
+            lote.commit()
+        for d in antigos:
+            _propagar_remocao(nome, d.id)
+        for doc_id, dados in novos.items():
+            _propagar_mescla(nome, doc_id, dados)
+        migrados += len(antigos)
+    marcador.set({"valor": _now_iso()})
+    _contar_escritas("lila_config")
+    return migrados
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# MIGRAÇÃO: FLAGS FILTRADAS NO SERVIDOR  [v32]
+# ──────────────────────────────────────────────────────────────────────────────
+# Coleção → flags usadas em `.where(...)` no servidor. Um documento antigo sem
+# a flag (ou com ela em texto/nulo) não casa com `pago == 0` no Firestore,
+# embora `_tipar` sempre o tenha mostrado com o padrão de `_ESQUEMAS`.
+_FLAGS_FILTRADAS = {
+    "lila_gastos": ("pago",),
+}
+_MARCADOR_MIGRACAO_FLAGS = "_migracao_flags_filtradas"
+
+
+def _flag_normalizada(valor, padrao: int) -> int:
+    """Mesma conversão de `_tipar` para um valor só (inválido/ausente → `padrao`)."""
+    if isinstance(valor, bool):
+        return int(valor)
+    try:
+        return int(round(float(valor)))
+    except (TypeError, ValueError):
+        return padrao
+
+
+def migrar_flags_filtradas() -> int:
+    """
+    Grava em cada documento de `_FLAGS_FILTRADAS` as flags ausentes ou fora
+    do tipo (texto, nulo, float) como inteiro, com o mesmo padrão de
+    `_ESQUEMAS` que `_tipar` já aplicava na tela — assim as consultas no
+    servidor (`gastos_em_aberto`, `gastos_total_pago`...) enxergam as mesmas
+    despesas que a tela enxergava. Como `migrar_ids_naturais`, roda de
+    verdade só uma vez (marcador em `lila_config`). Devolve quantos
+    documentos foram corrigidos.
+    """
+    marcador = _col("lila_config").document(_MARCADOR_MIGRACAO_FLAGS)
+    _contar_leituras("lila_config", 1)
+    if marcador.get().exists:
+        return 0
+    corrigidos = 0
+    for nome, flags in _FLAGS_FILTRADAS.items():
+        padroes = _ESQUEMAS[nome]["inteiros"]
+        corrigidos += _corrigir_colecao(nome, lambda dados: {
+            flag: _flag_normalizada(dados.get(flag), padroes[flag])
+            for flag in flags if type(dados.get(flag)) is not int
+        } or None)
+    marcador.set({"valor": _now_iso()})
+    _contar_escritas("lila_config")
+    return corrigidos
+
+
+def _corrigir_colecao(nome: str, correcao: Callable[[dict], Optional[dict]]) -> int:
+    """
+    Lê a coleção `nome` inteira e grava, em lotes de `_LIMITE_LOTE`, a
+    `correcao(dados)` de cada documento (mescla + `_atualizado_em`; None =
+    nada a corrigir, dict vazio = só o carimbo). Devolve quantos documentos
+    foram gravados.
+    """
+    todos = list(_col(nome).stream())
+    _contar_leituras(nome, max(1, len(todos)))
+    itens = []
+    for d in todos:
+        campos = correcao(d.to_dict() or {})
+        if campos is not None:
+            itens.append((d.id, _carimbado(campos)))
+    for i in range(0, len(itens), _LIMITE_LOTE):
+        lote = get_db().batch()
+        for rowid, dados in itens[i:i + _LIMITE_LOTE]:
+            lote.set(_col(nome).document(rowid), dados, merge=True)
+        lote.commit()
+    for rowid, dados in itens:
+        _propagar_mescla(nome, rowid, dados)
+    return len(itens)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# MIGRAÇÃO: CARIMBO NOS DOCUMENTOS ANTIGOS  [v30]
+# ──────────────────────────────────────────────────────────────────────────────
+# Coleções sincronizadas pelo espelho em disco (tudo menos `lila_config`, que
+# é lida por `get_all`). Documento gravado antes do v30 não tem
+# `_atualizado_em` e nunca casa com `_atualizado_em >= marca`: sem o carimbo,
+# só a releitura completa o enxergaria.
+_COLECOES_CARIMBADAS = (
+    "lila_clientes", "lila_encomendas", "lila_cronograma", "lila_gastos",
+    "lila_recebimentos", "lila_prospects", "lila_campo_horas",
+    "lila_fechamentos_mensais", "lila_peso_registro",
+)
+_MARCADOR_MIGRACAO_CARIMBOS = "_migracao_carimbos"
+
+
+def migrar_carimbos() -> int:
+    """
+    Carimba `_atualizado_em` (agora) nos documentos de
+    `_COLECOES_CARIMBADAS` que ainda não têm o campo. Roda de verdade só
+    uma vez (marcador em `lila_config`); devolve quantos foram carimbados.
+    """
+    marcador = _col("lila_config").document(_MARCADOR_MIGRACAO_CARIMBOS)
+    _contar_leituras("lila_config", 1)
+    if marcador.get().exists:
+        return 0
+    carimbados = sum(
+        _corrigir_colecao(nome, lambda dados: None if dados.get("_atualizado_em") else {})
+        for nome in _COLECOES_CARIMBADAS
+    )
+    marcador.set({"valor": _now_iso()})
+    _contar_escritas("lila_config")
+    return carimbados
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -647,13 +2930,23 @@ def _garantir_config_inicial_uma_vez() -> bool:
     novo se o app reiniciar (deploy novo, sleep/wake do Streamlit Cloud etc).
     """
     init_config_defaults()
+    migrar_ids_naturais()
+    migrar_flags_filtradas()
+    migrar_carimbos()
     return True
 
 
+@cronometrado(tipo="init")
 def init_db() -> None:
     """
     Chamada a cada execução do script (é assim que o Streamlit funciona),
     mas o trabalho pesado (`init_config_defaults`) só roda de fato uma vez
     graças ao cache acima — evita gastar cota do Firestore em todo clique.
+    [v37] Sem cota, segue com os padrões de `_CONFIG_DEFAULTS` (o cache não
+    guarda o erro, então tenta de novo na próxima execução).
     """
-    _garantir_config_inicial_uma_vez()
+    _fila_gravacoes()  # [v38] sobe a thread da fila (grava o que sobrou no diário)
+    try:
+        _garantir_config_inicial_uma_vez()
+    except ResourceExhausted:
+        _cota_recusada()
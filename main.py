@@ -174,6 +174,14 @@ Histórico de versões (changelog):
         `.kcard-title` (cards "Total reservado" / "Fundos realmente
         disponíveis": de 1rem para 0.92rem). Nenhuma lógica foi alterada,
         só o CSS.
+
+  [v21] CAPACIDADE EM HORAS NA AGENDA: o Calendário da Agenda pinta cada
+        dia conforme as horas de trabalho pendentes (soma das `horas` das
+        tarefas do cronograma) em relação à capacidade diária, configurável
+        em Configurações → "⏱️ Capacidade de Trabalho por Dia" (chave
+        `capacidade_horas_dia`). As contas vêm de
+        `regras_agenda.indice_capacidade`, o mesmo índice que a validação da
+        Data da Confecção usa para avisar quando o dia passaria do limite.
 """
 
 import streamlit as st
@@ -185,7 +193,7 @@ import base64
 
 # ── Helpers compartilhados (fuso de Brasília, formatação, constantes) ────────
 from modulos.utils import (
-    MESES_PT,
+    MESES_PT, FUSO_BR,
     agora_br, hoje_brasilia,
     formatar_data_br, formatar_data_hora_br, brl,
 )
@@ -200,20 +208,27 @@ from modulos.mod_encomendas import (
     _fmt_medida_para_texto,
 )
 from modulos.regras_agenda import (
-    pedidos_com_entrega_proxima, LIMITE_PROVAS_PARA_CONFECCAO, ETAPA_CONCLUIDO,
+    pedidos_com_entrega_proxima, indice_capacidade,
+    LIMITE_PROVAS_PARA_CONFECCAO, ETAPA_CONCLUIDO, HORAS_CONFECCAO,
+)
+from modulos.cronometro import (
+    cronometrado, trecho, iniciar_execucao, finalizar_execucao, ultima_execucao,
 )
 
 # ── Banco de dados Firestore ──────────────────────────────────────────────────
 from database import (
-    init_db, cfg_get, cfg_set,
+    init_db, cfg_get, cfg_set, cfg_set_varios, cfg_todos, cfg_carregar, precarregar,
+    definir_tela, uso_firestore, dados_desatualizados_desde,
     clientes_listar, clientes_inserir, clientes_atualizar, clientes_deletar,
     encomendas_listar, encomendas_inserir, encomendas_atualizar,
     encomendas_buscar, encomendas_cancelar, encomendas_deletar_completo,
+    encomendas_contar_ativas, encomendas_contar_no_mes,
     gastos_listar, gastos_inserir, gastos_atualizar, gastos_deletar, gastos_deletar_pagos,
     cronograma_listar, cronograma_inserir, cronograma_atualizar,
     cronograma_deletar, cronograma_com_cliente,
     campo_horas_listar, campo_horas_historico, campo_horas_inserir, campo_horas_deletar,
     peso_listar, peso_upsert,
+    PERFIL_CLIENTES_SELECAO, PERFIL_ENCOMENDAS_SELECAO,
 )
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -226,6 +241,14 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+# [v40] Cronômetro desta execução (ligado em Configurações → "⏱️ Tempos desta
+# tela"). Começa aqui, antes do portão de acesso, para o total cobrir tudo.
+iniciar_execucao(
+    st.session_state.get("cronometro_ativo", False),
+    st.session_state.get("cronometro_gravar", False),
+    st.session_state.get("pagina", "nova_encomenda"),
+)
+
 # ══════════════════════════════════════════════════════════════════════════════
 # CONTROLE DE ACESSO (chave/token) — ver [v19] no changelog acima. Fica
 # ANTES de qualquer CSS pesado e ANTES de init_db() de propósito: enquanto
@@ -351,7 +374,8 @@ if not st.session_state.token_autenticado:
 # ══════════════════════════════════════════════════════════════════════════════
 # CSS GLOBAL
 # ══════════════════════════════════════════════════════════════════════════════
-st.markdown("""
+with trecho("CSS global"):
+    st.markdown("""
 <style>
 @import url('https://fonts.googleapis.com/css2?family=Playfair+Display:wght@400;600;700&family=Inter:wght@300;400;500;600;700&display=swap');
 
@@ -625,6 +649,8 @@ div[class*="st-key-calcell_hoje_"] {
   background: #fff8e1; border-radius: 5px; padding: 2px 5px;
 }
 .cal-task-cliente { color: #3d1f10; font-weight: 700; font-size: 0.58rem; }
+.cal-horas { float: right; font-size: 0.6rem; color: #8b7355; font-weight: 600; }
+.cal-horas-cheio { color: #b3261e; }
 
 div[class*="st-key-calcell_"] div[data-testid="stButton"] {
   margin-top: 4px;
@@ -752,13 +778,29 @@ PESO_INICIAL_KG  = 70.0
 # ══════════════════════════════════════════════════════════════════════════════
 # INICIALIZAÇÃO DO BANCO
 # ══════════════════════════════════════════════════════════════════════════════
+# [v36] Antes de qualquer leitura: as leituras desta execução ficam
+# atribuídas à tela que está aberta (painel de uso em Configurações).
+definir_tela(st.session_state.get("pagina", "nova_encomenda"))
 init_db()
 
 # ══════════════════════════════════════════════════════════════════════════════
 # DADOS DE BASE (calculados uma vez por execução, usados por vários blocos)
 # ══════════════════════════════════════════════════════════════════════════════
 hoje_dt    = hoje_brasilia()
-df_enc_all = encomendas_listar(cancelado=False)
+# [v34] Encomendas e configuração são lidas juntas (em paralelo) — com o
+# cache frio, a espera é a da leitura mais lenta, não a soma das duas.
+with trecho("dados de base"):
+    df_enc_all, _ = precarregar(lambda: encomendas_listar(cancelado=False), cfg_todos)
+
+# [v37] Modo degradado (cota do Firestore esgotada ou quase): o app segue com
+# a última cópia dos dados — avisa de quando ela é.
+_dados_de = dados_desatualizados_desde()
+if _dados_de is not None:
+    st.warning(
+        f"⚠️ Firestore sem cota no momento — mostrando **dados de "
+        f"{_dados_de.astimezone(FUSO_BR):%H:%M}**. As telas voltam a se atualizar "
+        f"sozinhas quando a cota liberar."
+    )
 
 
 
@@ -768,6 +810,7 @@ df_enc_all = encomendas_listar(cancelado=False)
 # ══════════════════════════════════════════════════════════════════════════════
 # ██████████████████████████████  BLOCO: MEDIDAS  ██████████████████████████████
 # ══════════════════════════════════════════════════════════════════════════════
+@cronometrado()
 def renderizar_medidas():
     st.markdown("## 📏 Medidas")
     
@@ -839,6 +882,7 @@ def renderizar_medidas():
 # ══════════════════════════════════════════════════════════════════════════════
 # ████████████████████████████  BLOCO: AGENDA  ███████████████████████████████
 # ══════════════════════════════════════════════════════════════════════════════
+@cronometrado()
 def _secao_alerta_entregas_urgentes():
     """
     Alerta VISUALMENTE DIFERENTE do aviso normal de "atrasado": mostra os
@@ -887,6 +931,7 @@ def _secao_alerta_entregas_urgentes():
     st.divider()
 
 
+@cronometrado()
 def _secao_tarefas_e_entregas_hoje():
     st.markdown("### ⚡ Tarefas para Hoje")
 
@@ -942,8 +987,10 @@ def _secao_tarefas_e_entregas_hoje():
                             etapa_atual_feito = int(enc_data.get("etapa", 1))
                             prox = min(etapa_atual_feito + 1, ETAPA_CONCLUIDO - 1)
                             if prox > etapa_atual_feito:
-                                encomendas_atualizar(str(enc_id), {"etapa": prox})
-                    cronograma_atualizar(str(row["rowid"]), {"concluida": 1})
+                                encomendas_atualizar(str(enc_id), {"etapa": prox}, em_segundo_plano=True)
+                    # [v38] As duas gravações vão pela fila em segundo plano:
+                    # a tela já reflete na hora, o Firestore recebe logo depois.
+                    cronograma_atualizar(str(row["rowid"]), {"concluida": 1}, em_segundo_plano=True)
                     st.rerun()
             with col_btn2:
                 st.write("")
@@ -965,7 +1012,7 @@ def _secao_tarefas_e_entregas_hoje():
         # ficar defasado se a régua mudar de novo no futuro.
         df_ent_hoje = df_enc_all[
             (df_enc_all.get("data_entrega", pd.Series(dtype=str)) == hoje_dt.isoformat()) &
-            (df_enc_all["etapa"].astype(int) >= ETAPA_CONCLUIDO - 1)
+            (df_enc_all["etapa"] >= ETAPA_CONCLUIDO - 1)
         ]
         if df_ent_hoje.empty:
             st.info("Nenhuma entrega programada para hoje.")
@@ -976,6 +1023,7 @@ def _secao_tarefas_e_entregas_hoje():
         st.info("Nenhuma entrega programada para hoje.")
 
 
+@cronometrado()
 def _secao_vida_pessoal():
     st.markdown('<div class="sep-pessoal"></div>', unsafe_allow_html=True)
     mostrar_vida_pessoal = st.toggle("🏠 Mostrar Vida Pessoal", value=False, key="tog_vida_pessoal_hoje")
@@ -1165,6 +1213,7 @@ def _secao_vida_pessoal():
                 )
 
 
+@cronometrado()
 def renderizar_agenda():
     st.markdown("## 📅 Agenda")
     sub_cal, sub_trabalho = st.tabs(["📅 Calendário", "🛠️ Trabalho"])
@@ -1232,6 +1281,30 @@ def renderizar_agenda():
 
         df_all_cal = cronograma_com_cliente(tipo_agenda="Trabalho", concluida=False)
 
+        # [v21] Mapa de calor da carga de trabalho: horas pendentes do dia ÷
+        # capacidade diária. As faixas viram a cor de fundo de cada card.
+        capacidade_cal = indice_capacidade(df_all_cal, cfg_carregar().capacidade_horas_dia)
+        horas_cal = capacidade_cal.mes(ref.year, ref.month)
+        st.caption(
+            f"⏱️ Carga de trabalho por dia (capacidade: **{capacidade_cal.horas_dia:g}h**) — "
+            f"quanto mais escuro o dia, mais cheio; 🔥 = passou da capacidade."
+        )
+        estilos_cal = []
+        for dt_cal, info_h in horas_cal.items():
+            if info_h["horas"] <= 0:
+                continue
+            for limite_faixa, cor_faixa in ((0.5, "#fdf8ef"), (0.8, "#f9ecd2"), (1.0, "#f3dcae"), (float("inf"), "#f6d2cb")):
+                if info_h["utilizacao"] <= limite_faixa:
+                    break
+            chave_cel = "calcell_hoje_" if dt_cal == hoje_brasilia() else "calcell_"
+            estilos_cal.append(
+                f"div.st-key-{chave_cel}{dt_cal.isoformat()} {{ background: {cor_faixa}; }}"
+                + (f"div.st-key-{chave_cel}{dt_cal.isoformat()} {{ border-left-color: #b3261e; }}"
+                   if info_h["sobrecarga"] else "")
+            )
+        if estilos_cal:
+            st.markdown(f"<style>{''.join(estilos_cal)}</style>", unsafe_allow_html=True)
+
         col_heads = st.columns(7)
         for i, d in enumerate(["Seg","Ter","Qua","Qui","Sex","Sáb","Dom"]):
             col_heads[i].markdown(
@@ -1271,11 +1344,21 @@ def renderizar_agenda():
                     and tasks["encomenda_id"].astype(str).str.strip().ne("").any()
                 )
 
+                info_h = horas_cal[dt_obj_cal]
+                horas_html = ""
+                if info_h["horas"] > 0:
+                    cls_h = "cal-horas cal-horas-cheio" if info_h["sobrecarga"] else "cal-horas"
+                    fogo = "🔥 " if info_h["sobrecarga"] else ""
+                    horas_html = (
+                        f"<span class='{cls_h}' title='{info_h['utilizacao']:.0%} da capacidade'>"
+                        f"{fogo}{info_h['horas']:g}/{capacidade_cal.horas_dia:g}h</span>"
+                    )
+
                 with cols_s[i]:
                     with st.container(key=cell_key):
                         st.markdown(
                             f"<div class='cal-day-inner'>"
-                            f"<span class='cal-day-num'>{dia}</span>"
+                            f"<span class='cal-day-num'>{dia}</span>{horas_html}"
                             f"{tarefas_html}</div>",
                             unsafe_allow_html=True,
                         )
@@ -1290,6 +1373,141 @@ def renderizar_agenda():
 # ══════════════════════════════════════════════════════════════════════════════
 # ████████████████████████████  BLOCO: CONFIGURAÇÕES  ██████████████████████████
 # ══════════════════════════════════════════════════════════════════════════════
+def _fmt_milhar(n: int) -> str:
+    return f"{int(n):,}".replace(",", ".")
+
+
+@cronometrado()
+def _secao_uso_firestore():
+    """
+    [v36] Painel de uso da cota do Firestore: leituras/escritas do dia, a
+    projeção para o dia inteiro no ritmo atual e quem está gastando (tela,
+    função do database.py, coleção). Os números vêm dos contadores do
+    `database.py` — contam só o que ESTE servidor pediu ao Firestore. As
+    falhas recentes (gravações da fila descartadas, releituras com erro)
+    aparecem logo acima das abas.
+    """
+    st.markdown("---")
+    st.markdown("#### 📊 Uso da Cota do Firestore")
+    uso = uso_firestore()
+    st.caption(
+        f"Dia da cota {formatar_data_br(uso['dia'])} — a cota gratuita zera à meia-noite "
+        f"do horário do Pacífico (de manhã cedo em Brasília)."
+    )
+    col_u1, col_u2, col_u3 = st.columns(3)
+    col_u1.markdown(f"""
+    <div class="kpi-card kpi-brown">
+        <div class="kpi-label">📖 Leituras hoje</div>
+        <div class="kpi-value">{_fmt_milhar(uso["leituras"])}</div>
+        <div class="kpi-sub">de {_fmt_milhar(uso["limite_leituras"])} por dia</div>
+    </div>""", unsafe_allow_html=True)
+    col_u2.markdown(f"""
+    <div class="kpi-card kpi-gold">
+        <div class="kpi-label">📈 Projeção do dia</div>
+        <div class="kpi-value">{_fmt_milhar(uso["projecao_leituras"])}</div>
+        <div class="kpi-sub">leituras, no ritmo de hoje</div>
+    </div>""", unsafe_allow_html=True)
+    col_u3.markdown(f"""
+    <div class="kpi-card kpi-cream">
+        <div class="kpi-label">✏️ Escritas hoje</div>
+        <div class="kpi-value">{_fmt_milhar(uso["escritas"])}</div>
+        <div class="kpi-sub">de {_fmt_milhar(uso["limite_escritas"])} por dia</div>
+    </div>""", unsafe_allow_html=True)
+
+    pct_proj = uso["projecao_leituras"] / uso["limite_leituras"] if uso["limite_leituras"] else 0
+    st.progress(min(pct_proj, 1.0), text=f"Projeção: {pct_proj*100:.0f}% da cota diária de leituras")
+    if pct_proj >= 1:
+        st.error("🚨 No ritmo atual a cota de leituras estoura hoje — veja abaixo qual tela está gastando mais.")
+    elif pct_proj >= 0.8:
+        st.warning("⚠️ A projeção passa de 80% da cota de leituras de hoje.")
+    st.caption(
+        f"Esta sessão: {_fmt_milhar(uso['sessao']['leituras'])} leituras · "
+        f"{_fmt_milhar(uso['sessao']['escritas'])} escritas"
+    )
+
+    if not uso["falhas"].empty:
+        st.error(
+            f"🚨 {len(uso['falhas'])} falha(s) recente(s) com o Firestore. Uma \"gravação descartada\" "
+            f"NÃO chegou ao banco (a tela já voltou a mostrar o que está lá) — refaça a alteração."
+        )
+        st.dataframe(uso["falhas"], use_container_width=True, hide_index=True)
+
+    aba_tela, aba_funcao, aba_colecao, aba_dias = st.tabs(
+        ["🖥️ Por tela", "⚙️ Por função", "🗂️ Por coleção", "📅 Últimos dias"]
+    )
+    with aba_tela:
+        st.dataframe(uso["por_tela"], use_container_width=True, hide_index=True)
+    with aba_funcao:
+        st.dataframe(uso["por_funcao"], use_container_width=True, hide_index=True)
+    with aba_colecao:
+        st.dataframe(uso["por_colecao"], use_container_width=True, hide_index=True)
+    with aba_dias:
+        if uso["historico"].empty:
+            st.caption("Sem histórico ainda.")
+        else:
+            st.bar_chart(uso["historico"].set_index("dia")[["leituras", "escritas"]])
+
+
+@cronometrado()
+def _secao_cronometro():
+    """
+    [v40] Liga/desliga o cronômetro desta sessão e mostra a execução
+    ANTERIOR (a atual ainda está rodando) como uma cascata: cada trecho é
+    uma barra posicionada no instante em que começou, com o tamanho do que
+    durou — os trechos de dados dizem se vieram do cache ou do Firestore.
+    """
+    st.markdown("---")
+    st.markdown("#### ⏱️ Tempos desta tela")
+    col_c1, col_c2 = st.columns(2)
+    ativo = col_c1.toggle("Medir o tempo de cada execução",
+                          value=st.session_state.get("cronometro_ativo", False))
+    gravar = col_c2.toggle("Gravar também em arquivo (JSONL)",
+                           value=st.session_state.get("cronometro_gravar", False), disabled=not ativo)
+    st.session_state["cronometro_ativo"] = ativo
+    st.session_state["cronometro_gravar"] = gravar and ativo
+    if not ativo:
+        st.caption("Desligado. Ligado, cada clique do app é medido: portão, CSS, banco, "
+                   "cabeçalho e a tela, trecho a trecho.")
+        return
+    execucao = ultima_execucao()
+    if not execucao or not execucao["trechos"]:
+        st.caption("Ligado — navegue para outra tela (ou volte a esta) para medir uma execução.")
+        return
+
+    total = max(execucao["total_ms"], 1.0)
+    situacao = "" if execucao["completa"] else " · interrompida (st.rerun/st.stop)"
+    st.caption(
+        f"Execução anterior — tela **{execucao['tela']}**, "
+        f"{execucao['total_ms']:.0f} ms no total{situacao}"
+    )
+    cores = {"init": "#6b3a22", "dados": "#c9a227", "tela": "#3d1f10", "bloco": "#a98c3d"}
+    linhas_html = []
+    for t in execucao["trechos"]:
+        esquerda = t["inicio_ms"] / total * 100
+        largura = max(t["duracao_ms"] / total * 100, 0.4)
+        detalhes = [f"{t['duracao_ms']:.0f} ms"]
+        if t["linhas"] is not None:
+            detalhes.append(f"{_fmt_milhar(t['linhas'])} linhas")
+        if t["cache"] is not None:
+            detalhes.append("cache" if t["cache"] else f"{_fmt_milhar(t['leituras'])} leituras")
+        elif t["leituras"]:
+            detalhes.append(f"{_fmt_milhar(t['leituras'])} leituras")
+        linhas_html.append(
+            f'<div style="display:flex;align-items:center;gap:8px;font-size:0.74rem;margin:2px 0;">'
+            f'<div style="width:30%;padding-left:{t["nivel"] * 12}px;white-space:nowrap;'
+            f'overflow:hidden;text-overflow:ellipsis;color:#3d1f10;">{t["nome"]}</div>'
+            f'<div style="flex:1;position:relative;height:12px;background:#f5ede3;border-radius:4px;">'
+            f'<div style="position:absolute;left:{esquerda:.2f}%;width:{largura:.2f}%;height:100%;'
+            f'background:{cores.get(t["tipo"], "#8b7355")};border-radius:4px;"></div></div>'
+            f'<div style="width:24%;color:#8b7355;white-space:nowrap;">{" · ".join(detalhes)}</div>'
+            f'</div>'
+        )
+    st.markdown("".join(linhas_html), unsafe_allow_html=True)
+    with st.expander("Tabela dos trechos"):
+        st.dataframe(pd.DataFrame(execucao["trechos"]), use_container_width=True, hide_index=True)
+
+
+@cronometrado()
 def renderizar_configuracoes():
     st.markdown("## ⚙️ Configurações")
 
@@ -1302,9 +1520,11 @@ def renderizar_configuracoes():
             cfg_tel  = st.text_input("Telefone", value=cfg_get("telefone"))
             cfg_end  = st.text_input("Endereço", value=cfg_get("endereco"))
             if st.form_submit_button("💾 Salvar Dados da Empresa"):
-                cfg_set("cnpj",     cfg_cnpj)
-                cfg_set("telefone", cfg_tel)
-                cfg_set("endereco", cfg_end)
+                cfg_set_varios({
+                    "cnpj":     cfg_cnpj,
+                    "telefone": cfg_tel,
+                    "endereco": cfg_end,
+                })
                 st.success("✅ Dados salvos!")
 
         st.markdown("#### 🚨 Alerta de Entrega Urgente")
@@ -1324,6 +1544,23 @@ def renderizar_configuracoes():
                 st.success("✅ Alerta de entrega atualizado!")
                 st.rerun()
 
+        st.markdown("#### ⏱️ Capacidade de Trabalho por Dia")
+        st.caption(
+            "Quantas horas de trabalho (soma das tarefas da Agenda) cabem em um dia. "
+            "Usada no mapa de calor do Calendário e no aviso da Data da Confecção."
+        )
+        with st.form("form_capacidade_horas"):
+            cfg_cap_horas = st.number_input(
+                "Horas de trabalho por dia",
+                min_value=1.0, max_value=24.0, step=0.5,
+                value=float(cfg_carregar().capacidade_horas_dia),
+                help=f"Uma confecção ocupa {HORAS_CONFECCAO:g}h; prova 1h; entrega 0,5h.",
+            )
+            if st.form_submit_button("💾 Salvar Capacidade"):
+                cfg_set("capacidade_horas_dia", f"{cfg_cap_horas:g}")
+                st.success("✅ Capacidade atualizada!")
+                st.rerun()
+
     with col_cfg2:
         st.markdown("#### 🎯 Metas e Parâmetros Financeiros")
         with st.form("form_metas"):
@@ -1338,11 +1575,13 @@ def renderizar_configuracoes():
             cfg_capital  = st.slider("Capital de Giro (% da Receita)",
                 min_value=5, max_value=50, value=int(cfg_get("capital_giro_pct") or 20))
             if st.form_submit_button("💾 Salvar Parâmetros"):
-                cfg_set("meta_faturamento",        str(cfg_meta_fat))
-                cfg_set("meta_pedidos_mes",        str(cfg_meta_ped))
-                cfg_set("margem_minima_pct",       str(cfg_margem))
-                cfg_set("reserva_emergencia_meses",str(cfg_reserva))
-                cfg_set("capital_giro_pct",        str(cfg_capital))
+                cfg_set_varios({
+                    "meta_faturamento":         str(cfg_meta_fat),
+                    "meta_pedidos_mes":         str(cfg_meta_ped),
+                    "margem_minima_pct":        str(cfg_margem),
+                    "reserva_emergencia_meses": str(cfg_reserva),
+                    "capital_giro_pct":         str(cfg_capital),
+                })
                 st.success("✅ Parâmetros salvos!")
                 st.rerun()
 
@@ -1377,6 +1616,10 @@ def renderizar_configuracoes():
         "O sistema avisa quantas encomendas já existem naquele dia e pergunta "
         "**sim/não** se você quer confirmar mesmo assim — sem precisar de senha."
     )
+    st.info(
+        f"⏱️ **Capacidade em horas:** se a confecção ({HORAS_CONFECCAO:g}h) fizer o dia "
+        f"passar da capacidade diária, o sistema também pergunta **sim/não** antes de salvar."
+    )
     st.info(
         "🔒 **A etapa 'Concluído' só pode ser definida por um humano** — clicando em "
         "\"✅ Marcar Concluído\" dentro do próprio pedido. Marcar tarefas do dia como "
@@ -1389,6 +1632,9 @@ def renderizar_configuracoes():
         "sem precisar aparecer de novo."
     )
 
+    _secao_uso_firestore()
+    _secao_cronometro()
+
     st.markdown("---")
     st.markdown("#### 🗑️ Limpeza (Cuidado!)")
     if st.checkbox("Confirmar exclusão de todos os gastos pagos"):
@@ -1408,7 +1654,7 @@ def renderizar_configuracoes():
     )
     st.markdown("")
 
-    df_todos_pedidos = encomendas_listar()
+    df_todos_pedidos = encomendas_listar(campos=PERFIL_ENCOMENDAS_SELECAO)
 
     if df_todos_pedidos.empty:
         st.info("Nenhum pedido cadastrado.")
@@ -1465,7 +1711,7 @@ def renderizar_configuracoes():
     )
     st.markdown("")
 
-    df_todas_clientes = clientes_listar()
+    df_todas_clientes = clientes_listar(campos=PERFIL_CLIENTES_SELECAO)
 
     if df_todas_clientes.empty:
         st.info("Nenhuma cliente cadastrada.")
@@ -1512,7 +1758,7 @@ def renderizar_configuracoes():
 # seja a seção selecionada. Fica "grudado" no topo (position: sticky) enquanto
 # o conteúdo de cada bloco rola por baixo.
 # ══════════════════════════════════════════════════════════════════════════════
-with st.container(key="topo_fixo"):
+with trecho("cabeçalho + KPIs"), st.container(key="topo_fixo"):
     logo_b64 = get_logo_base64()
     logo_html = (f'<img src="data:image/png;base64,{logo_b64}" class="hero-logo" alt="Lila Logo">'
                  if logo_b64 else '<div class="hero-icon">🧵</div>')
@@ -1531,18 +1777,15 @@ with st.container(key="topo_fixo"):
     # Antes: `etapa < 7`, valor da régua ANTIGA de 7 etapas — na régua
     # atual (máximo 4) essa condição era SEMPRE verdadeira, contando até
     # pedidos já Concluídos como "ativos". Corrigido para `etapa < 4`.
-    enc_ativas = 0
-    if not df_enc_all.empty and "etapa" in df_enc_all.columns:
-        enc_ativas = int((df_enc_all["etapa"].astype(int) < ETAPA_CONCLUIDO).sum())
+    # [v26] As duas contagens saem de database.py: os ativos por agregação
+    # (`count()`); os do mês pela cópia em memória, por `criado_em` com
+    # `_criado_em` de reserva, como sempre foi.
+    enc_ativas = encomendas_contar_ativas(ETAPA_CONCLUIDO)
 
     meta_ped = int(cfg_get("meta_pedidos_mes") or 8)
 
     mes_atual_str = hoje_dt.strftime("%Y-%m")
-    pedidos_mes = 0
-    if not df_enc_all.empty:
-        col_data_ref = "criado_em" if "criado_em" in df_enc_all.columns else "_criado_em"
-        if col_data_ref in df_enc_all.columns:
-            pedidos_mes = int(df_enc_all[col_data_ref].fillna("").astype(str).str.startswith(mes_atual_str).sum())
+    pedidos_mes = encomendas_contar_no_mes(mes_atual_str)
     pct_meta = min(pedidos_mes / meta_ped * 100, 100) if meta_ped > 0 else 0
 
     col_m1, col_m2, col_m3 = st.columns(3)
@@ -1617,3 +1860,4 @@ elif st.session_state.pagina == "configuracoes":
     renderizar_configuracoes()
 
 st.caption("v20.1.0 | Lila Closet Atelier | Firestore · Horário de Brasília · wendleydesenvolvimento")
+finalizar_execucao()
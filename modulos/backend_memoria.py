@@ -0,0 +1,561 @@
+"""
+modulos/backend_memoria.py — Lila Closet Atelier
+─────────────────────────────────────────────────────────────────────────────
+Stand-in EM MEMÓRIA do cliente Firestore, com o mesmo "formato" de API que o
+`database.py` usa do `google.cloud.firestore.Client` — e só isso. Serve para
+testar, medir e fazer carga nas telas (`renderizar_*`) localmente, sem rede,
+sem credencial e sem gastar cota nenhuma do plano Spark.
+
+Subconjunto implementado (o que o `database.py` realmente chama):
+
+  Client.collection / get_all / batch / bulk_writer / close
+  CollectionReference / Query: document, add, where, select, order_by,
+      limit, stream, get, on_snapshot, count, sum
+  DocumentReference: get, set (com merge), update, delete
+  WriteBatch / BulkWriter: set, update, delete, commit / flush / close
+
+Tudo vive num único `ArmazemMemoria` (dict de coleções → dict de docs),
+protegido por um lock, então pode ser compartilhado entre threads (listeners,
+carregamento paralelo, fila de escritas) exatamente como o cliente real.
+Como no cliente real, os callbacks dos listeners (`on_snapshot`) rodam numa
+thread própria, FORA do lock do armazém: a gravação só enfileira a mudança.
+Chamar o callback com o lock travado deixava a gravação esperando pelo lock
+de quem escuta (ex.: `_EspelhoColecao._cond`) — e vice-versa, um deadlock.
+
+O armazém conta também quantos documentos foram LIDOS e ESCRITOS
+(`armazem.leituras` / `armazem.escritas`), seguindo a mesma regra de cobrança
+do Firestore (1 leitura por documento devolvido; 1 leitura por lote de até
+1000 entradas numa agregação) — é isso que o benchmark usa para medir custo
+de cota por tela.
+
+Como usar: `LILA_DB_BACKEND=memoria streamlit run main.py` (ver `get_db` no
+`database.py`). Com `LILA_MEMORIA_ARQUIVO=dados.json` ({coleção: {id:
+dados}}) o armazém já começa com esses documentos.
+"""
+
+from __future__ import annotations
+
+import copy
+import datetime
+import json
+import logging
+import math
+import queue
+import threading
+import uuid
+from typing import Any, Callable, Optional
+
+from google.api_core.exceptions import NotFound
+
+_log = logging.getLogger(__name__)
+
+
+def _agora() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class ArmazemMemoria:
+    """Dados de todas as coleções + contadores de leitura/escrita."""
+
+    def __init__(self):
+        self.colecoes: dict[str, dict[str, dict]] = {}
+        self.lock = threading.RLock()
+        self.leituras = 0
+        self.escritas = 0
+        self._ouvintes: list[_Ouvinte] = []
+        self._entregas: queue.Queue = queue.Queue()
+        self._entregador: Optional[threading.Thread] = None
+
+    def limpar(self) -> None:
+        with self.lock:
+            self.colecoes.clear()
+            self.leituras = 0
+            self.escritas = 0
+            for o in self._ouvintes:
+                o.ativo = False
+            self._ouvintes.clear()
+
+    def carregar(self, colecao: str, docs: dict[str, dict]) -> None:
+        """Semeia uma coleção direto (sem contar escrita) — usado por geradores de dados."""
+        with self.lock:
+            self.colecoes.setdefault(colecao, {}).update(copy.deepcopy(docs))
+
+    def carregar_json(self, caminho: str) -> None:
+        """Semeia todas as coleções de um arquivo JSON {coleção: {id: dados}}."""
+        with open(caminho, encoding="utf-8") as f:
+            for colecao, docs in json.load(f).items():
+                self.carregar(colecao, docs)
+
+    # ── escrita de baixo nível (sempre pelo lock, sempre notificando) ──────
+    def _gravar(self, colecao: str, doc_id: str, dados: Optional[dict]) -> datetime.datetime:
+        with self.lock:
+            col = self.colecoes.setdefault(colecao, {})
+            antes = col.get(doc_id)
+            if dados is None:
+                col.pop(doc_id, None)
+            else:
+                col[doc_id] = dados
+            self.escritas += 1
+            momento = _agora()
+            for o in list(self._ouvintes):
+                o.notificar(colecao, doc_id, antes, dados, momento)
+            return momento
+
+    # ── entrega dos snapshots aos listeners ───────────────────────────────
+    def _agendar(self, ouvinte: "_Ouvinte", docs: list, changes: list, momento) -> None:
+        """Enfileira um snapshot para `ouvinte` (na ordem das gravações). Chamar com `lock` travado."""
+        self._entregas.put((ouvinte, docs, changes, momento))
+        if self._entregador is None:
+            self._entregador = threading.Thread(target=self._entregar, name="memoria-listeners", daemon=True)
+            self._entregador.start()
+
+    def _entregar(self) -> None:
+        while True:
+            ouvinte, docs, changes, momento = self._entregas.get()
+            try:
+                if ouvinte.ativo:
+                    ouvinte._callback(docs, changes, momento)
+            except Exception:
+                _log.exception("Callback de listener em %s falhou", ouvinte._query._colecao)
+            finally:
+                self._entregas.task_done()
+
+    def aguardar_entregas(self) -> None:
+        """Espera os listeners receberem tudo o que já foi gravado (testes/benchmark)."""
+        self._entregas.join()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# SNAPSHOTS
+# ──────────────────────────────────────────────────────────────────────────────
+
+class DocumentSnapshot:
+    def __init__(self, reference: "DocumentReference", dados: Optional[dict],
+                 campos: Optional[list] = None):
+        self.reference = reference
+        self.id = reference.id
+        self._dados = dados
+        self._campos = campos
+        self.update_time = _agora()
+        self.read_time = self.update_time
+
+    @property
+    def exists(self) -> bool:
+        return self._dados is not None
+
+    def to_dict(self) -> Optional[dict]:
+        if self._dados is None:
+            return None
+        if self._campos is not None:
+            return {k: copy.deepcopy(v) for k, v in self._dados.items() if k in self._campos}
+        return copy.deepcopy(self._dados)
+
+    def get(self, campo: str):
+        return (self._dados or {}).get(campo)
+
+
+class WriteResult:
+    def __init__(self, update_time):
+        self.update_time = update_time
+
+
+class _AggResult:
+    def __init__(self, alias, value):
+        self.alias = alias
+        self.value = value
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# FILTROS
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _comparar(valor, op: str, alvo) -> bool:
+    try:
+        if op == "==":
+            return valor == alvo
+        if op == "!=":
+            return valor is not None and valor != alvo
+        if op == "in":
+            return valor in alvo
+        if op == "not-in":
+            return valor is not None and valor not in alvo
+        if op == "array_contains":
+            return isinstance(valor, list) and alvo in valor
+        if valor is None or isinstance(valor, bool) != isinstance(alvo, bool):
+            return False
+        if isinstance(valor, (int, float)) != isinstance(alvo, (int, float)):
+            return False
+        if op == "<":
+            return valor < alvo
+        if op == "<=":
+            return valor <= alvo
+        if op == ">":
+            return valor > alvo
+        if op == ">=":
+            return valor >= alvo
+    except TypeError:
+        return False
+    raise ValueError(f"Operador não suportado pelo backend em memória: {op}")
+
+
+def _chave_ordem(valor) -> tuple:
+    """
+    Chave do `order_by` na ordem de tipos do Firestore — nulo < booleano <
+    número (NaN antes de todos) < data/hora < texto < bytes < referência <
+    array < mapa —, então valores de tipos diferentes no mesmo campo não
+    quebram a ordenação com `TypeError`.
+    """
+    if valor is None:
+        return (0,)
+    if isinstance(valor, bool):
+        return (1, valor)
+    if isinstance(valor, (int, float)):
+        return (2, -math.inf, 0) if math.isnan(valor) else (2, valor, 1)
+    if isinstance(valor, datetime.datetime):
+        return (3, valor.timestamp())
+    if isinstance(valor, str):
+        return (4, valor)
+    if isinstance(valor, bytes):
+        return (5, valor)
+    if isinstance(valor, DocumentReference):
+        return (6, valor.path)
+    if isinstance(valor, (list, tuple)):
+        return (8, tuple(_chave_ordem(v) for v in valor))
+    if isinstance(valor, dict):
+        return (9, tuple((k, _chave_ordem(v)) for k, v in sorted(valor.items())))
+    return (10, str(valor))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# CONSULTAS
+# ──────────────────────────────────────────────────────────────────────────────
+
+class Query:
+    def __init__(self, client: "Client", colecao: str, filtros=(), campos=None,
+                 ordem=(), limite=None):
+        self._client = client
+        self._colecao = colecao
+        self._filtros = tuple(filtros)
+        self._campos = campos
+        self._ordem = tuple(ordem)
+        self._limite = limite
+
+    def _nova(self, **kw) -> "Query":
+        base = dict(filtros=self._filtros, campos=self._campos, ordem=self._ordem, limite=self._limite)
+        base.update(kw)
+        return Query(self._client, self._colecao, **base)
+
+    def where(self, campo=None, op=None, valor=None, *, filter=None) -> "Query":
+        if filter is not None:
+            campo, op, valor = filter.field_path, filter.op_string, filter.value
+        return self._nova(filtros=self._filtros + ((campo, op, valor),))
+
+    def select(self, campos) -> "Query":
+        return self._nova(campos=list(campos))
+
+    def order_by(self, campo: str, direction: str = "ASCENDING") -> "Query":
+        return self._nova(ordem=self._ordem + ((campo, direction),))
+
+    def limit(self, n: int) -> "Query":
+        return self._nova(limite=n)
+
+    def _casa(self, dados: Optional[dict]) -> bool:
+        if dados is None:
+            return False
+        for campo, op, alvo in self._filtros:
+            if campo not in dados:
+                return False
+            if not _comparar(dados[campo], op, alvo):
+                return False
+        for campo, _ in self._ordem:
+            if campo not in dados:
+                return False
+        return True
+
+    def _resultado(self) -> list[tuple[str, dict]]:
+        arm = self._client._armazem
+        with arm.lock:
+            itens = [(i, d) for i, d in arm.colecoes.get(self._colecao, {}).items() if self._casa(d)]
+        for campo, direcao in reversed(self._ordem):
+            itens.sort(key=lambda t: _chave_ordem(t[1].get(campo)),
+                       reverse=str(direcao).upper().startswith("DESC"))
+        if self._limite is not None:
+            itens = itens[: self._limite]
+        return itens
+
+    def stream(self, transaction=None):
+        itens = self._resultado()
+        arm = self._client._armazem
+        with arm.lock:
+            arm.leituras += max(len(itens), 1)
+        col = self._client.collection(self._colecao)
+        for doc_id, dados in itens:
+            yield DocumentSnapshot(col.document(doc_id), dados, self._campos)
+
+    def get(self, transaction=None) -> list:
+        return list(self.stream())
+
+    def on_snapshot(self, callback: Callable) -> "_Ouvinte":
+        return _Ouvinte(self, callback)
+
+    # ── agregações ────────────────────────────────────────────────────────
+    def count(self, alias: Optional[str] = None) -> "_Agregacao":
+        return _Agregacao(self).count(alias)
+
+    def sum(self, campo: str, alias: Optional[str] = None) -> "_Agregacao":
+        return _Agregacao(self).sum(campo, alias)
+
+
+class _Agregacao:
+    def __init__(self, query: Query):
+        self._query = query
+        self._ops: list[tuple[str, Optional[str], str]] = []
+
+    def count(self, alias=None):
+        self._ops.append(("count", None, alias or f"field_{len(self._ops) + 1}"))
+        return self
+
+    def sum(self, campo, alias=None):
+        self._ops.append(("sum", campo, alias or f"field_{len(self._ops) + 1}"))
+        return self
+
+    def get(self, transaction=None):
+        itens = self._query._resultado()
+        arm = self._query._client._armazem
+        with arm.lock:
+            arm.leituras += max(1, -(-len(itens) // 1000))
+        saida = []
+        for tipo, campo, alias in self._ops:
+            if tipo == "count":
+                saida.append(_AggResult(alias, len(itens)))
+            else:
+                total = 0
+                for _, d in itens:
+                    v = d.get(campo)
+                    if isinstance(v, (int, float)) and not isinstance(v, bool):
+                        total += v
+                saida.append(_AggResult(alias, total))
+        return [saida]
+
+
+class _Ouvinte:
+    """
+    Equivalente ao `Watch` do Firestore: chama `callback(docs, changes,
+    read_time)` na thread de entregas do armazém, começando pelo snapshot
+    inicial (a consulta inteira, tudo como ADDED).
+    """
+
+    def __init__(self, query: Query, callback: Callable):
+        self._query = query
+        self._callback = callback
+        self.ativo = True
+        arm = query._client._armazem
+        with arm.lock:
+            iniciais = query._resultado()
+            arm.leituras += len(iniciais)
+            arm._ouvintes.append(self)
+            col = query._client.collection(query._colecao)
+            changes = [_Mudanca("ADDED", DocumentSnapshot(col.document(i), d)) for i, d in iniciais]
+            arm._agendar(self, [c.document for c in changes], changes, _agora())
+
+    @property
+    def is_active(self) -> bool:
+        return self.ativo
+
+    def unsubscribe(self) -> None:
+        self.ativo = False
+        arm = self._query._client._armazem
+        with arm.lock:
+            if self in arm._ouvintes:
+                arm._ouvintes.remove(self)
+
+    def notificar(self, colecao, doc_id, antes, depois, momento) -> None:
+        if not self.ativo or colecao != self._query._colecao:
+            return
+        estava, esta = self._query._casa(antes), self._query._casa(depois)
+        if not estava and not esta:
+            return
+        tipo = "REMOVED" if not esta else ("ADDED" if not estava else "MODIFIED")
+        col = self._query._client.collection(colecao)
+        snap = DocumentSnapshot(col.document(doc_id), depois if esta else antes)
+        arm = self._query._client._armazem
+        if esta:
+            arm.leituras += 1
+        arm._agendar(self, [], [_Mudanca(tipo, snap)], momento)
+
+
+class _TipoMudanca:
+    def __init__(self, nome):
+        self.name = nome
+
+
+class _Mudanca:
+    def __init__(self, tipo: str, document: DocumentSnapshot):
+        self.type = _TipoMudanca(tipo)
+        self.document = document
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# REFERÊNCIAS
+# ──────────────────────────────────────────────────────────────────────────────
+
+class DocumentReference:
+    def __init__(self, client: "Client", colecao: str, doc_id: str):
+        self._client = client
+        self._colecao = colecao
+        self.id = doc_id
+        self.path = f"{colecao}/{doc_id}"
+
+    @property
+    def parent(self) -> "CollectionReference":
+        return CollectionReference(self._client, self._colecao)
+
+    def __eq__(self, outro):
+        return isinstance(outro, DocumentReference) and outro.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    def get(self, field_paths=None, transaction=None) -> DocumentSnapshot:
+        arm = self._client._armazem
+        with arm.lock:
+            dados = arm.colecoes.get(self._colecao, {}).get(self.id)
+            arm.leituras += 1
+            dados = copy.deepcopy(dados)
+        return DocumentSnapshot(self, dados, list(field_paths) if field_paths else None)
+
+    def set(self, dados: dict, merge: bool = False) -> WriteResult:
+        arm = self._client._armazem
+        with arm.lock:
+            atual = arm.colecoes.get(self._colecao, {}).get(self.id)
+            novo = dict(atual or {}) if merge else {}
+            novo.update(copy.deepcopy(dados))
+            return WriteResult(arm._gravar(self._colecao, self.id, novo))
+
+    def create(self, dados: dict) -> WriteResult:
+        arm = self._client._armazem
+        with arm.lock:
+            if self.id in arm.colecoes.get(self._colecao, {}):
+                raise ValueError(f"Documento já existe: {self.path}")
+            return self.set(dados)
+
+    def update(self, dados: dict) -> WriteResult:
+        arm = self._client._armazem
+        with arm.lock:
+            atual = arm.colecoes.get(self._colecao, {}).get(self.id)
+            if atual is None:
+                raise NotFound(f"No document to update: {self.path}")
+            novo = dict(atual)
+            novo.update(copy.deepcopy(dados))
+            return WriteResult(arm._gravar(self._colecao, self.id, novo))
+
+    def delete(self):
+        return self._client._armazem._gravar(self._colecao, self.id, None)
+
+
+class CollectionReference(Query):
+    def __init__(self, client: "Client", nome: str):
+        super().__init__(client, nome)
+        self.id = nome
+
+    def document(self, doc_id: Optional[str] = None) -> DocumentReference:
+        return DocumentReference(self._client, self._colecao, doc_id or uuid.uuid4().hex[:20])
+
+    def add(self, dados: dict, document_id: Optional[str] = None):
+        ref = self.document(document_id)
+        res = ref.set(dados)
+        return res.update_time, ref
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# ESCRITAS EM LOTE
+# ──────────────────────────────────────────────────────────────────────────────
+
+class WriteBatch:
+    def __init__(self, client: "Client"):
+        self._client = client
+        self._ops: list[tuple[str, DocumentReference, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._ops)
+
+    def set(self, ref, dados, merge=False):
+        self._ops.append(("set_merge" if merge else "set", ref, dados))
+
+    def update(self, ref, dados):
+        self._ops.append(("update", ref, dados))
+
+    def delete(self, ref):
+        self._ops.append(("delete", ref, None))
+
+    def commit(self) -> list:
+        """
+        Atômico como o do Firestore: com o armazém travado, valida o lote
+        inteiro (um `update` de documento inexistente — levando em conta as
+        operações anteriores do próprio lote — derruba tudo com `NotFound`)
+        e só então aplica; nenhum leitor enxerga o lote pela metade.
+        """
+        if len(self._ops) > 500:
+            raise ValueError("Um WriteBatch aceita no máximo 500 operações.")
+        arm = self._client._armazem
+        with arm.lock:
+            existe: dict[str, bool] = {}
+            for tipo, ref, _ in self._ops:
+                if tipo == "delete":
+                    existe[ref.path] = False
+                elif tipo != "update":
+                    existe[ref.path] = True
+                elif not existe.get(ref.path, ref.id in arm.colecoes.get(ref._colecao, {})):
+                    raise NotFound(f"No document to update: {ref.path}")
+            resultados = []
+            for tipo, ref, dados in self._ops:
+                if tipo == "delete":
+                    resultados.append(WriteResult(ref.delete()))
+                elif tipo == "update":
+                    resultados.append(ref.update(dados))
+                else:
+                    resultados.append(ref.set(dados, merge=(tipo == "set_merge")))
+        self._ops = []
+        return resultados
+
+
+class BulkWriter(WriteBatch):
+    def flush(self):
+        ops, self._ops = self._ops, []
+        for i in range(0, len(ops), 500):
+            self._ops = ops[i:i + 500]
+            WriteBatch.commit(self)
+
+    def close(self):
+        self.flush()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# CLIENTE
+# ──────────────────────────────────────────────────────────────────────────────
+
+ARMAZEM_PADRAO = ArmazemMemoria()
+
+
+class Client:
+    """Substituto de `google.cloud.firestore.Client`, apontando para um `ArmazemMemoria`."""
+
+    def __init__(self, armazem: Optional[ArmazemMemoria] = None, project: str = "memoria"):
+        self._armazem = armazem or ARMAZEM_PADRAO
+        self.project = project
+
+    def collection(self, nome: str) -> CollectionReference:
+        return CollectionReference(self, nome)
+
+    def get_all(self, refs, field_paths=None, transaction=None):
+        for ref in refs:
+            yield ref.get(field_paths=field_paths)
+
+    def batch(self) -> WriteBatch:
+        return WriteBatch(self)
+
+    def bulk_writer(self, options=None) -> BulkWriter:
+        return BulkWriter(self)
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,221 @@
+"""
+modulos/cronometro.py — Lila Closet Atelier
+─────────────────────────────────────────────────────────────────────────────
+Cronômetro por EXECUÇÃO do script. O Streamlit roda o `main.py` inteiro a
+cada clique (portão de acesso, CSS global, `init_db`, encomendas, KPIs do
+topo e a tela escolhida); este módulo mede onde esse tempo vai.
+
+  @cronometrado()          → decorador para funções (as listagens e o
+                             `init_db` do database.py, cada `renderizar_*`
+                             e cada `_secao_*`)
+  with trecho("CSS"):      → o mesmo para um bloco solto do main.py
+
+Cada trecho anota: início e duração (ms, relativos ao começo da execução),
+nível de aninhamento, linhas processadas (tamanho do DataFrame/lista
+devolvido, ou o que o bloco informar em `info["linhas"]`), leituras feitas
+no Firestore durante o trecho e — para as funções de dados — se veio do
+cache (nenhuma leitura) ou não. As leituras vêm da "sonda" registrada pelo
+database.py (`configurar`): são as da SESSÃO, então um trecho que roda em
+paralelo com outro (`precarregar`) pode ver leituras do vizinho.
+
+Desligado (o normal), cada trecho custa só uma consulta a um dicionário.
+Liga pela caixa "⏱️ Tempos desta tela" em Configurações (por sessão) ou
+para todas as sessões com `LILA_CRONOMETRO=1`. A execução anterior completa
+fica disponível em `ultima_execucao()` (é ela que o painel mostra, já que a
+atual ainda não terminou quando o painel é desenhado); com "gravar" ligado,
+cada execução também vira uma linha JSON no arquivo de `configurar`.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import datetime
+import functools
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+_LIGADO_POR_AMBIENTE = os.environ.get("LILA_CRONOMETRO", "0") != "0"
+_MAX_SESSOES = 50
+
+_lock = threading.Lock()
+_sessoes: dict[str, dict] = {}
+_local = threading.local()
+_sonda_leituras: Optional[Callable[[], int]] = None
+_arquivo_trace: Optional[str] = None
+
+
+def configurar(sonda_leituras: Optional[Callable[[], int]] = None, arquivo_trace: Optional[str] = None) -> None:
+    """Registra de onde vem a contagem de leituras da sessão e onde gravar o trace (JSONL)."""
+    global _sonda_leituras, _arquivo_trace
+    if sonda_leituras is not None:
+        _sonda_leituras = sonda_leituras
+    if arquivo_trace is not None:
+        _arquivo_trace = arquivo_trace
+
+
+def _sessao() -> Optional[str]:
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+def _registro_ativo() -> Optional[dict]:
+    sid = _sessao()
+    if sid is None:
+        return None
+    reg = _sessoes.get(sid)
+    return reg if reg is not None and reg["ativo"] else None
+
+
+def _ler_sonda() -> Optional[int]:
+    if _sonda_leituras is None:
+        return None
+    try:
+        return _sonda_leituras()
+    except Exception:
+        return None
+
+
+def _linhas(resultado: Any) -> Optional[int]:
+    if resultado is None or isinstance(resultado, (str, bytes)):
+        return None
+    try:
+        return len(resultado)
+    except TypeError:
+        return None
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# INÍCIO / FIM DE CADA EXECUÇÃO
+# ──────────────────────────────────────────────────────────────────────────────
+
+def iniciar_execucao(ativo: bool, gravar: bool = False, tela: str = "") -> None:
+    """
+    Chamada no topo do `main.py`. Se a execução anterior não chegou a
+    `finalizar_execucao` (`st.stop()` no portão, `st.rerun()` no meio de uma
+    tela), ela é fechada aqui mesmo, marcada como interrompida.
+    """
+    sid = _sessao()
+    if sid is None:
+        return
+    ativo = ativo or _LIGADO_POR_AMBIENTE
+    with _lock:
+        reg = _sessoes.pop(sid, None)
+        anterior = None
+        if reg is not None:
+            anterior = _fechar(reg, completa=False) if reg["trechos"] else reg["anterior"]
+        if not ativo:
+            return
+        if len(_sessoes) >= _MAX_SESSOES:
+            _sessoes.pop(next(iter(_sessoes)))
+        _sessoes[sid] = {
+            "ativo": True, "gravar": gravar, "tela": tela,
+            "inicio": datetime.datetime.now().isoformat(timespec="milliseconds"),
+            "t0": time.perf_counter(), "trechos": [], "anterior": anterior,
+        }
+
+
+def finalizar_execucao() -> None:
+    """Chamada no fim do `main.py`: guarda a execução como a "última" e grava o trace."""
+    sid = _sessao()
+    with _lock:
+        reg = _sessoes.get(sid) if sid is not None else None
+        if reg is not None:
+            _fechar(reg, completa=True)
+
+
+def _fechar(reg: dict, completa: bool) -> dict:
+    """Chamar com `_lock` travado."""
+    execucao = {
+        "inicio": reg["inicio"],
+        "tela": reg["tela"],
+        "total_ms": round((time.perf_counter() - reg["t0"]) * 1000, 1),
+        "completa": completa,
+        "trechos": sorted(reg["trechos"], key=lambda t: (t["inicio_ms"], t["nivel"])),
+    }
+    reg["anterior"], reg["trechos"] = execucao, []
+    if reg["gravar"] and _arquivo_trace:
+        try:
+            os.makedirs(os.path.dirname(_arquivo_trace) or ".", exist_ok=True)
+            with open(_arquivo_trace, "a", encoding="utf-8") as f:
+                f.write(json.dumps(execucao, ensure_ascii=False) + "\n")
+        except OSError:
+            pass
+    return execucao
+
+
+def ultima_execucao() -> Optional[dict]:
+    """
+    A execução anterior desta sessão: {inicio, tela, total_ms, completa,
+    trechos: [{nome, tipo, inicio_ms, duracao_ms, nivel, thread, linhas,
+    leituras, cache}]} — ou None se o cronômetro estava desligado.
+    """
+    sid = _sessao()
+    reg = _sessoes.get(sid) if sid is not None else None
+    return reg["anterior"] if reg is not None else None
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# TRECHOS
+# ──────────────────────────────────────────────────────────────────────────────
+
+@contextlib.contextmanager
+def trecho(nome: str, tipo: str = "bloco"):
+    """
+    Mede o bloco `with`. Devolve um dict onde o bloco pode pôr
+    `info["linhas"]`. Exceções (inclusive `st.stop`/`st.rerun`) passam direto
+    — o trecho é anotado mesmo assim.
+    """
+    reg = _registro_ativo()
+    if reg is None:
+        yield {}
+        return
+    info: dict = {}
+    pilha = getattr(_local, "pilha", None)
+    if pilha is None:
+        pilha = _local.pilha = []
+    nivel = len(pilha)
+    pilha.append(nome)
+    leituras_antes = _ler_sonda()
+    t = time.perf_counter()
+    try:
+        yield info
+    finally:
+        fim = time.perf_counter()
+        pilha.pop()
+        leituras_depois = _ler_sonda()
+        leituras = (
+            leituras_depois - leituras_antes
+            if leituras_antes is not None and leituras_depois is not None else None
+        )
+        registro = {
+            "nome": nome, "tipo": tipo,
+            "inicio_ms": round((t - reg["t0"]) * 1000, 1),
+            "duracao_ms": round((fim - t) * 1000, 1),
+            "nivel": nivel, "thread": threading.current_thread().name,
+            "linhas": info.get("linhas"), "leituras": leituras,
+            "cache": (leituras == 0) if tipo == "dados" and leituras is not None else None,
+        }
+        with _lock:
+            reg["trechos"].append(registro)
+
+
+def cronometrado(nome: Optional[str] = None, tipo: str = "tela"):
+    """Decorador: cada chamada da função vira um trecho (linhas = tamanho do que ela devolve)."""
+    def decorador(funcao):
+        rotulo = nome or funcao.__name__
+
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            if _registro_ativo() is None:
+                return funcao(*args, **kwargs)
+            with trecho(rotulo, tipo) as info:
+                resultado = funcao(*args, **kwargs)
+                info["linhas"] = _linhas(resultado)
+                return resultado
+        return medida
+    return decorador
@@ -73,6 +73,32 @@ sem depender de variáveis globais do main.py:
         opção de confirmar — só a duplicidade de encomendas no mesmo dia
         (regra 1) virou pergunta sim/não.
 
+[v21] ATALHOS DE DATA LIVRE PARA A CONFECÇÃO: os três formulários (popup de
+        nova encomenda, Nova Encomenda na página e edição do pedido) mostram,
+        junto do mini-calendário, as próximas datas úteis que passam direto
+        na validação (`sugerir_datas_confeccao`, em `regras_agenda.py`). Um
+        clique preenche a Data da Confecção e leva o mini-calendário ao mês
+        — sem precisar salvar, ver o aviso e tentar outra data. O clique
+        escreve direto na chave do campo de data (no callback, antes do
+        rerun), então repetir o mesmo atalho depois de mexer na data à mão
+        também funciona; a data e o mês navegado são esquecidos ao salvar
+        ou cancelar (`_limpar_estado_confeccao`).
+
+[v22] MINI-CALENDÁRIO PELO `status_mes`: o mini-calendário de ocupação
+        (usado pelos três formulários) pede o status do mês inteiro numa
+        chamada só a `regras_agenda.status_mes`, em vez de montar os
+        conjuntos de dias ocupados e de provas lotadas a cada rerun. O
+        status é o mesmo da validação ao salvar; passar o mouse no dia
+        mostra quantas confecções e provas ele tem.
+
+[v23] CAPACIDADE EM HORAS: a validação da Data da Confecção, o
+        mini-calendário e as datas sugeridas passam a considerar também as
+        HORAS de trabalho já agendadas no dia (tarefas pendentes do
+        cronograma) contra a capacidade diária de Configurações
+        (`capacidade_horas_dia`). Se a confecção fizer o dia passar da
+        capacidade, a pergunta sim/não de sempre aparece (🟠 no
+        mini-calendário); não é bloqueio.
+
 ⚠️ ATENÇÃO — ponto que precisa de um ajuste manual em `main.py` (fora deste
    módulo, não alterado aqui a pedido): o botão "✅ Feito" em
    `_secao_tarefas_e_entregas_hoje` (Agenda) tinha uma lógica de avanço de
@@ -112,22 +138,24 @@ from modulos.utils import (
     agora_br, hoje_brasilia, converter_para_data,
     formatar_data_br, formatar_data_hora_br, brl,
 )
+from modulos.cronometro import cronometrado
 
 # ── Regras de agenda (validação pura, sem Firestore/Streamlit) ─────────────
 from modulos.regras_agenda import (
-    validar_data_confeccao,
-    dias_confeccao_ocupados, dias_com_provas_lotadas,
-    LIMITE_PROVAS_PARA_CONFECCAO,
+    validar_data_confeccao, sugerir_datas_confeccao, status_mes,
+    indice_capacidade, CapacidadeHoras,
+    LIMITE_PROVAS_PARA_CONFECCAO, HORAS_CONFECCAO,
 )
 
 # ── Banco de dados Firestore ─────────────────────────────────────────────────
 from database import (
-    cfg_get,
+    cfg_get, cfg_carregar,
     clientes_listar, clientes_inserir, clientes_atualizar,
     encomendas_listar, encomendas_inserir, encomendas_atualizar,
     encomendas_buscar, encomendas_cancelar,
     cronograma_listar, cronograma_inserir, cronograma_atualizar, cronograma_deletar,
     prospects_deletar,
+    PERFIL_CLIENTES_SELECAO, PERFIL_ENCOMENDAS_AGENDA,
 )
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -208,6 +236,18 @@ def _fmt_medida_para_texto(raw) -> str:
 # ══════════════════════════════════════════════════════════════════════════════
 # MINI-CALENDÁRIO DE OCUPAÇÃO — Data da Confecção
 # ══════════════════════════════════════════════════════════════════════════════
+def _capacidade_agenda() -> CapacidadeHoras:
+    """
+    [v23] Horas já agendadas por dia (tarefas de Trabalho pendentes do
+    cronograma) contra a capacidade diária de Configurações. O índice é
+    reaproveitado enquanto o cronograma e a capacidade não mudam.
+    """
+    return indice_capacidade(
+        cronograma_listar(tipo_agenda="Trabalho", concluida=False),
+        cfg_carregar().capacidade_horas_dia,
+    )
+
+
 def _render_ocupacao_confeccao(df_enc: pd.DataFrame, ano: int, mes: int, excluir_id: str | None = None):
     """
     Mostra um mini-calendário do mês/ano informados, com legenda visual:
@@ -216,16 +256,22 @@ def _render_ocupacao_confeccao(df_enc: pd.DataFrame, ano: int, mes: int, excluir
       🟡 dia com mais de LIMITE_PROVAS_PARA_CONFECCAO provas marcadas
          (esse sim continua bloqueado para confecção, sem opção de
          confirmar — SEM limite de provas em si)
+      🟠 [v23] dia sem folga de horas: com a confecção, passaria da
+         capacidade diária (dá pra confirmar mesmo assim)
     Puramente informativo: a validação de verdade acontece ao salvar,
     usando as mesmas funções de `modulos/regras_agenda.py`.
+    [v22] O status de cada dia vem de `status_mes` (uma conta só para o mês,
+    guardada enquanto os pedidos não mudam) — é o mesmo que a validação
+    daria, então um dia com confecção E provas demais aparece como 🟡.
     """
-    ocupados = dias_confeccao_ocupados(df_enc, excluir_id)
-    lotados_prova = dias_com_provas_lotadas(df_enc, excluir_id)
+    capacidade = _capacidade_agenda()
+    status_dias = status_mes(df_enc, ano, mes, excluir_id, capacidade=capacidade)
 
     st.caption(
         f"📌 Ocupação de **{MESES_PT[mes-1]}/{ano}** para a Data da Confecção — "
         f"🔴 já tem encomenda nesse dia (dá pra confirmar mais uma) &nbsp;·&nbsp; "
-        f"🟡 mais de {LIMITE_PROVAS_PARA_CONFECCAO} provas nesse dia (bloqueado p/ confecção)"
+        f"🟡 mais de {LIMITE_PROVAS_PARA_CONFECCAO} provas nesse dia (bloqueado p/ confecção) &nbsp;·&nbsp; "
+        f"🟠 a confecção passaria de {capacidade.horas_dia:g}h de trabalho no dia"
     )
     cols_h = st.columns(7)
     for i, d in enumerate(["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]):
@@ -239,14 +285,18 @@ def _render_ocupacao_confeccao(df_enc: pd.DataFrame, ano: int, mes: int, excluir
             if dia == 0:
                 cols_s[i].markdown("&nbsp;", unsafe_allow_html=True)
                 continue
-            dt_obj = date(ano, mes, dia)
+            info = status_dias[date(ano, mes, dia)]
             marca = ""
-            if dt_obj in ocupados:
-                marca = " 🔴"
-            elif dt_obj in lotados_prova:
+            if info["status"] == "bloqueado":
                 marca = " 🟡"
+            elif info["confeccoes"] > 0:
+                marca = " 🔴"
+            elif info["sem_folga"]:
+                marca = " 🟠"
+            dica = (f"{info['confeccoes']} confecção(ões) · {info['provas']} prova(s) · "
+                    f"{info['horas']:g}h de {capacidade.horas_dia:g}h")
             cols_s[i].markdown(
-                f"<center style='font-size:0.74rem;color:#3d1f10'>{dia}{marca}</center>",
+                f"<center title='{dica}' style='font-size:0.74rem;color:#3d1f10'>{dia}{marca}</center>",
                 unsafe_allow_html=True,
             )
 
@@ -288,6 +338,66 @@ def _render_ocupacao_confeccao_navegavel(
     _render_ocupacao_confeccao(df_enc, ref.year, ref.month, excluir_id=excluir_id)
 
 
+# ══════════════════════════════════════════════════════════════════════════════
+# ATALHOS "PRÓXIMAS DATAS LIVRES" — Data da Confecção  [v21]
+# ══════════════════════════════════════════════════════════════════════════════
+QTD_SUGESTOES_CONFECCAO = 5
+_DIAS_SEMANA_CURTOS = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
+
+
+def _usar_sugestao_confeccao(chave_widget: str, chave_mes: str, data_sugerida: date):
+    """
+    Callback do atalho: escreve a data na chave do próprio `st.date_input`
+    da Confecção (permitido em callback — roda antes do rerun) e leva o
+    mini-calendário ao mês.
+    """
+    st.session_state[chave_widget] = data_sugerida
+    st.session_state[chave_mes] = data_sugerida.replace(day=1)
+
+
+def _limpar_estado_confeccao(key_prefix: str, chave_widget: str) -> None:
+    """Esquece a Data da Confecção e o mês do mini-calendário de um formulário (ao salvar/cancelar)."""
+    for chave in (chave_widget, f"{key_prefix}_mes_ref_conf"):
+        st.session_state.pop(chave, None)
+
+
+def _render_sugestoes_confeccao(
+    df_enc: pd.DataFrame, key_prefix: str, chave_widget: str,
+    a_partir_de: date, excluir_id: str | None = None,
+):
+    """
+    Mostra as próximas datas que passam LIVRES na validação da Confecção
+    (`sugerir_datas_confeccao`, dias úteis) como botões. O clique grava a
+    data em `chave_widget`, a chave do `st.date_input` da Confecção — que
+    por isso é criado sem `value=` (o valor inicial vai para a chave antes).
+    Com a capacidade diária menor que uma confecção, nenhum dia passa livre:
+    no lugar dos botões vai um aviso apontando Configurações.
+    """
+    capacidade = _capacidade_agenda()
+    if capacidade.horas_dia < HORAS_CONFECCAO:
+        st.caption(
+            f"✨ Sem sugestões de data: a capacidade diária "
+            f"({capacidade.horas_dia:g} h, em Configurações) é menor que uma "
+            f"confecção ({HORAS_CONFECCAO:g} h) — qualquer dia pedirá confirmação."
+        )
+        return
+    sugestoes = sugerir_datas_confeccao(
+        df_enc, a_partir_de, QTD_SUGESTOES_CONFECCAO,
+        excluir_id=excluir_id, capacidade=capacidade,
+    )
+    if not sugestoes:
+        return
+    st.caption("✨ Próximas datas livres para a Confecção — clique para usar:")
+    cols = st.columns(len(sugestoes))
+    for col, d in zip(cols, sugestoes):
+        col.button(
+            f"{_DIAS_SEMANA_CURTOS[d.weekday()]} {d.strftime('%d/%m')}",
+            key=f"{key_prefix}_sug_conf_{d.isoformat()}", use_container_width=True,
+            on_click=_usar_sugestao_confeccao,
+            args=(chave_widget, f"{key_prefix}_mes_ref_conf", d),
+        )
+
+
 # ══════════════════════════════════════════════════════════════════════════════
 # CONFIRMAÇÃO SIM/NÃO PARA DUPLICIDADE DE DATA DA CONFECÇÃO  [v20]
 # ══════════════════════════════════════════════════════════════════════════════
@@ -300,14 +410,17 @@ def _checar_confeccao_confirmavel(df_check: pd.DataFrame, data_confeccao: date,
       - status "ok": retorna True imediatamente — o chamador salva com os
         valores atuais dos widgets, sem nenhuma pergunta.
       - status "confirmar": o dia já tem uma ou mais encomendas de
-        confecção marcadas. Grava o aviso + uma FOTO de `dados_para_salvar`
+        confecção marcadas, e/ou [v23] a confecção faria o dia passar da
+        capacidade diária de horas (`_capacidade_agenda`). Grava o aviso + uma FOTO de `dados_para_salvar`
         em session_state e força um st.rerun(), para
         `_render_confirmacao_duplicidade_confeccao` perguntar sim/não.
       - status "bloqueado": limite de provas excedido — bloqueio
         definitivo, sem opção de confirmar. Mesmo assim grava o aviso e
         força o rerun, para a mensagem de erro aparecer.
     """
-    status, msg = validar_data_confeccao(df_check, data_confeccao, excluir_id=excluir_id)
+    status, msg = validar_data_confeccao(
+        df_check, data_confeccao, excluir_id=excluir_id, capacidade=_capacidade_agenda(),
+    )
     pend_key = f"pend_conf_{escopo_key}"
 
     if status == "ok":
@@ -686,7 +799,7 @@ def dialog_nova_encomenda(data_pre: date | None = None, nome_fixo: str | None =
 
     d_base = data_pre or hoje_brasilia()
 
-    df_clis_dlg = clientes_listar()
+    df_clis_dlg = clientes_listar(campos=PERFIL_CLIENTES_SELECAO)
     clis_dlg = df_clis_dlg["nome"].tolist() if not df_clis_dlg.empty else []
 
     st.markdown("##### 👤 Cliente")
@@ -723,11 +836,11 @@ def dialog_nova_encomenda(data_pre: date | None = None, nome_fixo: str | None =
     st.markdown("##### 📅 Datas")
     st.caption("A primeira etapa do pedido é a Data da Confecção — não há mais um campo separado de 'Data Medidas'.")
 
-    d_confeccao_dlg = st.date_input(
-        "🪡 Data da Confecção", value=d_base + timedelta(days=7),
-        key="dlg_confeccao", format="DD/MM/YYYY"
-    )
-    _render_ocupacao_confeccao_navegavel(encomendas_listar(cancelado=False), key_prefix="dlg", data_referencia=d_confeccao_dlg)
+    st.session_state.setdefault("dlg_confeccao", d_base + timedelta(days=7))
+    d_confeccao_dlg = st.date_input("🪡 Data da Confecção", key="dlg_confeccao", format="DD/MM/YYYY")
+    df_ocup_dlg = encomendas_listar(cancelado=False, campos=PERFIL_ENCOMENDAS_AGENDA)
+    _render_sugestoes_confeccao(df_ocup_dlg, "dlg", "dlg_confeccao", d_base)
+    _render_ocupacao_confeccao_navegavel(df_ocup_dlg, key_prefix="dlg", data_referencia=d_confeccao_dlg)
 
     d_prova_dlg = st.date_input(
         "👗 Data da Prova", value=d_base + timedelta(days=25), key="dlg_prova", format="DD/MM/YYYY"
@@ -853,6 +966,7 @@ def dialog_nova_encomenda(data_pre: date | None = None, nome_fixo: str | None =
         if prospect_id:
             prospects_deletar(str(prospect_id))
 
+        _limpar_estado_confeccao("dlg", "dlg_confeccao")
         st.session_state["_dlg_enc_resultado"] = {
             "cliente": nome_final, "peca": f_peca.strip(), "pdf_bytes": pdf_bytes_dlg,
         }
@@ -903,7 +1017,7 @@ def dialog_nova_encomenda(data_pre: date | None = None, nome_fixo: str | None =
         # ── Validação de agenda (duplicidade da Data da Confecção) ──
         # Sem conflito: cria direto. Com duplicidade: pergunta sim/não (o
         # helper já cuida de gravar o estado e forçar o rerun necessário).
-        df_check_dlg = encomendas_listar(cancelado=False)
+        df_check_dlg = encomendas_listar(cancelado=False, campos=PERFIL_ENCOMENDAS_AGENDA)
         if _checar_confeccao_confirmavel(
             df_check_dlg, d_confeccao_dlg, escopo_key="dlg_nova",
             dados_para_salvar=dados_atuais_dlg,
@@ -921,6 +1035,7 @@ def dialog_nova_encomenda(data_pre: date | None = None, nome_fixo: str | None =
         return
 
     if col_cancel.button("❌ Cancelar", use_container_width=True, key="dlg_btn_cancel"):
+        _limpar_estado_confeccao("dlg", "dlg_confeccao")
         st.rerun()
 
 
@@ -956,7 +1071,7 @@ def secao_nova_encomenda_inline():
 
     d_base = hoje_brasilia()
 
-    df_clis_dlg = clientes_listar()
+    df_clis_dlg = clientes_listar(campos=PERFIL_CLIENTES_SELECAO)
     clis_dlg = df_clis_dlg["nome"].tolist() if not df_clis_dlg.empty else []
 
     st.markdown("##### 👤 Cliente")
@@ -988,11 +1103,11 @@ def secao_nova_encomenda_inline():
     st.markdown("##### 📅 Datas")
     st.caption("A primeira etapa do pedido é a Data da Confecção — não há mais um campo separado de 'Data Medidas'.")
 
-    d_confeccao_dlg = st.date_input(
-        "🪡 Data da Confecção", value=d_base + timedelta(days=7),
-        key="ne_confeccao", format="DD/MM/YYYY"
-    )
-    _render_ocupacao_confeccao_navegavel(encomendas_listar(cancelado=False), key_prefix="ne", data_referencia=d_confeccao_dlg)
+    st.session_state.setdefault("ne_confeccao", d_base + timedelta(days=7))
+    d_confeccao_dlg = st.date_input("🪡 Data da Confecção", key="ne_confeccao", format="DD/MM/YYYY")
+    df_ocup_ne = encomendas_listar(cancelado=False, campos=PERFIL_ENCOMENDAS_AGENDA)
+    _render_sugestoes_confeccao(df_ocup_ne, "ne", "ne_confeccao", d_base)
+    _render_ocupacao_confeccao_navegavel(df_ocup_ne, key_prefix="ne", data_referencia=d_confeccao_dlg)
 
     d_prova_dlg = st.date_input(
         "👗 Data da Prova", value=d_base + timedelta(days=25), key="ne_prova", format="DD/MM/YYYY"
@@ -1114,6 +1229,7 @@ def secao_nova_encomenda_inline():
             }
             pdf_bytes_dlg = gerar_pdf_contrato(enc_dict_pdf, f_cpf.strip(), f_rg.strip())
 
+        _limpar_estado_confeccao("ne", "ne_confeccao")
         st.session_state["_ne_resultado"] = {
             "cliente": nome_final, "peca": f_peca.strip(), "pdf_bytes": pdf_bytes_dlg,
         }
@@ -1144,7 +1260,7 @@ def secao_nova_encomenda_inline():
         )
 
         # ── Validação de agenda (duplicidade da Data da Confecção) ──
-        df_check_ne = encomendas_listar(cancelado=False)
+        df_check_ne = encomendas_listar(cancelado=False, campos=PERFIL_ENCOMENDAS_AGENDA)
         if _checar_confeccao_confirmavel(
             df_check_ne, d_confeccao_dlg, escopo_key="ne_nova",
             dados_para_salvar=dados_atuais_ne,
@@ -1415,11 +1531,16 @@ def _conteudo_pedido(enc: dict, cancelado: bool):
     #    com navegação de mês — fica fora do st.form abaixo de propósito,
     #    já que dentro de um st.form não é permitido usar st.button comum) ──
     mes_ref_conf = converter_para_data(enc.get("data_confeccao")) or hoje_brasilia()
-    df_check_edicao = encomendas_listar(cancelado=False)
+    df_check_edicao = encomendas_listar(cancelado=False, campos=PERFIL_ENCOMENDAS_AGENDA)
     _render_ocupacao_confeccao_navegavel(
         df_check_edicao, key_prefix=f"cp_{enc['rowid']}",
         data_referencia=mes_ref_conf, excluir_id=str(enc["rowid"]),
     )
+    _render_sugestoes_confeccao(
+        df_check_edicao, f"cp_{enc['rowid']}", f"dconf_{enc['rowid']}",
+        hoje_brasilia(), excluir_id=str(enc["rowid"]),
+    )
+    st.session_state.setdefault(f"dconf_{enc['rowid']}", converter_para_data(enc.get("data_confeccao")))
 
     with st.form(f"edit_{enc['rowid']}"):
         ed_cliente = st.text_input("Cliente", value=str(enc.get("cliente") or ""), key=f"cliente_{enc['rowid']}")
@@ -1434,8 +1555,7 @@ def _conteudo_pedido(enc: dict, cancelado: bool):
 
         st.markdown("📅 Datas")
         d2, d3 = st.columns(2)
-        ed_conf = d2.date_input("🪡 Data da Confecção", value=converter_para_data(enc.get("data_confeccao")),
-                                 key=f"dconf_{enc['rowid']}", format="DD/MM/YYYY")
+        ed_conf = d2.date_input("🪡 Data da Confecção", key=f"dconf_{enc['rowid']}", format="DD/MM/YYYY")
         ed_pro = d3.date_input("👗 Data da Prova", value=converter_para_data(enc.get("data_prova")),
                                 key=f"dp_{enc['rowid']}", format="DD/MM/YYYY")
 
@@ -1516,6 +1636,7 @@ def _conteudo_pedido(enc: dict, cancelado: bool):
                 etapa_ajustada = True
 
         encomendas_atualizar(str(enc["rowid"]), dados_salvar)
+        _limpar_estado_confeccao(f"cp_{enc['rowid']}", f"dconf_{enc['rowid']}")
 
         if etapa_ajustada:
             _reverter_lembretes_por_etapa(enc_id=str(enc["rowid"]), etapa_atual=etapa_atual)
@@ -1558,7 +1679,7 @@ def _conteudo_pedido(enc: dict, cancelado: bool):
                 ed_ent=ed_ent,
             )
             # ── Validação de agenda (duplicidade da Data da Confecção) ──
-            df_check_save = encomendas_listar(cancelado=False)
+            df_check_save = encomendas_listar(cancelado=False, campos=PERFIL_ENCOMENDAS_AGENDA)
             if _checar_confeccao_confirmavel(
                 df_check_save, ed_conf, escopo_key=f"pedido_{enc['rowid']}",
                 excluir_id=str(enc["rowid"]), dados_para_salvar=dados_atuais,
@@ -1575,9 +1696,11 @@ def _conteudo_pedido(enc: dict, cancelado: bool):
 
     if clicou_concluir:
         encomendas_atualizar(str(enc["rowid"]), {"etapa": 4})
+        _limpar_estado_confeccao(f"cp_{enc['rowid']}", f"dconf_{enc['rowid']}")
         st.rerun(scope="app")
     if clicou_cancelar_pedido:
         encomendas_cancelar(str(enc["rowid"]))
+        _limpar_estado_confeccao(f"cp_{enc['rowid']}", f"dconf_{enc['rowid']}")
         st.rerun(scope="app")
 
 
@@ -1715,7 +1838,7 @@ def _dialog_editar_data_tarefa(row):
         enc_id_check = row.get("encomenda_id")
 
         if tarefa_txt_check.startswith("🪡 Confecção:"):
-            df_check_tarefa = encomendas_listar(cancelado=False)
+            df_check_tarefa = encomendas_listar(cancelado=False, campos=PERFIL_ENCOMENDAS_AGENDA)
             if _checar_confeccao_confirmavel(
                 df_check_tarefa, nova_data,
                 escopo_key=f"tarefa_{row['rowid']}",
@@ -1788,7 +1911,7 @@ def _card_pedido(enc: dict, idx: int):
             "✅ Marcar como Concluído", key=f"concluir_direto_{idx}_{enc['rowid']}",
             use_container_width=True,
         ):
-            encomendas_atualizar(str(enc["rowid"]), {"etapa": 4})
+            encomendas_atualizar(str(enc["rowid"]), {"etapa": 4}, em_segundo_plano=True)  # [v38]
             st.success(f"✅ Pedido de {enc['cliente']} marcado como Concluído!")
             st.rerun(scope="app")
 
@@ -1799,6 +1922,7 @@ def _card_pedido(enc: dict, idx: int):
 # separadamente. "renderizar_contratos" abaixo é só um alias, para o main.py
 # não precisar de nenhum ajuste (os dois botões da sidebar caem aqui).
 # ══════════════════════════════════════════════════════════════════════════════
+@cronometrado()
 def renderizar_gerenciar_pedidos():
     st.markdown("## 📋 Gerenciar Pedidos")
     st.caption(
@@ -1822,16 +1946,16 @@ def renderizar_gerenciar_pedidos():
 
     if not df_e.empty:
         if filtro_status == "Em andamento":
-            df_e = df_e[(df_e["etapa"].astype(int) < 4) & (df_e["cancelado"].astype(int) == 0)]
+            df_e = df_e[(df_e["etapa"] < 4) & (df_e["cancelado"] == 0)]
         elif filtro_status == "Entrega":
             # [v20] Pedidos já na etapa Entrega (3) — útil pra ver de uma
             # vez só quem já está pronto/entregue e só falta confirmar
             # "Concluído" (o botão rápido aparece direto no card).
-            df_e = df_e[(df_e["etapa"].astype(int) == 3) & (df_e["cancelado"].astype(int) == 0)]
+            df_e = df_e[(df_e["etapa"] == 3) & (df_e["cancelado"] == 0)]
         elif filtro_status == "Concluídos":
-            df_e = df_e[(df_e["etapa"].astype(int) == 4) & (df_e["cancelado"].astype(int) == 0)]
+            df_e = df_e[(df_e["etapa"] == 4) & (df_e["cancelado"] == 0)]
         elif filtro_status == "Cancelados":
-            df_e = df_e[df_e["cancelado"].astype(int) == 1]
+            df_e = df_e[df_e["cancelado"] == 1]
         else:
             pass  # Todos
 
@@ -1867,6 +1991,7 @@ def renderizar_contratos():
 # ══════════════════════════════════════════════════════════════════════════════
 # ████████████████████████████  BLOCO: NOVA ENCOMENDA  █████████████████████████
 # ══════════════════════════════════════════════════════════════════════════════
+@cronometrado()
 def renderizar_nova_encomenda():
     st.markdown("## 🆕 Nova Encomenda")
     st.caption(
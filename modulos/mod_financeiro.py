@@ -92,8 +92,10 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 # caminho do arquivo do logo, para o cabeçalho do PDF de fechamento ficar
 # visualmente igual ao PDF de contrato.
 from modulos.mod_encomendas import LOGO_PATH
+from modulos.cronometro import cronometrado
 
 from database import (
+    cfg_carregar,
     cfg_get,
     encomendas_atualizar,
     encomendas_listar,
@@ -103,11 +105,21 @@ from database import (
     gastos_atualizar,
     gastos_deletar,
     gastos_inserir,
+    gastos_em_aberto,
     gastos_listar,
+    gastos_listar_desde,
+    gastos_listar_mes,
+    gastos_totais_por_encomenda,
+    gastos_total_pago,
+    mes_seguinte,
+    precarregar,
     recebimentos_atualizar,
     recebimentos_deletar,
     recebimentos_inserir,
     recebimentos_listar,
+    recebimentos_listar_desde,
+    recebimentos_listar_mes,
+    recebimentos_total,
 )
 from modulos.utils import (
     CAT_GASTOS,
@@ -141,7 +153,7 @@ _COLS_GASTOS = [
 def _flt(df, col, default=0.0):
     if df.empty or col not in df.columns:
         return default
-    return float(df[col].fillna(0).astype(float).sum())
+    return float(pd.to_numeric(df[col], errors="coerce").fillna(0).sum())
 
 
 def _mes_de(data_iso: str) -> str:
@@ -151,14 +163,68 @@ def _mes_de(data_iso: str) -> str:
     return str(data_iso)[:7]
 
 
-def _to_date_seguro(valor):
-    """Converte string ISO em date. Retorna None se vazio/inválido — nunca lança exceção."""
-    if not valor:
-        return None
-    try:
-        return date.fromisoformat(str(valor)[:10])
-    except ValueError:
-        return None
+def _coluna_mes(df: pd.DataFrame, col: str) -> pd.Series:
+    """
+    [v31] Chave "YYYY-MM" da coluna de data `col`. Os DataFrames de
+    `database.py` já trazem `<col>_mes` pronta (tipada uma vez, na carga);
+    o `.apply(_mes_de)` fica só de reserva para DataFrames montados à mão.
+    """
+    if f"{col}_mes" in df.columns:
+        return df[f"{col}_mes"]
+    return df[col].fillna("").apply(_mes_de)
+
+
+def _coluna_flag(df: pd.DataFrame, col: str) -> pd.Series:
+    """
+    [v31] Flag 0/1 `col` como número. Vindo de `database.py` já é `Int64`
+    (o `to_numeric` não copia nada); em DataFrames montados à mão, texto ou
+    vazio viram o padrão 0 — o mesmo de `_ESQUEMAS`.
+    """
+    return pd.to_numeric(df[col], errors="coerce").fillna(0)
+
+
+def _coluna_data(df: pd.DataFrame, col: str) -> pd.Series:
+    """[v31] Mesma ideia de `_coluna_mes`, para a data em `datetime64` (`<col>_dt`)."""
+    if f"{col}_dt" in df.columns:
+        return df[f"{col}_dt"]
+    return pd.to_datetime(df[col].fillna("").astype(str).str.slice(0, 10), format="%Y-%m-%d", errors="coerce")
+
+
+def _com_colunas_gastos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Garantia defensiva de colunas: o Firestore só cria uma coluna no
+    DataFrame quando PELO MENOS UM documento tem aquele campo preenchido.
+    Preenchemos valores padrão para colunas opcionais, evitando KeyError.
+    """
+    if not df.empty:
+        for _col, _default in [
+            ("conciliado", 0), ("pago", 0), ("recorrente", 0),
+            ("grande_despesa_prevista", 0), ("encomenda_id", None),
+        ]:
+            if _col not in df.columns:
+                df[_col] = _default
+    return df
+
+
+def _com_colunas_receb(df: pd.DataFrame) -> pd.DataFrame:
+    """Mesma garantia de `_com_colunas_gastos`, para recebimentos."""
+    if not df.empty:
+        for _col, _default in [("conciliado", 0), ("encomenda_id", None)]:
+            if _col not in df.columns:
+                df[_col] = _default
+    return df
+
+
+def _gastos_do_mes(mes_str: str) -> pd.DataFrame:
+    """[v32] Gastos com data no mês (leitura só daquele mês), ou o DataFrame vazio padrão."""
+    df = gastos_listar_mes(mes_str)
+    return _com_colunas_gastos(df) if not df.empty else _df_vazio_gastos()
+
+
+def _recebimentos_do_mes(mes_str: str) -> pd.DataFrame:
+    """[v32] Recebimentos com data no mês (leitura só daquele mês), ou o DataFrame vazio padrão."""
+    df = recebimentos_listar_mes(mes_str)
+    return _com_colunas_receb(df) if not df.empty else _df_vazio_receb()
 
 
 def _df_vazio_receb() -> pd.DataFrame:
@@ -173,19 +239,13 @@ def _ultimo_fechamento(df_fech: pd.DataFrame):
     """Retorna (dict do último mês FECHADO, ou None)."""
     if df_fech.empty or "fechado" not in df_fech.columns:
         return None
-    fechados = df_fech[df_fech["fechado"].astype(int) == 1].copy()
+    fechados = df_fech[_coluna_flag(df_fech, "fechado") == 1].copy()
     if fechados.empty:
         return None
     fechados = fechados.sort_values("mes", ascending=False)
     return fechados.iloc[0].to_dict()
 
 
-def _mes_seguinte(mes_str: str) -> str:
-    """'2026-03' -> '2026-04'."""
-    ts = pd.Timestamp(f"{mes_str}-01") + pd.DateOffset(months=1)
-    return ts.strftime("%Y-%m")
-
-
 def _grandes_despesas_previstas(df_gastos: pd.DataFrame) -> pd.DataFrame:
     """
     Despesas grandes já esperadas, ainda não pagas, com fundos reservados.
@@ -195,8 +255,8 @@ def _grandes_despesas_previstas(df_gastos: pd.DataFrame) -> pd.DataFrame:
     if df_gastos.empty or "grande_despesa_prevista" not in df_gastos.columns:
         return _df_vazio_gastos()
     df = df_gastos[
-        (df_gastos["pago"].astype(int) == 0)
-        & (df_gastos["grande_despesa_prevista"].fillna(0).astype(int) == 1)
+        (_coluna_flag(df_gastos, "pago") == 0)
+        & (_coluna_flag(df_gastos, "grande_despesa_prevista") == 1)
     ].copy()
     return df
 
@@ -216,14 +276,14 @@ def _saldo_em_caixa(df_receb: pd.DataFrame, df_gastos: pd.DataFrame, df_fech: pd
     saldo_herdado = float(ult["saldo_final"]) if ult else 0.0
 
     if not df_receb.empty:
-        receb_pos = df_receb[df_receb["data"].apply(_mes_de) > mes_corte] if mes_corte else df_receb
+        receb_pos = df_receb[_coluna_mes(df_receb, "data") > mes_corte] if mes_corte else df_receb
         total_receb_pos = _flt(receb_pos, "valor")
     else:
         total_receb_pos = 0.0
 
     if not df_gastos.empty:
-        pagos = df_gastos[df_gastos["pago"].astype(int) == 1]
-        pagos_pos = pagos[pagos["data"].apply(_mes_de) > mes_corte] if mes_corte else pagos
+        pagos = df_gastos[_coluna_flag(df_gastos, "pago") == 1]
+        pagos_pos = pagos[_coluna_mes(pagos, "data") > mes_corte] if mes_corte else pagos
         total_gastos_pos = _flt(pagos_pos, "valor")
     else:
         total_gastos_pos = 0.0
@@ -253,7 +313,7 @@ def _pedidos_com_saldo_pendente(df_enc: pd.DataFrame) -> pd.DataFrame:
         return df_enc.iloc[0:0]
     df = df_enc.copy()
     df["_saldo_pendente"] = (
-        df["valor_total"].fillna(0).astype(float) - df["valor_recebido"].fillna(0).astype(float)
+        df["valor_total"].fillna(0) - df["valor_recebido"].fillna(0)
     ).clip(lower=0)
     return df[df["_saldo_pendente"] > 0.01]
 
@@ -263,7 +323,7 @@ def _receber_do_mes(df_enc: pd.DataFrame, mes_str: str) -> pd.DataFrame:
     df = _pedidos_com_saldo_pendente(df_enc)
     if df.empty or "data_entrega" not in df.columns:
         return df.iloc[0:0]
-    return df[df["data_entrega"].fillna("").apply(_mes_de) == mes_str]
+    return df[_coluna_mes(df, "data_entrega") == mes_str]
 
 
 def _receber_atrasado(df_enc: pd.DataFrame, hoje: date) -> pd.DataFrame:
@@ -274,33 +334,27 @@ def _receber_atrasado(df_enc: pd.DataFrame, hoje: date) -> pd.DataFrame:
     df = _pedidos_com_saldo_pendente(df_enc)
     if df.empty or "data_entrega" not in df.columns:
         return df.iloc[0:0]
-    def _venceu(v):
-        d = _to_date_seguro(v)
-        return d is not None and d < hoje
-    return df[df["data_entrega"].apply(_venceu)]
+    return df[_coluna_data(df, "data_entrega") < pd.Timestamp(hoje)]
 
 
 def _despesas_abertas_do_mes(df_gastos: pd.DataFrame, mes_str: str) -> pd.DataFrame:
     """Despesas ainda não pagas com vencimento (campo 'data') no mês informado."""
     if df_gastos is None or df_gastos.empty:
         return _df_vazio_gastos()
-    df = df_gastos[df_gastos["pago"].astype(int) == 0]
+    df = df_gastos[_coluna_flag(df_gastos, "pago") == 0]
     if df.empty:
         return df
-    return df[df["data"].fillna("").apply(_mes_de) == mes_str]
+    return df[_coluna_mes(df, "data") == mes_str]
 
 
 def _despesas_abertas_atrasadas(df_gastos: pd.DataFrame, hoje: date) -> pd.DataFrame:
     """Despesas ainda não pagas cujo vencimento já passou — nunca fica escondido."""
     if df_gastos is None or df_gastos.empty:
         return _df_vazio_gastos()
-    df = df_gastos[df_gastos["pago"].astype(int) == 0]
+    df = df_gastos[_coluna_flag(df_gastos, "pago") == 0]
     if df.empty:
         return df
-    def _venceu(v):
-        d = _to_date_seguro(v)
-        return d is not None and d < hoje
-    return df[df["data"].apply(_venceu)]
+    return df[_coluna_data(df, "data") < pd.Timestamp(hoje)]
 
 
 def _status_pagamento_badge(v_recebido: float, v_total: float) -> str:
@@ -657,39 +711,39 @@ def gerar_pdf_fechamento(
     return buf.getvalue()
 
 
+@cronometrado()
 def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
     """Renderiza o BLOCO FINANCEIRO completo."""
     st.markdown("### 💰 Controle Financeiro Profissional")
 
     df_enc_fin = df_enc_all
-    df_g_fin   = gastos_listar()
-    df_r_fin   = recebimentos_listar()
-    df_f_fin   = fechamentos_listar()
-
-    # ── Garantia defensiva de colunas ────────────────────────────────────
-    # O Firestore só cria uma coluna no DataFrame quando PELO MENOS UM
-    # documento tem aquele campo preenchido. Preenchemos valores padrão
-    # para colunas opcionais, evitando KeyError.
-    if not df_g_fin.empty:
-        for _col, _default in [
-            ("conciliado", 0), ("pago", 0), ("recorrente", 0),
-            ("grande_despesa_prevista", 0), ("encomenda_id", None),
-        ]:
-            if _col not in df_g_fin.columns:
-                df_g_fin[_col] = _default
-    if not df_r_fin.empty:
-        for _col, _default in [("conciliado", 0), ("encomenda_id", None)]:
-            if _col not in df_r_fin.columns:
-                df_r_fin[_col] = _default
+
+    # ── [v32] Leituras por recorte, não mais o histórico inteiro ─────────
+    # Despesas em aberto (qualquer mês) alimentam as previsões/atrasos; o
+    # saldo em caixa só precisa do que veio DEPOIS do último mês fechado
+    # (sem nenhum fechamento ainda, aí sim é o histórico todo); os totais
+    # históricos saem de agregação no servidor.
+    # [v34] Tudo que não depende de outra leitura sai numa leva só, em
+    # paralelo; a segunda leva depende do último fechamento.
+    df_f_fin, df_g_abertos, receita_total, gastos_pagos = precarregar(
+        fechamentos_listar, gastos_em_aberto, recebimentos_total, gastos_total_pago,
+    )
+    df_g_abertos = _com_colunas_gastos(df_g_abertos)
+    ult_fech = _ultimo_fechamento(df_f_fin)
+    mes_inicio_pos = mes_seguinte(ult_fech["mes"]) if ult_fech else None
+    df_r_pos, df_g_pos = precarregar(
+        lambda: recebimentos_listar_desde(mes_inicio_pos) if mes_inicio_pos else recebimentos_listar(),
+        lambda: gastos_listar_desde(mes_inicio_pos) if mes_inicio_pos else gastos_listar(),
+    )
+    df_r_pos = _com_colunas_receb(df_r_pos)
+    df_g_pos = _com_colunas_gastos(df_g_pos)
 
     mes_atual_str = f"{hoje_dt.year}-{hoje_dt.month:02d}"
 
     # ── Números REAIS (histórico já acontecido) ──────────────────────────
-    receita_total = _flt(df_r_fin, "valor")
-    gastos_pagos  = float(df_g_fin[df_g_fin["pago"].astype(int) == 1]["valor"].fillna(0).astype(float).sum()) if not df_g_fin.empty else 0.0
     lucro_real    = receita_total - gastos_pagos
 
-    saldo_caixa_atual, mes_corte_fech, saldo_herdado = _saldo_em_caixa(df_r_fin, df_g_fin, df_f_fin)
+    saldo_caixa_atual, mes_corte_fech, saldo_herdado = _saldo_em_caixa(df_r_pos, df_g_pos, df_f_fin)
 
     # ── Números de PREVISÃO (o que ainda vai entrar/sair, lido da agenda) ─
     df_receber_mes_atual = _receber_do_mes(df_enc_fin, mes_atual_str)
@@ -705,10 +759,10 @@ def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
     df_receber_atrasado_top = _receber_atrasado(df_enc_fin, hoje_dt)
     receber_atrasado_top = float(df_receber_atrasado_top["_saldo_pendente"].sum()) if not df_receber_atrasado_top.empty else 0.0
 
-    df_pagar_mes_atual = _despesas_abertas_do_mes(df_g_fin, mes_atual_str)
+    df_pagar_mes_atual = _despesas_abertas_do_mes(df_g_abertos, mes_atual_str)
     pagar_mes_atual = _flt(df_pagar_mes_atual, "valor")
 
-    df_pagar_atrasado_top = _despesas_abertas_atrasadas(df_g_fin, hoje_dt)
+    df_pagar_atrasado_top = _despesas_abertas_atrasadas(df_g_abertos, hoje_dt)
     pagar_atrasado_top = _flt(df_pagar_atrasado_top, "valor")
 
     lucro_projetado_mes = receber_mes_atual - pagar_mes_atual
@@ -717,13 +771,14 @@ def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
     df_receber_total_geral = _pedidos_com_saldo_pendente(df_enc_fin)
     receber_total_geral = float(df_receber_total_geral["_saldo_pendente"].sum()) if not df_receber_total_geral.empty else 0.0
 
-    df_gastos_abertos_total = df_g_fin[df_g_fin["pago"].astype(int) == 0] if not df_g_fin.empty else pd.DataFrame()
+    df_gastos_abertos_total = df_g_abertos
     gastos_previstos_total = _flt(df_gastos_abertos_total, "valor")
 
-    pct_reserva   = int(cfg_get("reserva_emergencia_meses") or 3)
-    pct_capital   = float(cfg_get("capital_giro_pct") or 20) / 100
-    margem_min    = float(cfg_get("margem_minima_pct") or 30) / 100
-    meta_fat_fin  = float(cfg_get("meta_faturamento") or 5000)
+    cfg = cfg_carregar()
+    pct_reserva   = cfg.reserva_emergencia_meses
+    pct_capital   = cfg.capital_giro_pct / 100
+    margem_min    = cfg.margem_minima_pct / 100
+    meta_fat_fin  = cfg.meta_faturamento
 
     reserva_sugerida = gastos_pagos * pct_reserva / 12 if gastos_pagos > 0 else gastos_previstos_total * pct_reserva
     capital_giro_sug = receita_total * pct_capital
@@ -845,8 +900,8 @@ def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
             "um valor travado."
         )
 
-        mes_seguinte_str_proj = _mes_seguinte(mes_atual_str)
-        opcoes_mes_proj = [mes_atual_str, mes_seguinte_str_proj, _mes_seguinte(mes_seguinte_str_proj)]
+        mes_seguinte_str_proj = mes_seguinte(mes_atual_str)
+        opcoes_mes_proj = [mes_atual_str, mes_seguinte_str_proj, mes_seguinte(mes_seguinte_str_proj)]
         labels_mes_proj = {
             mes_atual_str: f"Mês atual ({MESES_PT[int(mes_atual_str[5:7])-1]}/{mes_atual_str[:4]})",
             mes_seguinte_str_proj: f"Mês seguinte ({MESES_PT[int(mes_seguinte_str_proj[5:7])-1]}/{mes_seguinte_str_proj[:4]})",
@@ -860,7 +915,7 @@ def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
         df_receber_proj = _receber_do_mes(df_enc_fin, mes_proj_sel)
         rec_prevista_proj = float(df_receber_proj["_saldo_pendente"].sum()) if not df_receber_proj.empty else 0.0
 
-        df_pagar_proj = _despesas_abertas_do_mes(df_g_fin, mes_proj_sel)
+        df_pagar_proj = _despesas_abertas_do_mes(df_g_abertos, mes_proj_sel)
         desp_prevista_proj = _flt(df_pagar_proj, "valor")
 
         lucro_projetado = rec_prevista_proj - desp_prevista_proj
@@ -873,10 +928,10 @@ def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
         cursor_mes = mes_atual_str
         while cursor_mes != mes_proj_sel:
             df_r_cursor = _receber_do_mes(df_enc_fin, cursor_mes)
-            df_g_cursor = _despesas_abertas_do_mes(df_g_fin, cursor_mes)
+            df_g_cursor = _despesas_abertas_do_mes(df_g_abertos, cursor_mes)
             saldo_base_proj += float(df_r_cursor["_saldo_pendente"].sum()) if not df_r_cursor.empty else 0.0
             saldo_base_proj -= _flt(df_g_cursor, "valor")
-            cursor_mes = _mes_seguinte(cursor_mes)
+            cursor_mes = mes_seguinte(cursor_mes)
 
         saldo_projetado_fim_mes = saldo_base_proj + lucro_projetado
 
@@ -928,7 +983,7 @@ def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
             "precisa ser 'transportado' manualmente."
         )
         df_receber_atr = _receber_atrasado(df_enc_fin, hoje_dt)
-        df_pagar_atr = _despesas_abertas_atrasadas(df_g_fin, hoje_dt)
+        df_pagar_atr = _despesas_abertas_atrasadas(df_g_abertos, hoje_dt)
 
         col_atr1, col_atr2 = st.columns(2)
         with col_atr1:
@@ -1084,11 +1139,11 @@ def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
 
         mes_str_rel = f"{ano_sel_fin}-{mes_sel_fin:02d}"
 
-        df_r_mes_rel = df_r_fin[df_r_fin["data"].apply(_mes_de) == mes_str_rel].copy() if not df_r_fin.empty else _df_vazio_receb()
-        df_g_mes_rel = df_g_fin[df_g_fin["data"].apply(_mes_de) == mes_str_rel].copy() if not df_g_fin.empty else _df_vazio_gastos()
+        df_r_mes_rel = _recebimentos_do_mes(mes_str_rel)
+        df_g_mes_rel = _gastos_do_mes(mes_str_rel)
 
         rec_mes   = _flt(df_r_mes_rel, "valor")
-        gasto_mes = float(df_g_mes_rel[df_g_mes_rel["pago"].astype(int) == 1]["valor"].fillna(0).astype(float).sum()) if not df_g_mes_rel.empty else 0.0
+        gasto_mes = float(df_g_mes_rel[_coluna_flag(df_g_mes_rel, "pago") == 1]["valor"].fillna(0).sum()) if not df_g_mes_rel.empty else 0.0
         lucro_mes = rec_mes - gasto_mes
         margem_mes = lucro_mes / rec_mes * 100 if rec_mes > 0 else 0
 
@@ -1191,8 +1246,8 @@ def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
                 )
                 df_pag_view = df_enc_fin.copy()
                 df_pag_view["_saldo_pendente"] = (
-                    df_pag_view["valor_total"].fillna(0).astype(float)
-                    - df_pag_view["valor_recebido"].fillna(0).astype(float)
+                    df_pag_view["valor_total"].fillna(0)
+                    - df_pag_view["valor_recebido"].fillna(0)
                 ).clip(lower=0)
 
                 if filtro_pag == "Com saldo pendente":
@@ -1205,14 +1260,13 @@ def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
                 if df_pag_view.empty:
                     st.info("Nenhum pedido nesse filtro.")
                 else:
+                    custo_por_encomenda = gastos_totais_por_encomenda()
                     for _, enc in df_pag_view.iterrows():
                         v_total_e  = float(enc.get("valor_total", 0) or 0)
                         v_recebido = float(enc.get("valor_recebido", 0) or 0)
                         v_restante = max(v_total_e - v_recebido, 0.0)
 
-                        gasto_enc = 0.0
-                        if not df_g_fin.empty and "encomenda_id" in df_g_fin.columns:
-                            gasto_enc = float(df_g_fin[df_g_fin["encomenda_id"] == enc["rowid"]]["valor"].fillna(0).astype(float).sum())
+                        gasto_enc = custo_por_encomenda.get(str(enc["rowid"]), 0.0)
                         lucro_enc  = v_recebido - gasto_enc
                         margem_enc = lucro_enc / v_recebido * 100 if v_recebido > 0 else 0
                         margem_min_val = float(cfg_get("margem_minima_pct") or 30)
@@ -1284,7 +1338,7 @@ def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
             format_func=lambda x: MESES_PT[x-1], index=hoje_dt.month-1, key="mes_fechamento")
         ano_sel = col_fm2.number_input("Ano", min_value=2020, max_value=2030, value=hoje_dt.year, key="ano_fechamento")
         mes_str = f"{ano_sel}-{mes_sel:02d}"
-        mes_seguinte_label = f"{MESES_PT[int(_mes_seguinte(mes_str)[5:7])-1]}/{_mes_seguinte(mes_str)[:4]}"
+        mes_seguinte_label = f"{MESES_PT[int(mes_seguinte(mes_str)[5:7])-1]}/{mes_seguinte(mes_str)[:4]}"
 
         fech_existente = fechamento_buscar(mes_str)
         ja_fechado = bool(fech_existente and int(fech_existente.get("fechado", 0) or 0) == 1)
@@ -1322,8 +1376,9 @@ def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
                 unsafe_allow_html=True,
             )
 
-        df_r_mes = df_r_fin[df_r_fin["data"].apply(_mes_de) == mes_str].copy() if not df_r_fin.empty else _df_vazio_receb()
-        df_g_mes = df_g_fin[(df_g_fin["data"].apply(_mes_de) == mes_str) & (df_g_fin["pago"].astype(int) == 1)].copy() if not df_g_fin.empty else _df_vazio_gastos()
+        df_r_mes = _recebimentos_do_mes(mes_str)
+        df_g_mes = _gastos_do_mes(mes_str)
+        df_g_mes = df_g_mes[_coluna_flag(df_g_mes, "pago") == 1].copy() if not df_g_mes.empty else df_g_mes
 
         receitas_mes = _flt(df_r_mes, "valor")
         despesas_mes = _flt(df_g_mes, "valor")
@@ -1408,8 +1463,8 @@ def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
             else:
                 df_r_edit_base = df_r_mes[["rowid", "data", "descricao", "valor", "conciliado"]].copy()
                 df_r_edit_base["data"] = pd.to_datetime(df_r_edit_base["data"]).dt.date
-                df_r_edit_base["valor"] = pd.to_numeric(df_r_edit_base["valor"], errors="coerce").fillna(0.0).astype("float64")
-                df_r_edit_base["conciliado"] = df_r_edit_base["conciliado"].fillna(0).astype(int).astype(bool)
+                df_r_edit_base["valor"] = df_r_edit_base["valor"].fillna(0.0)
+                df_r_edit_base["conciliado"] = df_r_edit_base["conciliado"].astype(bool)
                 df_r_edit_base = df_r_edit_base.sort_values("data").reset_index(drop=True)
 
                 edited_r = st.data_editor(
@@ -1453,7 +1508,7 @@ def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
                                 "descricao": str(row_new["descricao"]),
                                 "conciliado": 1 if row_new["conciliado"] else 0,
                                 "data": row_new["data"].isoformat() if hasattr(row_new["data"], "isoformat") else str(row_new["data"]),
-                            })
+                            }, em_segundo_plano=True)  # [v38] várias linhas → um lote só, sem esperar
                             houve_mudanca_r = True
                     if houve_mudanca_r:
                         if excluidos_r:
@@ -1471,8 +1526,8 @@ def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
             else:
                 df_g_edit_base = df_g_mes[["rowid", "data", "descricao", "valor", "conciliado"]].copy()
                 df_g_edit_base["data"] = pd.to_datetime(df_g_edit_base["data"]).dt.date
-                df_g_edit_base["valor"] = pd.to_numeric(df_g_edit_base["valor"], errors="coerce").fillna(0.0).astype("float64")
-                df_g_edit_base["conciliado"] = df_g_edit_base["conciliado"].fillna(0).astype(int).astype(bool)
+                df_g_edit_base["valor"] = df_g_edit_base["valor"].fillna(0.0)
+                df_g_edit_base["conciliado"] = df_g_edit_base["conciliado"].astype(bool)
                 df_g_edit_base = df_g_edit_base.sort_values("data").reset_index(drop=True)
 
                 edited_g = st.data_editor(
@@ -1516,7 +1571,7 @@ def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
                                 "descricao": str(row_new["descricao"]),
                                 "conciliado": 1 if row_new["conciliado"] else 0,
                                 "data": row_new["data"].isoformat() if hasattr(row_new["data"], "isoformat") else str(row_new["data"]),
-                            })
+                            }, em_segundo_plano=True)  # [v38] várias linhas → um lote só, sem esperar
                             houve_mudanca_g = True
                     if houve_mudanca_g:
                         if excluidos_g:
@@ -1533,7 +1588,7 @@ def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
         st.markdown("---")
         st.markdown("##### 🎯 Grandes Despesas Previstas (fundos reservados)")
         st.caption("Despesas grandes já esperadas mas ainda não pagas — ficam aqui até serem quitadas, não importa o mês. Elas reservam parte do seu saldo para você não gastar esse dinheiro por engano em outra coisa.")
-        df_grandes = _grandes_despesas_previstas(df_g_fin)
+        df_grandes = _grandes_despesas_previstas(df_g_abertos)
         total_grandes = _flt(df_grandes, "valor")
         fundos_disponiveis = saldo_teorico - total_grandes
 
@@ -1586,9 +1641,9 @@ def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
         total_itens = len(df_r_mes) + len(df_g_mes)
         conc_itens = 0
         if not df_r_mes.empty:
-            conc_itens += int(df_r_mes["conciliado"].fillna(0).astype(int).sum())
+            conc_itens += int(df_r_mes["conciliado"].sum())
         if not df_g_mes.empty:
-            conc_itens += int(df_g_mes["conciliado"].fillna(0).astype(int).sum())
+            conc_itens += int(df_g_mes["conciliado"].sum())
         st.progress(conc_itens / total_itens if total_itens else 0, text=f"{conc_itens} de {total_itens} lançamentos conferidos")
 
         # ══════════════════════════════════════════════════════════════
@@ -1627,7 +1682,7 @@ def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
                 st.warning("Mês reaberto. Os valores voltaram a ser editáveis.")
                 st.rerun()
             if col_avc.button("➡️ Ir para o próximo mês", key="ir_prox_mes", use_container_width=True):
-                prox = _mes_seguinte(mes_str)
+                prox = mes_seguinte(mes_str)
                 st.session_state["mes_fechamento"] = int(prox[5:7])
                 st.session_state["ano_fechamento"] = int(prox[:4])
                 st.rerun()
@@ -1654,7 +1709,7 @@ def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
                     "data_fechamento": agora_br().isoformat(),
                     "atualizado_em": agora_br().isoformat(),
                 })
-                prox = _mes_seguinte(mes_str)
+                prox = mes_seguinte(mes_str)
                 st.session_state["mes_fechamento"] = int(prox[5:7])
                 st.session_state["ano_fechamento"] = int(prox[:4])
                 st.success(f"✅ Mês {mes_str} fechado! Saldo final de {brl(saldo_final_oficial)} vira o saldo inicial de {prox}. Indo para o próximo mês...")
@@ -1752,7 +1807,7 @@ def renderizar_financeiro(df_enc_all: pd.DataFrame, hoje_dt):
         if df_f_fin.empty:
             st.info("Nenhum mês fechado ainda.")
         else:
-            df_hist = df_f_fin[df_f_fin["fechado"].astype(int) == 1].sort_values("mes", ascending=False).copy()
+            df_hist = df_f_fin[_coluna_flag(df_f_fin, "fechado") == 1].sort_values("mes", ascending=False).copy()
             if df_hist.empty:
                 st.info("Nenhum mês fechado ainda.")
             else:
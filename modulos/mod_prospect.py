@@ -47,6 +47,7 @@ from database import (
 )
 from modulos.utils import agora_br
 from modulos.mod_encomendas import dialog_nova_encomenda
+from modulos.cronometro import cronometrado
 
 
 @st.dialog("✂️ Novo Conserto")
@@ -129,6 +130,7 @@ def dialog_novo_conserto(nome_fixo: str, prospect_id: str):
         st.rerun()
 
 
+@cronometrado()
 def renderizar_prospects():
     st.markdown("## 🌱 Prospect")
     st.caption(
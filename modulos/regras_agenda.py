@@ -21,6 +21,10 @@ Regras implementadas:
      bloqueado é usar esse dia para Confecção.
   3) ENTREGAS PRÓXIMAS — lista de pedidos cuja Data de Entrega caia dentro
      da janela de antecedência configurada (dias), para o alerta urgente.
+  5) CAPACIDADE EM HORAS — soma das `horas` das tarefas pendentes do
+     cronograma por dia, contra o orçamento diário de horas da
+     configuração (`capacidade_horas_dia`). Um dia que passaria do
+     orçamento com mais uma confecção pede confirmação (sim/não).
 
 [v2 — correção de bug] `pedidos_com_entrega_proxima` filtrava por
 `etapa < 7`, resquício da régua ANTIGA de 7 etapas (de antes do v16 do
@@ -58,6 +62,60 @@ lugar, `validar_data_confeccao` agora devolve um status em texto ("ok",
 A regra de LIMITE DE PROVAS (regra 2) não mudou: continua um bloqueio
 definitivo, sem confirmação possível.
 
+[v5 — índice de ocupação por dia] As funções de Confecção/Provas filtravam
+e percorriam TODOS os pedidos (`iterrows`) a cada chamada — e uma única
+`validar_data_confeccao` fazia isso duas vezes; o mini-calendário, mais
+duas. Agora as contas vêm de um `OcupacaoIndex`: uma passada pelos pedidos
+monta data → (confecções, provas) e pedido → contribuição, e cada pergunta
+("quantas provas no dia X?", "quem confecciona no dia X?") é uma consulta
+de dicionário. `excluir_id` desconta só a contribuição daquele pedido, sem
+refiltrar nada. `indice_ocupacao(df_enc)` guarda os índices já montados
+pela assinatura dos pedidos, então o mesmo retrato dos pedidos — mesmo que
+venha numa cópia nova do DataFrame, como sai do database.py — não é
+indexado de novo. A assinatura de uma cópia recém-saída do database.py é a
+GERAÇÃO da tabela de onde ela veio (`_ATTR_GERACAO`, sem ler os dados); a
+de qualquer outro DataFrame (montado à mão, filtrado, ordenado...) é o hash
+das colunas usadas, e um DataFrame montado à mão e alterado no lugar nunca
+reaproveita o índice antigo. As regras (ativos, sem consertos, 2ª prova)
+são exatamente as de antes.
+
+[v6 — datas em coluna] O `_to_date` rodava linha a linha (dentro de laços
+e de `.apply`) para confecção, provas, 2ª prova e entrega. Agora cada
+coluna de data é convertida de uma vez por `_dias_das_datas` (um
+`pd.to_datetime(..., errors="coerce")` sobre a coluna, com o `_to_date`
+só para os raros textos fora do formato AAAA-MM-DD) e as regras trabalham
+com máscaras NumPy: o `OcupacaoIndex` conta as provas com um
+`np.unique`, e `pedidos_com_entrega_proxima` calcula `_dias_restantes`
+numa subtração só. Resultados idênticos aos de antes, inclusive a regra da
+2ª prova e o tipo da coluna `_dias_restantes`.
+
+[v7 — sugestão de datas livres] `sugerir_datas_confeccao` devolve as
+próximas N datas que passariam direto ("ok") em `validar_data_confeccao`,
+para os formulários mostrarem como atalhos de um clique — em vez de testar
+data por data até a validação parar de pedir confirmação.
+
+[v8 — status do mês inteiro] `status_mes(df_enc, ano, mes, excluir_id)`
+devolve, para cada dia do mês, o status que `validar_data_confeccao` daria
+("ok" / "confirmar" / "bloqueado") e as contagens de confecções e provas.
+Sai de uma conta só sobre os arrays ordenados do `OcupacaoIndex` (fatia do
+mês por busca binária) e fica guardado no próprio índice — o mini-calendário
+dos formulários, que redesenha a cada tecla digitada, não monta mais os dois
+conjuntos (`dias_confeccao_ocupados` + `dias_com_provas_lotadas`) a cada rerun.
+
+[v9 — capacidade em horas] As regras acima contam PEDIDOS por dia; as
+tarefas do cronograma já trazem a duração (`horas`: Confecção 3,0, Prova
+1,0, Entrega 0,5...). `CapacidadeHoras` soma essas horas por dia (um
+`np.bincount` sobre o intervalo de datas até `_JANELA_CAPACIDADE_DIAS` de
+hoje — anos de agenda custam um array de alguns milhares de posições; uma
+data digitada errado, como 2206 ou 0001, fica num dicionário à parte em
+vez de esticar o array por séculos) e guarda, já calculadas, as séries
+de horas, utilização (horas ÷ orçamento) e sobrecarga de cada dia.
+`indice_capacidade` reaproveita o índice enquanto o cronograma e o
+orçamento não mudam. Com `capacidade=` informado, `validar_data_confeccao`
+também pede confirmação quando a confecção (`HORAS_CONFECCAO`) faria o dia
+passar do orçamento; `status_mes` e `sugerir_datas_confeccao` seguem a
+mesma regra, e a Agenda pinta o calendário com a utilização de cada dia.
+
 Em todas as funções, "pedidos ativos" = não cancelados. Ao editar um
 pedido já existente, use `excluir_id` para não contar o próprio pedido
 como conflito consigo mesmo.
@@ -65,10 +123,16 @@ como conflito consigo mesmo.
 
 from __future__ import annotations
 
+import bisect
+import calendar
 import datetime
+import hashlib
+import threading
+from collections import OrderedDict
 from datetime import date
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 
 # Quantidade de provas que um dia AINDA PODE TER sem bloquear a Confecção.
@@ -88,6 +152,23 @@ ETAPA_CONCLUIDO = 4
 # não haver duas strings soltas ("[Conserto]") que possam divergir.
 PREFIXO_CONSERTO = "[Conserto]"
 
+# [v9] Horas que uma confecção ocupa na agenda (a mesma duração da tarefa
+# "🪡 Confecção" criada no cronograma) e o orçamento diário de horas usado
+# quando a configuração não traz um valor válido.
+HORAS_CONFECCAO = 3.0
+CAPACIDADE_HORAS_DIA_PADRAO = 8.0
+
+# [v9] Distância máxima de hoje (em dias, para os dois lados) das datas que
+# entram no array contínuo de `CapacidadeHoras`. Datas mais longe — em geral
+# erro de digitação — são somadas à parte, dia a dia.
+_JANELA_CAPACIDADE_DIAS = 5 * 366
+
+# [v6] Datas em forma de coluna: dias desde 1970-01-01 (int64), com um
+# valor-sentinela para "sem data" (vazio/inválido).
+_EPOCA = date(1970, 1, 1)
+_ORDINAL_EPOCA = _EPOCA.toordinal()
+_SEM_DATA = np.iinfo(np.int64).min
+
 
 # ──────────────────────────────────────────────────────────────────────────────
 # HELPERS INTERNOS
@@ -110,13 +191,46 @@ def _to_date(valor) -> Optional[date]:
         return None
 
 
+def _dias_das_datas(serie: pd.Series) -> np.ndarray:
+    """
+    [v6] `_to_date` para uma coluna inteira: cada valor vira a quantidade de
+    dias desde 1970-01-01 (int64), ou `_SEM_DATA` se vazio/inválido. O
+    caminho rápido é um `pd.to_datetime(..., errors="coerce")` nos textos
+    "AAAA-MM-DD" (os 10 primeiros caracteres, como no `_to_date`); o que
+    sobrar e ainda tiver cara de data (ex.: "20260105", que o
+    `date.fromisoformat` também aceita) passa pelo próprio `_to_date`.
+    """
+    dias = np.full(len(serie), _SEM_DATA, dtype=np.int64)
+    if dias.size == 0:
+        return dias
+    texto = serie.astype(str).str.strip().str.slice(0, 10)
+    # Só os textos com exatamente 10 caracteres: o `format` do pandas aceita
+    # mês/dia sem zero ("2026-1-5"), que o `date.fromisoformat` recusa.
+    convertidas = pd.to_datetime(texto.where(texto.str.len() == 10), format="%Y-%m-%d", errors="coerce")
+    ok = convertidas.notna().to_numpy()
+    dias[ok] = convertidas.to_numpy()[ok].astype("datetime64[D]").astype(np.int64)
+    resto = ~ok & ~texto.isin(("", "nan", "None", "NaT")).to_numpy()
+    for i in np.flatnonzero(resto):
+        d = _to_date(serie.iat[i])
+        if d is not None:
+            dias[i] = (d - _EPOCA).days
+    return dias
+
+
+def _data_do_dia(dias: int) -> date:
+    """Inverso de `_dias_das_datas` para um valor."""
+    return date.fromordinal(_ORDINAL_EPOCA + dias)
+
+
 def _pedidos_ativos(df_enc: pd.DataFrame, excluir_id: Optional[str] = None) -> pd.DataFrame:
     """Filtra apenas pedidos não cancelados, e remove o próprio pedido em edição."""
     if df_enc is None or df_enc.empty:
         return pd.DataFrame()
     df = df_enc.copy()
     if "cancelado" in df.columns:
-        df = df[df["cancelado"].astype(int) == 0]
+        # `_tipar` já entrega Int64; o `to_numeric` cobre DataFrames montados
+        # à mão (texto, None), com o mesmo padrão do esquema (0).
+        df = df[pd.to_numeric(df["cancelado"], errors="coerce").fillna(0) == 0]
     if excluir_id and "rowid" in df.columns:
         df = df[df["rowid"].astype(str) != str(excluir_id)]
     return df
@@ -134,6 +248,234 @@ def _sem_consertos(df: pd.DataFrame) -> pd.DataFrame:
     return df[~df["peca"].astype(str).str.startswith(PREFIXO_CONSERTO)]
 
 
+# ──────────────────────────────────────────────────────────────────────────────
+# ÍNDICE DE OCUPAÇÃO POR DIA  [v5]
+# ──────────────────────────────────────────────────────────────────────────────
+# Colunas que o índice lê — a assinatura de um retrato dos pedidos é o hash
+# só delas (mudar observação ou valor de um pedido não reindexa nada).
+_COLUNAS_OCUPACAO = ("rowid", "cancelado", "peca", "cliente", "data_confeccao",
+                     "data_prova", "tem_prova2", "data_prova2")
+_MAX_INDICES = 8
+
+# Chave de `DataFrame.attrs` com a geração da tabela em memória de onde a
+# cópia saiu — preenchida por `database._TabelaMemoria.visao` (lá:
+# `ATTR_GERACAO`). Texto, para não atrapalhar a conversão para Arrow.
+_ATTR_GERACAO = "lila_geracao"
+
+# A chave é a geração da tabela (ver `_assinatura`) ou o hash do conteúdo —
+# nunca a identidade do objeto.
+_indices: "OrderedDict[str, OcupacaoIndex]" = OrderedDict()
+_lock_indices = threading.Lock()
+
+
+class OcupacaoIndex:
+    """
+    Ocupação de cada dia por Confecção e por Provas, montada UMA vez a partir
+    de um retrato dos pedidos (ativos e sem consertos — as mesmas regras de
+    `_pedidos_ativos` + `_sem_consertos`):
+
+      confeccoes[dia]     → [(rowid, cliente), ...] na ordem dos pedidos
+      provas[dia]         → quantidade de provas (1ª e 2ª) no dia
+      provas_do_pedido    → rowid → datas de prova daquele pedido
+      confeccao_do_pedido → rowid → data(s) da confecção daquele pedido
+
+    `excluir_id` (o pedido em edição) é tratado descontando a contribuição
+    dele nas respostas, sem remontar nada.
+    """
+
+    def __init__(self, df_enc: pd.DataFrame):
+        self.confeccoes: dict[date, list] = {}
+        self.provas: dict[date, int] = {}
+        self.provas_do_pedido: dict[str, list] = {}
+        self.confeccao_do_pedido: dict[str, list] = {}
+        self._lotados: dict[int, frozenset] = {}
+        self._indisponiveis: Optional[list] = None
+        self._meses: dict[tuple, dict] = {}
+        # [v8] Os mesmos dias em forma de array ordenado (dias desde
+        # 1970-01-01) + quantidade, para fatiar um mês inteiro de uma vez.
+        self._dias_conf = self._qtd_conf = np.empty(0, dtype=np.int64)
+        self._dias_prova = self._qtd_prova = np.empty(0, dtype=np.int64)
+
+        df = _sem_consertos(_pedidos_ativos(df_enc))
+        if df.empty:
+            self.dias_confeccao = frozenset()
+            return
+        n = len(df)
+        coluna = lambda nome: _dias_das_datas(df[nome]) if nome in df.columns else np.full(n, _SEM_DATA)
+        conf, p1 = coluna("data_confeccao"), coluna("data_prova")
+        # [v6] A 2ª prova conta sempre que `data_prova2` for uma data válida:
+        # a regra antiga ("tem_prova2 marcado OU data_prova2 preenchida") já
+        # é verdadeira para qualquer data válida, que nunca é texto vazio.
+        p2 = coluna("data_prova2")
+        rowids = df["rowid"].astype(str).to_numpy() if "rowid" in df.columns else np.full(n, None)
+        clientes = df["cliente"].to_numpy() if "cliente" in df.columns else np.full(n, None)
+
+        # Provas por dia: uma contagem só, direto nos arrays.
+        todas = np.concatenate([p1[p1 != _SEM_DATA], p2[p2 != _SEM_DATA]])
+        dias, qtds = np.unique(todas, return_counts=True)
+        self.provas = dict(zip(map(_data_do_dia, dias.tolist()), qtds.tolist()))
+        self._dias_prova, self._qtd_prova = dias, qtds
+
+        com_conf = conf != _SEM_DATA
+        self._dias_conf, self._qtd_conf = np.unique(conf[com_conf], return_counts=True)
+
+        # Confecções e a contribuição de cada pedido: só as linhas com data.
+        for rid, cliente, d in zip(rowids[com_conf], clientes[com_conf], conf[com_conf].tolist()):
+            dc = _data_do_dia(d)
+            self.confeccoes.setdefault(dc, []).append((rid, str(cliente or "—")))
+            if rid is not None:
+                self.confeccao_do_pedido.setdefault(rid, []).append(dc)
+        if "rowid" in df.columns:
+            for p in (p1, p2):
+                com_prova = p != _SEM_DATA
+                for rid, d in zip(rowids[com_prova], p[com_prova].tolist()):
+                    self.provas_do_pedido.setdefault(rid, []).append(_data_do_dia(d))
+        self.dias_confeccao = frozenset(self.confeccoes)
+
+    # ── consultas por dia ───────────────────────────────────────────────────
+    def clientes_em_confeccao(self, dia: date, excluir_id: Optional[str] = None) -> list:
+        lista = self.confeccoes.get(dia)
+        if not lista:
+            return []
+        if excluir_id:
+            excluir_id = str(excluir_id)
+            return [cliente for rid, cliente in lista if rid != excluir_id]
+        return [cliente for _, cliente in lista]
+
+    def confeccoes_no_dia(self, dia: date, excluir_id: Optional[str] = None) -> int:
+        qtd = len(self.confeccoes.get(dia, ()))
+        if qtd and excluir_id:
+            qtd -= self.confeccao_do_pedido.get(str(excluir_id), []).count(dia)
+        return qtd
+
+    def provas_no_dia(self, dia: date, excluir_id: Optional[str] = None) -> int:
+        qtd = self.provas.get(dia, 0)
+        if qtd and excluir_id:
+            qtd -= self.provas_do_pedido.get(str(excluir_id), []).count(dia)
+        return qtd
+
+    # ── conjuntos de dias (mini-calendário) ─────────────────────────────────
+    def dias_confeccao_ocupados(self, excluir_id: Optional[str] = None) -> set:
+        dias = set(self.dias_confeccao)
+        if excluir_id:
+            for d in set(self.confeccao_do_pedido.get(str(excluir_id), ())):
+                if self.confeccoes_no_dia(d, excluir_id) == 0:
+                    dias.discard(d)
+        return dias
+
+    def dias_com_provas_lotadas(self, excluir_id: Optional[str] = None,
+                                limite: int = LIMITE_PROVAS_PARA_CONFECCAO) -> set:
+        lotados = self._lotados.get(limite)
+        if lotados is None:
+            lotados = self._lotados[limite] = frozenset(d for d, q in self.provas.items() if q > limite)
+        dias = set(lotados)
+        if excluir_id:
+            for d in set(self.provas_do_pedido.get(str(excluir_id), ())):
+                if d in dias and self.provas_no_dia(d, excluir_id) <= limite:
+                    dias.discard(d)
+        return dias
+
+    def dias_indisponiveis(self, excluir_id: Optional[str] = None) -> list:
+        """
+        [v7] Dias (em número de dias desde 1970-01-01, ORDENADOS) em que
+        `validar_data_confeccao` NÃO daria "ok": já têm confecção ou têm
+        provas demais. É a estrutura que `sugerir_datas_confeccao` percorre
+        com busca binária.
+        """
+        if excluir_id:
+            dias = self.dias_confeccao_ocupados(excluir_id) | self.dias_com_provas_lotadas(excluir_id)
+            return sorted((d - _EPOCA).days for d in dias)
+        if self._indisponiveis is None:
+            dias = self.dias_confeccao | self.dias_com_provas_lotadas()
+            self._indisponiveis = sorted((d - _EPOCA).days for d in dias)
+        return self._indisponiveis
+
+    # ── mês inteiro (mini-calendário) ───────────────────────────────────────
+    def status_mes(self, ano: int, mes: int, excluir_id: Optional[str] = None,
+                   limite: int = LIMITE_PROVAS_PARA_CONFECCAO) -> dict:
+        """
+        [v8] {date: {"status", "confeccoes", "provas"}} para TODOS os dias do
+        mês, com as mesmas contas de `validar_data_confeccao`. Guardado por
+        (ano, mês, excluir_id, limite) — o resultado é compartilhado entre
+        as telas, então não deve ser alterado por quem chama.
+        """
+        chave = (ano, mes, str(excluir_id) if excluir_id else None, limite)
+        pronto = self._meses.get(chave)
+        if pronto is not None:
+            return pronto
+
+        inicio = (date(ano, mes, 1) - _EPOCA).days
+        qtd_dias = calendar.monthrange(ano, mes)[1]
+        confeccoes = _contagem_do_periodo(self._dias_conf, self._qtd_conf, inicio, qtd_dias)
+        provas = _contagem_do_periodo(self._dias_prova, self._qtd_prova, inicio, qtd_dias)
+        if excluir_id:
+            # Desconta a contribuição do pedido em edição, como em `*_no_dia`.
+            for origem, destino in ((self.confeccao_do_pedido, confeccoes),
+                                    (self.provas_do_pedido, provas)):
+                for d in origem.get(str(excluir_id), ()):
+                    pos = (d - _EPOCA).days - inicio
+                    if 0 <= pos < qtd_dias:
+                        destino[pos] -= 1
+
+        status = np.where(provas > limite, "bloqueado",
+                          np.where(confeccoes > 0, "confirmar", "ok"))
+        resultado = {
+            date(ano, mes, i + 1): {"status": st, "confeccoes": c, "provas": p}
+            for i, (st, c, p) in enumerate(zip(status.tolist(), confeccoes.tolist(), provas.tolist()))
+        }
+        self._meses[chave] = resultado
+        return resultado
+
+
+def _contagem_do_periodo(dias: np.ndarray, qtds: np.ndarray, inicio: int, qtd_dias: int) -> np.ndarray:
+    """Contagem por dia em [inicio, inicio + qtd_dias), a partir de (dias ordenados, quantidades)."""
+    saida = np.zeros(qtd_dias, dtype=np.int64)
+    a, b = np.searchsorted(dias, [inicio, inicio + qtd_dias])
+    saida[dias[a:b] - inicio] = qtds[a:b]
+    return saida
+
+
+def _assinatura(df_enc: pd.DataFrame, colunas_indice: tuple = _COLUNAS_OCUPACAO) -> str:
+    """
+    Mesmos pedidos → mesma assinatura. Numa cópia que o database.py acabou
+    de devolver, é a geração da tabela gravada em `attrs[_ATTR_GERACAO]`
+    (termina com o `id` do índice daquela cópia): custa uma comparação.
+    Um DataFrame derivado herda os `attrs`, mas filtro, ordenação, `assign`
+    ou `concat` criam outro índice — e aí, como em qualquer DataFrame que
+    não veio de uma tabela, vale o hash das colunas que o índice usa.
+    """
+    colunas = [c for c in colunas_indice if c in df_enc.columns]
+    if not colunas:
+        return f"vazio:{len(df_enc)}"
+    geracao = df_enc.attrs.get(_ATTR_GERACAO)
+    sufixo = f"@{id(df_enc.index)}"
+    if isinstance(geracao, str) and geracao.endswith(sufixo):
+        return f"geracao:{geracao[:-len(sufixo)]}:{len(df_enc)}:{','.join(colunas)}"
+    hashes = pd.util.hash_pandas_object(df_enc[colunas], index=False).to_numpy()
+    return hashlib.blake2b(hashes.tobytes() + ",".join(colunas).encode(), digest_size=16).hexdigest()
+
+
+def indice_ocupacao(df_enc: pd.DataFrame) -> OcupacaoIndex:
+    """
+    `OcupacaoIndex` do retrato `df_enc`, reaproveitado enquanto os pedidos
+    forem os mesmos (guarda os últimos `_MAX_INDICES` retratos).
+    """
+    if df_enc is None or df_enc.empty:
+        return OcupacaoIndex(pd.DataFrame())
+    chave = _assinatura(df_enc)
+    with _lock_indices:
+        indice = _indices.get(chave)
+        if indice is not None:
+            _indices.move_to_end(chave)
+            return indice
+    indice = OcupacaoIndex(df_enc)
+    with _lock_indices:
+        _indices[chave] = indice
+        while len(_indices) > _MAX_INDICES:
+            _indices.popitem(last=False)
+    return indice
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # REGRA 1 — DATA DA CONFECÇÃO (exclusividade → agora vira confirmação sim/não)
 # ──────────────────────────────────────────────────────────────────────────────
@@ -146,19 +488,12 @@ def clientes_em_confeccao_no_dia(df_enc: pd.DataFrame, data_alvo: date, excluir_
     dia deixou de ser um bloqueio e virou uma confirmação sim/não — a
     tela usa esta lista para montar a mensagem de confirmação.
     """
-    df = _sem_consertos(_pedidos_ativos(df_enc, excluir_id))
-    if df.empty or "data_confeccao" not in df.columns:
-        return []
-    lista = []
-    for _, row in df.iterrows():
-        if _to_date(row.get("data_confeccao")) == data_alvo:
-            lista.append(str(row.get("cliente") or "—"))
-    return lista
+    return indice_ocupacao(df_enc).clientes_em_confeccao(data_alvo, excluir_id)
 
 
 def contar_confeccoes_no_dia(df_enc: pd.DataFrame, data_alvo: date, excluir_id: Optional[str] = None) -> int:
     """Quantidade de encomendas (não-Conserto) já marcadas para confecção em `data_alvo`."""
-    return len(clientes_em_confeccao_no_dia(df_enc, data_alvo, excluir_id))
+    return indice_ocupacao(df_enc).confeccoes_no_dia(data_alvo, excluir_id)
 
 
 def confeccao_ocupada_em(df_enc: pd.DataFrame, data_alvo: date, excluir_id: Optional[str] = None) -> Optional[str]:
@@ -182,12 +517,7 @@ def dias_confeccao_ocupados(df_enc: pd.DataFrame, excluir_id: Optional[str] = No
     significa mais que esses dias estão bloqueados, já que agora é
     possível confirmar mais uma encomenda no mesmo dia.
     """
-    df = _sem_consertos(_pedidos_ativos(df_enc, excluir_id))
-    if df.empty or "data_confeccao" not in df.columns:
-        return set()
-    datas = {_to_date(v) for v in df["data_confeccao"]}
-    datas.discard(None)
-    return datas
+    return indice_ocupacao(df_enc).dias_confeccao_ocupados(excluir_id)
 
 
 def validar_data_confeccao(
@@ -195,6 +525,7 @@ def validar_data_confeccao(
     data_alvo: date,
     excluir_id: Optional[str] = None,
     confirmar_duplicidade: bool = False,
+    capacidade: Optional["CapacidadeHoras"] = None,
 ):
     """
     Valida se `data_alvo` pode ser usada como Data da Confecção.
@@ -214,14 +545,19 @@ def validar_data_confeccao(
     direto por `mod_prospect.py`, sem passar por aqui) — mas mesmo que
     fosse, os Consertos já cadastrados não contam como ocupação nem como
     prova (ver `_sem_consertos`).
+
+    [v9] Com `capacidade` (ver `indice_capacidade`), um dia em que as horas
+    já agendadas + `HORAS_CONFECCAO` passariam do orçamento diário também
+    vira "confirmar" — junto com a duplicidade, numa pergunta só.
     """
     if data_alvo is None:
         return "ok", ""
+    indice = indice_ocupacao(df_enc)
 
     # Regra 2 — limite de provas: continua sendo bloqueio definitivo,
     # sem opção de confirmação, e é checada mesmo se o usuário já
     # confirmou a duplicidade de encomendas.
-    qtd_provas = contar_provas_no_dia(df_enc, data_alvo, excluir_id)
+    qtd_provas = indice.provas_no_dia(data_alvo, excluir_id)
     if qtd_provas > LIMITE_PROVAS_PARA_CONFECCAO:
         return "bloqueado", (
             f"❌ O dia {data_alvo.strftime('%d/%m/%Y')} já tem {qtd_provas} provas marcadas "
@@ -231,18 +567,105 @@ def validar_data_confeccao(
 
     # Regra 1 — duas (ou mais) encomendas no mesmo dia: agora é só uma
     # confirmação sim/não, não bloqueio nem senha.
-    if not confirmar_duplicidade:
-        qtd_confeccoes = contar_confeccoes_no_dia(df_enc, data_alvo, excluir_id)
-        if qtd_confeccoes > 0:
-            plural = "encomenda" if qtd_confeccoes == 1 else "encomendas"
-            return "confirmar", (
-                f"⚠️ O dia {data_alvo.strftime('%d/%m/%Y')} já tem {qtd_confeccoes} {plural} "
-                f"marcada(s) para confecção. Deseja marcar mais uma encomenda para esse mesmo dia?"
+    if confirmar_duplicidade:
+        return "ok", ""
+    avisos = []
+    qtd_confeccoes = indice.confeccoes_no_dia(data_alvo, excluir_id)
+    if qtd_confeccoes > 0:
+        plural = "encomenda" if qtd_confeccoes == 1 else "encomendas"
+        avisos.append(
+            f"⚠️ O dia {data_alvo.strftime('%d/%m/%Y')} já tem {qtd_confeccoes} {plural} "
+            f"marcada(s) para confecção."
+        )
+    # Regra 5 — capacidade em horas: também só uma confirmação.
+    if capacidade is not None:
+        horas = capacidade.horas_no_dia(data_alvo, excluir_id)
+        if horas + HORAS_CONFECCAO > capacidade.horas_dia:
+            avisos.append(
+                f"⏱️ O dia {data_alvo.strftime('%d/%m/%Y')} já tem {_fmt_horas(horas)} de trabalho "
+                f"agendado; com a confecção ({_fmt_horas(HORAS_CONFECCAO)}) passa da capacidade de "
+                f"{_fmt_horas(capacidade.horas_dia)} por dia."
             )
+    if avisos:
+        return "confirmar", " ".join(avisos) + " Deseja marcar mais uma encomenda para esse mesmo dia?"
 
     return "ok", ""
 
 
+def sugerir_datas_confeccao(
+    df_enc: pd.DataFrame,
+    a_partir_de: date,
+    n: int = 5,
+    respeitar_fins_de_semana: bool = True,
+    excluir_id: Optional[str] = None,
+    capacidade: Optional["CapacidadeHoras"] = None,
+) -> list:
+    """
+    [v7] As próximas `n` datas, a partir de `a_partir_de` (inclusive), que
+    passam LIVRES em `validar_data_confeccao` (status "ok": nenhuma
+    confecção marcada e no máximo `LIMITE_PROVAS_PARA_CONFECCAO` provas).
+    Com `respeitar_fins_de_semana`, sábados e domingos não são sugeridos.
+
+    Anda pelos dias indisponíveis já ordenados do `OcupacaoIndex` (busca
+    binária para achar o ponto de partida), então o custo depende só de
+    quantos dias seguidos estão ocupados a partir dali — não da quantidade
+    de pedidos cadastrados.
+
+    [v9] Com `capacidade`, os dias que passariam do orçamento de horas com
+    a confecção também ficam de fora. Se o orçamento diário é menor que uma
+    confecção (`HORAS_CONFECCAO`), nenhum dia passa livre e a lista volta
+    vazia — quem mostra as sugestões explica o motivo.
+    """
+    if n <= 0 or a_partir_de is None:
+        return []
+    if capacidade is not None and capacidade.horas_dia < HORAS_CONFECCAO:
+        return []
+    indisponiveis = indice_ocupacao(df_enc).dias_indisponiveis(excluir_id)
+    if capacidade is not None:
+        cheios = capacidade.dias_sem_folga(HORAS_CONFECCAO, excluir_id)
+        if cheios:
+            indisponiveis = sorted(set(indisponiveis).union(cheios))
+    dia = (a_partir_de - _EPOCA).days
+    i = bisect.bisect_left(indisponiveis, dia)
+    sugestoes = []
+    while len(sugestoes) < n:
+        if i < len(indisponiveis) and indisponiveis[i] == dia:
+            i += 1
+        else:
+            candidata = _data_do_dia(dia)
+            if not (respeitar_fins_de_semana and candidata.weekday() >= 5):
+                sugestoes.append(candidata)
+        dia += 1
+    return sugestoes
+
+
+def status_mes(df_enc: pd.DataFrame, ano: int, mes: int, excluir_id: Optional[str] = None,
+               capacidade: Optional["CapacidadeHoras"] = None) -> dict:
+    """
+    [v8] Status de Confecção de cada dia do mês, numa conta só:
+      {date: {"status": "ok" | "confirmar" | "bloqueado",
+              "confeccoes": int, "provas": int}}
+    `status` é o mesmo que `validar_data_confeccao` devolveria para o dia.
+    Guardado junto do `OcupacaoIndex` do retrato dos pedidos: enquanto os
+    pedidos não mudam, o mesmo mês não é recalculado.
+
+    [v9] Com `capacidade`, cada dia traz também "horas", "utilizacao" e
+    "sem_folga" (a confecção passaria do orçamento), e um dia "ok" sem folga
+    vira "confirmar" — de novo igual a `validar_data_confeccao`.
+    """
+    base = indice_ocupacao(df_enc).status_mes(ano, mes, excluir_id)
+    if capacidade is None:
+        return base
+    horas = capacidade.mes(ano, mes, excluir_id)
+    resultado = {}
+    for dia, info in base.items():
+        h = horas[dia]
+        sem_folga = h["horas"] + HORAS_CONFECCAO > capacidade.horas_dia
+        status = "confirmar" if sem_folga and info["status"] == "ok" else info["status"]
+        resultado[dia] = {**info, **h, "status": status, "sem_folga": sem_folga}
+    return resultado
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # CONTAGEM DE PROVAS (sem limite — usada só para decidir o bloqueio de Confecção)
 # ──────────────────────────────────────────────────────────────────────────────
@@ -255,17 +678,9 @@ def contar_provas_no_dia(df_enc: pd.DataFrame, data_alvo: date, excluir_id: Opti
     contagem serve apenas para decidir se o dia bloqueia (ou não) a Data
     da Confecção, em `validar_data_confeccao`.
     """
-    df = _sem_consertos(_pedidos_ativos(df_enc, excluir_id))
-    if df.empty or data_alvo is None:
+    if data_alvo is None:
         return 0
-    total = 0
-    for _, row in df.iterrows():
-        if _to_date(row.get("data_prova")) == data_alvo:
-            total += 1
-        tem_p2 = bool(int(row.get("tem_prova2", 0) or 0)) or bool(str(row.get("data_prova2") or "").strip())
-        if tem_p2 and _to_date(row.get("data_prova2")) == data_alvo:
-            total += 1
-    return total
+    return indice_ocupacao(df_enc).provas_no_dia(data_alvo, excluir_id)
 
 
 def dias_com_provas_lotadas(df_enc: pd.DataFrame, excluir_id: Optional[str] = None,
@@ -277,20 +692,7 @@ def dias_com_provas_lotadas(df_enc: pd.DataFrame, excluir_id: Optional[str] = No
     neste conjunto (continua liberado para confecção). Registros de
     Conserto não entram nesta contagem.
     """
-    df = _sem_consertos(_pedidos_ativos(df_enc, excluir_id))
-    if df.empty:
-        return set()
-    contagem: dict = {}
-    for _, row in df.iterrows():
-        d1 = _to_date(row.get("data_prova"))
-        if d1:
-            contagem[d1] = contagem.get(d1, 0) + 1
-        tem_p2 = bool(int(row.get("tem_prova2", 0) or 0)) or bool(str(row.get("data_prova2") or "").strip())
-        if tem_p2:
-            d2 = _to_date(row.get("data_prova2"))
-            if d2:
-                contagem[d2] = contagem.get(d2, 0) + 1
-    return {d for d, qtd in contagem.items() if qtd > limite}
+    return indice_ocupacao(df_enc).dias_com_provas_lotadas(excluir_id, limite)
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -317,23 +719,186 @@ def pedidos_com_entrega_proxima(df_enc: pd.DataFrame, hoje: date, dias_anteceden
 
     df = df_enc.copy()
     if "cancelado" in df.columns:
-        df = df[df["cancelado"].astype(int) == 0]
+        df = df[pd.to_numeric(df["cancelado"], errors="coerce").fillna(0) == 0]
     if "etapa" in df.columns:
-        df = df[df["etapa"].astype(int) < ETAPA_CONCLUIDO]
+        df = df[pd.to_numeric(df["etapa"], errors="coerce").fillna(1) < ETAPA_CONCLUIDO]
     if df.empty or "data_entrega" not in df.columns:
         return pd.DataFrame()
 
-    def _dias_ate(v):
-        d = _to_date(v)
-        if d is None:
-            return None
-        return (d - hoje).days
-
-    df = df.assign(_dias_restantes=df["data_entrega"].apply(_dias_ate))
-    df = df[df["_dias_restantes"].notna()]
+    entrega = _dias_das_datas(df["data_entrega"])
+    com_data = entrega != _SEM_DATA
+    restantes = np.where(com_data, entrega, 0) - (hoje - _EPOCA).days
+    # Mesmo tipo de coluna que o antigo `.apply` dava: int sem buracos,
+    # float com NaN onde não há data, object se nenhuma linha tiver data.
+    if com_data.all():
+        df = df.assign(_dias_restantes=restantes)
+    elif com_data.any():
+        df = df.assign(_dias_restantes=np.where(com_data, restantes, np.nan))
+    else:
+        df = df.assign(_dias_restantes=pd.Series([None] * len(df), index=df.index, dtype=object))
+    df = df[com_data]
     if df.empty:
         return df
     df = df[df["_dias_restantes"] <= dias_antecedencia]
     if df.empty:
         return df
     return df.sort_values("_dias_restantes", ascending=True)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# REGRA 5 — CAPACIDADE EM HORAS POR DIA  [v9]
+# ──────────────────────────────────────────────────────────────────────────────
+# Colunas do cronograma que entram na assinatura do índice de capacidade.
+_COLUNAS_CAPACIDADE = ("data", "horas", "concluida", "encomenda_id")
+
+# Guardados pela assinatura do cronograma + orçamento, sob `_lock_indices`.
+_capacidades: "OrderedDict[str, CapacidadeHoras]" = OrderedDict()
+
+
+def _fmt_horas(horas: float) -> str:
+    return f"{horas:.1f}".replace(".", ",") + "h"
+
+
+class CapacidadeHoras:
+    """
+    Horas de trabalho agendadas por dia (tarefas do cronograma ainda não
+    concluídas) contra um orçamento de `horas_dia`. Tudo é calculado UMA vez,
+    sobre o intervalo contínuo de dias entre a primeira e a última tarefa
+    (limitado a `_JANELA_CAPACIDADE_DIAS` de hoje para cada lado):
+
+      horas[i]       → horas agendadas em `inicio + i` dias desde 1970-01-01
+      utilizacao[i]  → horas[i] / horas_dia (1,0 = dia cheio)
+      sobrecarga[i]  → horas[i] > horas_dia
+      avulsos        → dia → horas, para as datas fora da janela
+      horas_do_pedido → encomenda_id → [(dia, horas), ...] daquele pedido
+
+    Fora do intervalo e de `avulsos`, o dia tem 0 h. `excluir_id` (o pedido em edição)
+    desconta as horas das tarefas daquele pedido, sem remontar nada.
+    """
+
+    def __init__(self, df_crono: pd.DataFrame, horas_dia: float = CAPACIDADE_HORAS_DIA_PADRAO):
+        self.horas_dia = float(horas_dia) if horas_dia and horas_dia > 0 else CAPACIDADE_HORAS_DIA_PADRAO
+        self.assinatura = ""
+        self.inicio = 0
+        self.horas = np.zeros(0)
+        self.avulsos: dict[int, float] = {}
+        self.horas_do_pedido: dict[str, list] = {}
+        self._meses: dict[tuple, dict] = {}
+        self._sem_folga: dict[tuple, list] = {}
+
+        df = df_crono if df_crono is not None else pd.DataFrame()
+        if not df.empty and "concluida" in df.columns:
+            df = df[pd.to_numeric(df["concluida"], errors="coerce").fillna(0) != 1]
+        if df.empty or "data" not in df.columns or "horas" not in df.columns:
+            self._calcular_series()
+            return
+        dias = _dias_das_datas(df["data"])
+        horas = pd.to_numeric(df["horas"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+        validos = dias != _SEM_DATA
+        dias, horas = dias[validos], horas[validos]
+        hoje = (date.today() - _EPOCA).days
+        na_janela = np.abs(dias - hoje) <= _JANELA_CAPACIDADE_DIAS
+        if na_janela.any():
+            self.inicio = int(dias[na_janela].min())
+            self.horas = np.bincount(dias[na_janela] - self.inicio, weights=horas[na_janela])
+        if not na_janela.all():
+            fora, posicao = np.unique(dias[~na_janela], return_inverse=True)
+            somas = np.bincount(posicao, weights=horas[~na_janela])
+            self.avulsos = dict(zip(fora.tolist(), somas.tolist()))
+        if "encomenda_id" in df.columns:
+            ids = df["encomenda_id"].fillna("").astype(str).to_numpy()[validos]
+            com_pedido = ids != ""
+            for eid, d, h in zip(ids[com_pedido], dias[com_pedido].tolist(), horas[com_pedido].tolist()):
+                self.horas_do_pedido.setdefault(eid, []).append((d, h))
+        self._calcular_series()
+
+    def _calcular_series(self) -> None:
+        self.utilizacao = self.horas / self.horas_dia
+        self.sobrecarga = self.horas > self.horas_dia
+
+    # ── consultas ───────────────────────────────────────────────────────────
+    def periodo(self, inicio: int, qtd_dias: int, excluir_id: Optional[str] = None) -> np.ndarray:
+        """Horas de cada dia em [inicio, inicio + qtd_dias) (dias desde 1970-01-01)."""
+        saida = np.zeros(qtd_dias)
+        a = max(inicio, self.inicio)
+        b = min(inicio + qtd_dias, self.inicio + len(self.horas))
+        if a < b:
+            saida[a - inicio:b - inicio] = self.horas[a - self.inicio:b - self.inicio]
+        for d, h in self.avulsos.items():
+            if inicio <= d < inicio + qtd_dias:
+                saida[d - inicio] += h
+        if excluir_id:
+            for d, h in self.horas_do_pedido.get(str(excluir_id), ()):
+                if inicio <= d < inicio + qtd_dias:
+                    saida[d - inicio] -= h
+        return saida
+
+    def horas_no_dia(self, dia: date, excluir_id: Optional[str] = None) -> float:
+        return float(self.periodo((dia - _EPOCA).days, 1, excluir_id)[0])
+
+    def utilizacao_no_dia(self, dia: date, excluir_id: Optional[str] = None) -> float:
+        return self.horas_no_dia(dia, excluir_id) / self.horas_dia
+
+    def mes(self, ano: int, mes: int, excluir_id: Optional[str] = None) -> dict:
+        """
+        {date: {"horas", "utilizacao", "sobrecarga"}} para todos os dias do
+        mês. Guardado por (ano, mês, excluir_id) — não alterar o resultado.
+        """
+        chave = (ano, mes, str(excluir_id) if excluir_id else None)
+        pronto = self._meses.get(chave)
+        if pronto is not None:
+            return pronto
+        inicio = (date(ano, mes, 1) - _EPOCA).days
+        horas = self.periodo(inicio, calendar.monthrange(ano, mes)[1], excluir_id)
+        resultado = {
+            date(ano, mes, i + 1): {"horas": h, "utilizacao": h / self.horas_dia,
+                                    "sobrecarga": h > self.horas_dia}
+            for i, h in enumerate(horas.tolist())
+        }
+        self._meses[chave] = resultado
+        return resultado
+
+    def dias_sem_folga(self, horas_extra: float, excluir_id: Optional[str] = None) -> list:
+        """Dias (desde 1970-01-01, ordenados) em que `horas_extra` a mais passariam do orçamento."""
+        chave = (horas_extra, str(excluir_id) if excluir_id else None)
+        pronto = self._sem_folga.get(chave)
+        if pronto is not None:
+            return pronto
+        horas = self.periodo(self.inicio, len(self.horas), excluir_id)
+        dias = (np.flatnonzero(horas + horas_extra > self.horas_dia) + self.inicio).tolist()
+        if self.avulsos:
+            dias = sorted(dias + [d for d in self.avulsos
+                                  if self.periodo(d, 1, excluir_id)[0] + horas_extra > self.horas_dia])
+        self._sem_folga[chave] = dias
+        return dias
+
+    def serie(self) -> pd.DataFrame:
+        """As séries já calculadas, indexadas pela data (uma linha por dia do intervalo; sem os avulsos)."""
+        indice = pd.date_range(_data_do_dia(self.inicio), periods=len(self.horas), freq="D")
+        return pd.DataFrame(
+            {"horas": self.horas, "utilizacao": self.utilizacao, "sobrecarga": self.sobrecarga},
+            index=indice,
+        )
+
+
+def indice_capacidade(df_crono: pd.DataFrame, horas_dia: float = CAPACIDADE_HORAS_DIA_PADRAO) -> CapacidadeHoras:
+    """
+    `CapacidadeHoras` do cronograma `df_crono` (tarefas pendentes; as
+    concluídas são ignoradas) para o orçamento `horas_dia`, reaproveitado
+    enquanto as tarefas e o orçamento forem os mesmos.
+    """
+    if df_crono is None or df_crono.empty:
+        return CapacidadeHoras(pd.DataFrame(), horas_dia)
+    chave = f"{_assinatura(df_crono, _COLUNAS_CAPACIDADE)}:{float(horas_dia or 0)}"
+    with _lock_indices:
+        indice = _capacidades.get(chave)
+        if indice is not None:
+            _capacidades.move_to_end(chave)
+            return indice
+    indice = CapacidadeHoras(df_crono, horas_dia)
+    indice.assinatura = chave
+    with _lock_indices:
+        _capacidades[chave] = indice
+        while len(_capacidades) > _MAX_INDICES:
+            _capacidades.popitem(last=False)
+    return indice
@@ -0,0 +1,388 @@
+"""
+tests/test_regras_agenda_datas.py — Lila Closet Atelier
+─────────────────────────────────────────────────────────────────────────────
+As regras de `modulos/regras_agenda.py` trocaram o `_to_date` linha a linha
+por colunas de dias (`_dias_das_datas`) e máscaras NumPy [v6]. Estes testes
+guardam a implementação ANTIGA (linha a linha, copiada da versão anterior
+ao v5) como oráculo e comparam as duas sobre DataFrames gerados com semente
+fixa: datas em texto (válidas, fora do formato, inválidas), vazios, None,
+NaN, `date`/`datetime`/`Timestamp`, `tem_prova2` ligado e desligado,
+cancelados, Consertos e `excluir_id`.
+
+Rodar da raiz do projeto:  python -m pytest -q
+"""
+
+import datetime
+import random
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modulos import regras_agenda as ra
+
+SEMENTES = range(40)
+HOJE = date(2026, 3, 10)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# ORÁCULO — a implementação linha a linha de antes do índice/máscaras
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _to_date(valor) -> Optional[date]:
+    if valor is None:
+        return None
+    if isinstance(valor, datetime.datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    s = str(valor).strip()
+    if not s or s.lower() == "nan":
+        return None
+    try:
+        return date.fromisoformat(s[:10])
+    except ValueError:
+        return None
+
+
+def _ativos(df_enc: pd.DataFrame, excluir_id: Optional[str] = None) -> pd.DataFrame:
+    if df_enc is None or df_enc.empty:
+        return pd.DataFrame()
+    df = df_enc.copy()
+    if "cancelado" in df.columns:
+        df = df[df["cancelado"] == 0]
+    if excluir_id and "rowid" in df.columns:
+        df = df[df["rowid"].astype(str) != str(excluir_id)]
+    if df.empty or "peca" not in df.columns:
+        return df
+    return df[~df["peca"].astype(str).str.startswith(ra.PREFIXO_CONSERTO)]
+
+
+def _tem_prova2(row) -> bool:
+    return bool(int(row.get("tem_prova2", 0) or 0)) or bool(str(row.get("data_prova2") or "").strip())
+
+
+def antigo_clientes_em_confeccao(df_enc, data_alvo, excluir_id=None) -> list:
+    df = _ativos(df_enc, excluir_id)
+    if df.empty or "data_confeccao" not in df.columns:
+        return []
+    return [str(row.get("cliente") or "—") for _, row in df.iterrows()
+            if _to_date(row.get("data_confeccao")) == data_alvo]
+
+
+def antigo_dias_confeccao_ocupados(df_enc, excluir_id=None) -> set:
+    df = _ativos(df_enc, excluir_id)
+    if df.empty or "data_confeccao" not in df.columns:
+        return set()
+    datas = {_to_date(v) for v in df["data_confeccao"]}
+    datas.discard(None)
+    return datas
+
+
+def antigo_contar_provas(df_enc, data_alvo, excluir_id=None) -> int:
+    df = _ativos(df_enc, excluir_id)
+    if df.empty or data_alvo is None:
+        return 0
+    total = 0
+    for _, row in df.iterrows():
+        if _to_date(row.get("data_prova")) == data_alvo:
+            total += 1
+        if _tem_prova2(row) and _to_date(row.get("data_prova2")) == data_alvo:
+            total += 1
+    return total
+
+
+def antigo_dias_provas_lotadas(df_enc, excluir_id=None, limite=ra.LIMITE_PROVAS_PARA_CONFECCAO) -> set:
+    df = _ativos(df_enc, excluir_id)
+    if df.empty:
+        return set()
+    contagem: dict = {}
+    for _, row in df.iterrows():
+        d1 = _to_date(row.get("data_prova"))
+        if d1:
+            contagem[d1] = contagem.get(d1, 0) + 1
+        if _tem_prova2(row):
+            d2 = _to_date(row.get("data_prova2"))
+            if d2:
+                contagem[d2] = contagem.get(d2, 0) + 1
+    return {d for d, qtd in contagem.items() if qtd > limite}
+
+
+def antigo_validar(df_enc, data_alvo, excluir_id=None, confirmar_duplicidade=False):
+    if data_alvo is None:
+        return "ok", ""
+    qtd_provas = antigo_contar_provas(df_enc, data_alvo, excluir_id)
+    if qtd_provas > ra.LIMITE_PROVAS_PARA_CONFECCAO:
+        return "bloqueado", (
+            f"❌ O dia {data_alvo.strftime('%d/%m/%Y')} já tem {qtd_provas} provas marcadas "
+            f"(mais de {ra.LIMITE_PROVAS_PARA_CONFECCAO}) e por isso não pode receber confecção. "
+            f"Escolha outro dia para a Confecção."
+        )
+    if not confirmar_duplicidade:
+        qtd = len(antigo_clientes_em_confeccao(df_enc, data_alvo, excluir_id))
+        if qtd > 0:
+            plural = "encomenda" if qtd == 1 else "encomendas"
+            return "confirmar", (
+                f"⚠️ O dia {data_alvo.strftime('%d/%m/%Y')} já tem {qtd} {plural} "
+                f"marcada(s) para confecção. Deseja marcar mais uma encomenda para esse mesmo dia?"
+            )
+    return "ok", ""
+
+
+def antigo_entrega_proxima(df_enc, hoje, dias_antecedencia) -> pd.DataFrame:
+    if df_enc is None or df_enc.empty:
+        return pd.DataFrame()
+    df = df_enc.copy()
+    if "cancelado" in df.columns:
+        df = df[df["cancelado"] == 0]
+    if "etapa" in df.columns:
+        df = df[df["etapa"] < ra.ETAPA_CONCLUIDO]
+    if df.empty or "data_entrega" not in df.columns:
+        return pd.DataFrame()
+
+    def _dias_ate(v):
+        d = _to_date(v)
+        if d is None:
+            return None
+        return (d - hoje).days
+
+    df = df.assign(_dias_restantes=df["data_entrega"].apply(_dias_ate))
+    df = df[df["_dias_restantes"].notna()]
+    if df.empty:
+        return df
+    df = df[df["_dias_restantes"] <= dias_antecedencia]
+    if df.empty:
+        return df
+    return df.sort_values("_dias_restantes", ascending=True)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# GERADOR
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _valor_de_data(rng: random.Random, base: date, janela: int = 12):
+    """Uma "data" como ela pode chegar do Firestore / dos formulários."""
+    d = base + timedelta(days=rng.randint(0, janela))
+    return rng.choice([
+        d.isoformat(), d.isoformat(), d.isoformat(),
+        f"{d.isoformat()}T10:30:00",
+        f" {d.isoformat()} ",
+        f"{d.year}-{d.month}-{d.day}",          # fora do formato AAAA-MM-DD
+        d, datetime.datetime(d.year, d.month, d.day, 15, 0), pd.Timestamp(d),
+        "", "  ", "nan", "NaN", None, float("nan"),
+        "2026-02-30", "sem data", "31/12/2026",
+    ])
+
+
+def _gerar_pedidos(semente: int, n: Optional[int] = None) -> pd.DataFrame:
+    rng = random.Random(semente)
+    n = rng.randint(0, 40) if n is None else n
+    base = HOJE - timedelta(days=3)
+    linhas = []
+    for i in range(n):
+        tem_p2 = rng.choice([0, 1, None, ""])
+        linhas.append({
+            "rowid": f"enc{i:03d}",
+            "cliente": rng.choice(["Ana", "Bia", "Carla", "", None]),
+            "peca": rng.choice(["Vestido", "Saia", f"{ra.PREFIXO_CONSERTO} Barra", None]),
+            "cancelado": rng.choice([0, 0, 0, 1]),
+            "etapa": rng.randint(1, 4),
+            "data_confeccao": _valor_de_data(rng, base),
+            "data_prova": _valor_de_data(rng, base),
+            "tem_prova2": tem_p2,
+            "data_prova2": _valor_de_data(rng, base) if rng.random() < 0.7 else rng.choice(["", None]),
+            "data_entrega": _valor_de_data(rng, base, janela=20),
+        })
+    df = pd.DataFrame(linhas)
+    if not df.empty:
+        # Como no Firestore, `tem_prova2` ausente chega como None, não como NaN
+        # (o `int(row.get(...) or 0)` do oráculo quebraria com NaN).
+        df["tem_prova2"] = pd.Series([l["tem_prova2"] for l in linhas], dtype=object)
+    return df
+
+
+def _excluir_ids(df: pd.DataFrame, semente: int) -> list:
+    rng = random.Random(semente)
+    ids = list(df["rowid"]) if not df.empty else []
+    return [None, "nao-existe"] + rng.sample(ids, min(3, len(ids)))
+
+
+def _dias_do_periodo() -> list:
+    inicio = HOJE - timedelta(days=5)
+    return [inicio + timedelta(days=i) for i in range(25)]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# TESTES
+# ──────────────────────────────────────────────────────────────────────────────
+
+def test_dias_das_datas_igual_ao_to_date():
+    rng = random.Random(0)
+    valores = [_valor_de_data(rng, HOJE) for _ in range(500)]
+    dias = ra._dias_das_datas(pd.Series(valores, dtype=object))
+    for valor, dia in zip(valores, dias.tolist()):
+        esperado = _to_date(valor)
+        obtido = None if dia == ra._SEM_DATA else ra._data_do_dia(dia)
+        assert obtido == esperado, valor
+
+
+def test_dias_das_datas_coluna_datetime():
+    serie = pd.Series([pd.Timestamp("2026-03-01"), pd.Timestamp("2026-03-15 18:00")])
+    assert serie.dtype.kind == "M"
+    assert [ra._data_do_dia(d) for d in ra._dias_das_datas(serie).tolist()] == [
+        date(2026, 3, 1), date(2026, 3, 15),
+    ]
+
+
+@pytest.mark.parametrize("semente", SEMENTES)
+def test_contagens_por_dia_iguais_ao_oraculo(semente):
+    df = _gerar_pedidos(semente)
+    for excluir_id in _excluir_ids(df, semente):
+        for dia in _dias_do_periodo():
+            assert ra.clientes_em_confeccao_no_dia(df, dia, excluir_id) == \
+                antigo_clientes_em_confeccao(df, dia, excluir_id)
+            assert ra.contar_confeccoes_no_dia(df, dia, excluir_id) == \
+                len(antigo_clientes_em_confeccao(df, dia, excluir_id))
+            assert ra.contar_provas_no_dia(df, dia, excluir_id) == \
+                antigo_contar_provas(df, dia, excluir_id)
+            for confirmar in (False, True):
+                assert ra.validar_data_confeccao(df, dia, excluir_id, confirmar) == \
+                    antigo_validar(df, dia, excluir_id, confirmar)
+
+
+@pytest.mark.parametrize("semente", SEMENTES)
+def test_conjuntos_de_dias_iguais_ao_oraculo(semente):
+    df = _gerar_pedidos(semente)
+    for excluir_id in _excluir_ids(df, semente):
+        assert ra.dias_confeccao_ocupados(df, excluir_id) == antigo_dias_confeccao_ocupados(df, excluir_id)
+        for limite in (0, 1, ra.LIMITE_PROVAS_PARA_CONFECCAO):
+            assert ra.dias_com_provas_lotadas(df, excluir_id, limite) == \
+                antigo_dias_provas_lotadas(df, excluir_id, limite)
+
+
+@pytest.mark.parametrize("semente", SEMENTES)
+def test_entrega_proxima_igual_ao_oraculo(semente):
+    df = _gerar_pedidos(semente)
+    for dias_antecedencia in (-2, 0, 7, 30):
+        novo = ra.pedidos_com_entrega_proxima(df, HOJE, dias_antecedencia)
+        antigo = antigo_entrega_proxima(df, HOJE, dias_antecedencia)
+        if antigo.empty:
+            assert novo.empty
+            continue
+        pd.testing.assert_frame_equal(novo, antigo)
+
+
+def test_tem_prova2_desligado_com_data_valida_conta():
+    """A 2ª prova conta sempre que `data_prova2` é uma data válida, com ou sem a caixa marcada."""
+    df = pd.DataFrame([
+        {"rowid": "a", "cancelado": 0, "peca": "Vestido", "data_prova": "",
+         "tem_prova2": 0, "data_prova2": HOJE.isoformat()},
+        {"rowid": "b", "cancelado": 0, "peca": "Vestido", "data_prova": "",
+         "tem_prova2": 1, "data_prova2": ""},
+    ])
+    assert ra.contar_provas_no_dia(df, HOJE) == antigo_contar_provas(df, HOJE) == 1
+
+
+def test_vazios():
+    vazio = pd.DataFrame()
+    assert ra.contar_provas_no_dia(vazio, HOJE) == 0
+    assert ra.dias_confeccao_ocupados(vazio) == set()
+    assert ra.validar_data_confeccao(vazio, HOJE) == ("ok", "")
+    assert ra.pedidos_com_entrega_proxima(vazio, HOJE, 7).empty
+    assert np.array_equal(ra._dias_das_datas(pd.Series([], dtype=object)), np.array([], dtype=np.int64))
+
+
+def test_dataframe_alterado_no_lugar_nao_reaproveita_indice():
+    df = _gerar_pedidos(1, n=10)
+    dia = HOJE + timedelta(days=60)
+    assert ra.contar_confeccoes_no_dia(df, dia) == 0
+    df.loc[df.index[0], ["cancelado", "peca", "data_confeccao"]] = [0, "Vestido", dia.isoformat()]
+    assert ra.contar_confeccoes_no_dia(df, dia) == len(antigo_clientes_em_confeccao(df, dia)) == 1
+
+
+def test_cronograma_alterado_no_lugar_nao_reaproveita_capacidade():
+    crono = pd.DataFrame([
+        {"encomenda_id": "a", "data": HOJE.isoformat(), "horas": 3.0, "concluida": 0},
+        {"encomenda_id": "b", "data": HOJE.isoformat(), "horas": 1.0, "concluida": 0},
+    ])
+    assert ra.indice_capacidade(crono).horas_no_dia(HOJE) == 4.0
+    crono.loc[1, "horas"] = 2.5
+    assert ra.indice_capacidade(crono).horas_no_dia(HOJE) == 5.5
+
+
+def test_sugestoes_passam_livres_na_validacao_com_capacidade():
+    df = _gerar_pedidos(2, n=40)
+    crono = pd.DataFrame([
+        {"encomenda_id": "a", "data": (HOJE + timedelta(days=d)).isoformat(), "horas": 6.0, "concluida": 0}
+        for d in range(0, 20, 3)
+    ])
+    for horas_dia in (2.0, ra.HORAS_CONFECCAO, 8.0):
+        cap = ra.indice_capacidade(crono, horas_dia)
+        sugestoes = ra.sugerir_datas_confeccao(df, HOJE, 5, capacidade=cap)
+        assert all(ra.validar_data_confeccao(df, d, capacidade=cap)[0] == "ok" for d in sugestoes)
+        if horas_dia < ra.HORAS_CONFECCAO:
+            assert sugestoes == []
+        else:
+            assert len(sugestoes) == 5
+
+
+def test_capacidade_com_data_digitada_errado_nao_estica_o_array():
+    crono = pd.DataFrame([
+        {"encomenda_id": "a", "data": HOJE.isoformat(), "horas": 3.0, "concluida": 0},
+        {"encomenda_id": "b", "data": "2206-03-10", "horas": 1.0, "concluida": 0},
+        {"encomenda_id": "c", "data": "0001-01-01", "horas": 6.0, "concluida": 0},
+        {"encomenda_id": "c", "data": "0001-01-01", "horas": 2.5, "concluida": 0},
+    ])
+    cap = ra.indice_capacidade(crono, 8.0)
+    assert len(cap.horas) == 1
+    assert cap.horas_no_dia(HOJE) == 3.0
+    assert cap.horas_no_dia(date(2206, 3, 10)) == 1.0
+    assert cap.horas_no_dia(date(1, 1, 1)) == 8.5
+    assert cap.horas_no_dia(date(1, 1, 1), excluir_id="c") == 0.0
+    assert cap.dias_sem_folga(ra.HORAS_CONFECCAO) == [(date(1, 1, 1) - date(1970, 1, 1)).days]
+    assert cap.dias_sem_folga(6.0) == [(date(1, 1, 1) - date(1970, 1, 1)).days,
+                                       (HOJE - date(1970, 1, 1)).days]
+
+
+def test_flags_sem_tipar_sao_convertidas_na_entrada():
+    dia = HOJE + timedelta(days=5)
+    df = pd.DataFrame([
+        {"rowid": "a", "cancelado": "0", "etapa": "1", "peca": "Vestido", "data_confeccao": dia.isoformat(),
+         "data_entrega": dia.isoformat()},
+        {"rowid": "b", "cancelado": None, "etapa": None, "peca": "Saia", "data_confeccao": dia.isoformat(),
+         "data_entrega": dia.isoformat()},
+        {"rowid": "c", "cancelado": "1", "etapa": "1", "peca": "Blusa", "data_confeccao": dia.isoformat(),
+         "data_entrega": dia.isoformat()},
+    ])
+    assert ra.contar_confeccoes_no_dia(df, dia) == 2
+    assert sorted(ra.pedidos_com_entrega_proxima(df, HOJE, 7)["rowid"]) == ["a", "b"]
+
+
+def test_copia_marcada_com_geracao_nao_calcula_hash(monkeypatch):
+    df = _gerar_pedidos(3, n=30)
+    df.attrs[ra._ATTR_GERACAO] = f"lila_encomendas#1:7:'listar'@{id(df.index)}"
+    indice = ra.indice_ocupacao(df)
+
+    def sem_hash(*args, **kwargs):
+        raise AssertionError("a cópia marcada não deveria ser lida para o hash")
+
+    monkeypatch.setattr(pd.util, "hash_pandas_object", sem_hash)
+    assert ra.indice_ocupacao(df) is indice
+    # Outra cópia da mesma geração (como sai a cada rerun): mesmo índice.
+    outra = df.copy()
+    outra.attrs[ra._ATTR_GERACAO] = f"lila_encomendas#1:7:'listar'@{id(outra.index)}"
+    assert ra.indice_ocupacao(outra) is indice
+
+
+def test_derivado_de_copia_marcada_usa_o_hash():
+    df = _gerar_pedidos(4, n=30)
+    df.attrs[ra._ATTR_GERACAO] = f"lila_encomendas#1:8:'listar'@{id(df.index)}"
+    dia = HOJE + timedelta(days=60)
+    base = ra.contar_confeccoes_no_dia(df, dia)
+    alterado = df.assign(data_confeccao=dia.isoformat(), cancelado=0, peca="Vestido")
+    assert alterado.attrs[ra._ATTR_GERACAO] == df.attrs[ra._ATTR_GERACAO]
+    assert ra.contar_confeccoes_no_dia(alterado, dia) == len(alterado) != base
+    filtrado = df[df["cancelado"] == 1]
+    assert ra.contar_confeccoes_no_dia(filtrado, dia) == len(antigo_clientes_em_confeccao(filtrado, dia))